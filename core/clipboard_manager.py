@@ -130,6 +130,58 @@ class ClipboardManager:
             formats.append(fmt)
         return formats
 
+    def _read_backup(self) -> ClipboardContent:
+        """
+        读取当前剪贴板内容作为备份（调用方须已打开剪贴板）
+
+        Returns:
+            备份内容；不支持备份的格式 data 为 None
+        """
+        formats = self._get_available_formats()
+
+        if not formats:
+            # 剪贴板为空
+            logger.debug("剪贴板为空，备份完成")
+            return ClipboardContent(
+                format=ClipboardFormat.UNKNOWN,
+                data=None,
+                raw_formats=[]
+            )
+
+        # 优先备份文本
+        if win32con.CF_UNICODETEXT in formats:
+            try:
+                data = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+                logger.debug(f"已备份文本内容，长度: {len(data)}")
+                return ClipboardContent(
+                    format=ClipboardFormat.TEXT,
+                    data=data,
+                    raw_formats=formats
+                )
+            except Exception as e:
+                logger.warning(f"备份文本内容失败: {e}")
+
+        # 尝试备份位图
+        if win32con.CF_DIB in formats:
+            try:
+                data = win32clipboard.GetClipboardData(win32con.CF_DIB)
+                logger.debug("已备份位图内容")
+                return ClipboardContent(
+                    format=ClipboardFormat.BITMAP,
+                    data=bytes(data),
+                    raw_formats=formats
+                )
+            except Exception as e:
+                logger.warning(f"备份位图内容失败: {e}")
+
+        # 无法备份的格式
+        logger.warning(f"剪贴板包含不支持备份的格式: {formats}")
+        return ClipboardContent(
+            format=ClipboardFormat.UNKNOWN,
+            data=None,
+            raw_formats=formats
+        )
+
     def backup(self) -> bool:
         """
         备份当前剪贴板内容
@@ -141,59 +193,44 @@ class ClipboardManager:
             raise ClipboardError("无法打开剪贴板进行备份")
 
         try:
-            formats = self._get_available_formats()
-
-            if not formats:
-                # 剪贴板为空
-                self._backup_content = ClipboardContent(
-                    format=ClipboardFormat.UNKNOWN,
-                    data=None,
-                    raw_formats=[]
-                )
-                self._has_backup = True
-                logger.debug("剪贴板为空，备份完成")
-                return True
+            self._backup_content = self._read_backup()
+            self._has_backup = True
+            return True
 
-            # 优先备份文本
-            if win32con.CF_UNICODETEXT in formats:
-                try:
-                    data = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
-                    self._backup_content = ClipboardContent(
-                        format=ClipboardFormat.TEXT,
-                        data=data,
-                        raw_formats=formats
-                    )
-                    self._has_backup = True
-                    logger.debug(f"已备份文本内容，长度: {len(data)}")
-                    return True
-                except Exception as e:
-                    logger.warning(f"备份文本内容失败: {e}")
-
-            # 尝试备份位图
-            if win32con.CF_DIB in formats:
-                try:
-                    data = win32clipboard.GetClipboardData(win32con.CF_DIB)
-                    self._backup_content = ClipboardContent(
-                        format=ClipboardFormat.BITMAP,
-                        data=bytes(data),
-                        raw_formats=formats
-                    )
-                    self._has_backup = True
-                    logger.debug("已备份位图内容")
-                    return True
-                except Exception as e:
-                    logger.warning(f"备份位图内容失败: {e}")
-
-            # 无法备份的格式
-            self._backup_content = ClipboardContent(
-                format=ClipboardFormat.UNKNOWN,
-                data=None,
-                raw_formats=formats
-            )
+        finally:
+            self._close_clipboard()
+
+    def swap_text(self, text: str) -> bool:
+        """
+        备份当前剪贴板内容并写入文本（同一次打开/关闭剪贴板内完成）
+
+        相当于 backup() + set_text()，但只占用一次剪贴板，
+        其他进程无法在备份与写入之间插入修改。之后用 restore() 恢复。
+
+        Args:
+            text: 要写入的文本
+
+        Returns:
+            是否成功写入
+
+        Raises:
+            ClipboardError: 无法打开剪贴板
+        """
+        if not self._open_clipboard():
+            raise ClipboardError("无法打开剪贴板")
+
+        try:
+            self._backup_content = self._read_backup()
             self._has_backup = True
-            logger.warning(f"剪贴板包含不支持备份的格式: {formats}")
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, text)
+            logger.debug(f"已设置剪贴板文本，长度: {len(text)}")
             return True
 
+        except Exception as e:
+            logger.error(f"设置剪贴板文本失败: {e}")
+            return False
+
         finally:
             self._close_clipboard()
 
@@ -9,11 +9,17 @@
 
 import sys
 import time
+import asyncio
+import hashlib
 import logging
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, FrozenSet, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property, lru_cache
 from datetime import datetime
 
 import uiautomation as auto
@@ -24,6 +30,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from services.config_manager import get_config
 from models.enums import RiskLevel
 from .element_locator import get_element_locator, ElementLocator
+from .utils.keyword_matcher import KeywordMatcher
 
 
 logger = logging.getLogger(__name__)
@@ -66,6 +73,11 @@ class PopupInfo:
     detected_time: datetime = field(default_factory=datetime.now)
     screenshot_path: Optional[str] = None
 
+    @cached_property
+    def combined_text(self) -> str:
+        """标题与内容合并后的文本（只拼接一次，供关键词检查复用）"""
+        return f"{self.title} {self.content}"
+
     @property
     def is_risk_popup(self) -> bool:
         """是否为风控弹窗"""
@@ -93,6 +105,14 @@ class PopupInfo:
 # 风控关键词配置
 # ============================================================
 
+# 风险等级，按严重程度从高到低
+RISK_LEVELS_BY_SEVERITY: Tuple[RiskLevel, ...] = (
+    RiskLevel.critical,
+    RiskLevel.high,
+    RiskLevel.medium,
+    RiskLevel.low,
+)
+
 RISK_KEYWORDS: Dict[RiskLevel, List[str]] = {
     RiskLevel.critical: [
         "账号已被封禁",
@@ -131,6 +151,56 @@ RISK_KEYWORDS: Dict[RiskLevel, List[str]] = {
     ],
 }
 
+
+def _build_risk_matcher() -> KeywordMatcher[RiskLevel]:
+    """将 RISK_KEYWORDS 按风险等级从高到低构建为单个匹配自动机"""
+    return KeywordMatcher(
+        (keyword, level)
+        for level in RISK_LEVELS_BY_SEVERITY
+        for keyword in RISK_KEYWORDS.get(level, [])
+    )
+
+
+# 风控关键词自动机（一次扫描返回最高等级命中）；弹窗检测与风控检测共用
+_RISK_MATCHER = _build_risk_matcher()
+
+
+@lru_cache(maxsize=256)
+def _scan_text_for_risk(text: str) -> Optional[Tuple[str, RiskLevel]]:
+    """
+    扫描文本中的风控关键词（带缓存）
+
+    轮询时同一段弹窗内容 / OCR 结果会被反复检查，缓存后重复文本直接命中。
+
+    Returns:
+        (关键词, 风险等级)，未命中返回 None
+    """
+    return _RISK_MATCHER.find(text)
+
+
+def find_risk_keyword(text: str) -> Optional[Tuple[str, RiskLevel]]:
+    """
+    查找文本中等级最高的风控关键词
+
+    Args:
+        text: 待检查文本
+
+    Returns:
+        (关键词, 风险等级)，未命中返回 None
+    """
+    # 短于最短关键词的文本不可能命中，也不进入缓存
+    if not text or len(text) < _RISK_MATCHER.min_length:
+        return None
+    return _scan_text_for_risk(text)
+
+
+def reset_risk_matcher() -> None:
+    """关键词变更后重建自动机并清空扫描缓存"""
+    global _RISK_MATCHER
+    _RISK_MATCHER = _build_risk_matcher()
+    _scan_text_for_risk.cache_clear()
+
+
 # 可自动关闭的弹窗关键词
 AUTO_CLOSE_KEYWORDS = [
     "更新提示",
@@ -152,6 +222,19 @@ POPUP_CLASS_NAMES = [
     "TipWnd",           # 提示窗口
 ]
 
+# 微信自定义弹窗类名（按检测顺序，去掉 Windows 标准对话框）
+WECHAT_POPUP_CLASSES = tuple(name for name in POPUP_CLASS_NAMES if name != "#32770")
+
+# 关闭类按钮名称
+CLOSE_BUTTON_NAMES = frozenset({"关闭", "取消", "×", "X", "Close", "Cancel"})
+
+# 确认类按钮名称
+CONFIRM_BUTTON_NAMES = frozenset({"确定", "确认", "好的", "OK", "是", "Yes"})
+
+
+# 截图去重缓存容量（像素哈希 -> 文件路径）
+SCREENSHOT_CACHE_SIZE = 32
+
 
 # ============================================================
 # 弹窗检测器
@@ -180,12 +263,45 @@ class PopupDetector:
 
         # 主窗口缓存
         self._main_window: Optional[auto.WindowControl] = None
+        # 主窗口句柄和设置主窗口的线程：其他线程（异步检测的工作线程）
+        # 按句柄重新获取控件，不跨套间使用调用方线程创建的 UIA 代理
+        self._main_hwnd: int = 0
+        self._main_window_thread: Optional[int] = None
+
+        # 截图缓存：像素哈希 -> 已保存路径（LRU）
+        self._screenshot_cache: "OrderedDict[bytes, str]" = OrderedDict()
 
         logger.debug("弹窗检测器初始化完成")
 
     def set_main_window(self, window: auto.WindowControl) -> None:
         """设置主窗口引用"""
         self._main_window = window
+        self._main_window_thread = threading.get_ident()
+        try:
+            self._main_hwnd = window.NativeWindowHandle if window else 0
+        except Exception:
+            self._main_hwnd = 0
+
+    def _get_main_window(self) -> Optional[auto.WindowControl]:
+        """
+        获取当前线程可用的主窗口控件
+
+        设置主窗口的线程直接使用缓存的控件；其他线程按句柄重新获取。
+
+        Returns:
+            主窗口控件，未设置或无法获取返回 None
+        """
+        if self._main_window is None:
+            return None
+        if threading.get_ident() == self._main_window_thread:
+            return self._main_window
+        if not self._main_hwnd:
+            return None
+        try:
+            return auto.ControlFromHandle(self._main_hwnd)
+        except Exception as e:
+            logger.debug(f"按句柄获取主窗口失败: {e}")
+            return None
 
     # ========================================================
     # 弹窗检测
@@ -225,7 +341,7 @@ class PopupDetector:
 
     def detect_all_popups(self) -> List[PopupInfo]:
         """
-        检测所有弹窗
+        检测所有弹窗（顶层弹窗窗口 + 主窗口内的模态弹窗）
 
         Returns:
             弹窗列表
@@ -260,8 +376,36 @@ class PopupDetector:
             except Exception as e:
                 logger.debug(f"检测弹窗类型 {class_name} 时出错: {e}")
 
+        # 宿主在微信主窗口内的模态弹窗不是顶层窗口，按类名枚举不到，单独探测
+        popup = self._detect_modal_window()
+        if popup:
+            popups.append(popup)
+
         return popups
 
+    async def detect_popup_async(self, timeout: float = 1.0) -> Optional[PopupInfo]:
+        """
+        异步检测当前是否有弹窗
+
+        在工作线程中执行 detect_popup，调用方可与其他检查并发 await。
+
+        Args:
+            timeout: 检测超时时间（秒）
+
+        Returns:
+            检测到的弹窗信息，无弹窗返回 None
+        """
+        return await asyncio.to_thread(_run_with_uia, self.detect_popup, timeout)
+
+    async def detect_all_popups_async(self) -> List[PopupInfo]:
+        """
+        异步检测所有弹窗
+
+        Returns:
+            弹窗列表
+        """
+        return await asyncio.to_thread(_run_with_uia, self.detect_all_popups)
+
     def _detect_standard_dialog(self) -> Optional[PopupInfo]:
         """检测标准 Windows 对话框"""
         try:
@@ -280,9 +424,7 @@ class PopupDetector:
 
     def _detect_wechat_popup(self) -> Optional[PopupInfo]:
         """检测微信自定义弹窗"""
-        wechat_popup_classes = ["WeChatPopupWnd", "ConfirmWnd", "AlertWnd", "TipWnd"]
-
-        for class_name in wechat_popup_classes:
+        for class_name in WECHAT_POPUP_CLASSES:
             try:
                 popup = auto.WindowControl(
                     searchDepth=1,
@@ -299,18 +441,21 @@ class PopupDetector:
 
     def _detect_modal_window(self) -> Optional[PopupInfo]:
         """检测模态窗口"""
-        if not self._main_window:
+        main_window = self._get_main_window()
+        if not main_window:
             return None
 
         try:
             # 查找子窗口中的模态对话框
-            for child in self._main_window.GetChildren():
+            # 逐个子窗口捕获异常：弹窗关闭过程中单个失效子元素不应中断整个遍历
+            for child in main_window.GetChildren():
                 try:
-                    if child.ControlTypeName == "WindowControl":
-                        # 检查是否是弹窗特征
-                        if self._is_popup_window(child):
-                            return self._analyze_popup(child)
-                except:
+                    if child.ControlTypeName != "WindowControl":
+                        continue
+                    # 检查是否是弹窗特征
+                    if self._is_popup_window(child):
+                        return self._analyze_popup(child)
+                except Exception:
                     continue
 
         except Exception as e:
@@ -318,18 +463,31 @@ class PopupDetector:
 
         return None
 
+    @staticmethod
+    def _is_popup_by_size(rect) -> bool:
+        """
+        仅根据窗口矩形预筛选弹窗（纯计算，不访问 UIA）
+
+        尺寸只能排除不可能是弹窗的窗口；小工具窗口、提示框、小程序面板
+        与弹窗尺寸相近，是否为弹窗仍需由确认/取消按钮判断。
+
+        Args:
+            rect: 窗口 BoundingRectangle
+
+        Returns:
+            尺寸是否可能为弹窗（True 时仍需查找按钮判断）
+        """
+        width = rect.right - rect.left
+        height = rect.bottom - rect.top
+
+        # 过小或过大都不是弹窗
+        return 100 <= width <= 800 and 50 <= height <= 600
+
     def _is_popup_window(self, window: auto.Control) -> bool:
         """判断是否是弹窗窗口"""
         try:
-            # 检查窗口大小（弹窗通常较小）
-            rect = window.BoundingRectangle
-            width = rect.right - rect.left
-            height = rect.bottom - rect.top
-
-            if width < 100 or height < 50:
-                return False
-
-            if width > 800 or height > 600:
+            # 先根据窗口大小排除（单次属性读取，弹窗通常较小）
+            if not self._is_popup_by_size(window.BoundingRectangle):
                 return False
 
             # 使用 element_locator 尝试查找弹窗按钮（如果有配置）
@@ -353,7 +511,7 @@ class PopupDetector:
 
             return False
 
-        except:
+        except Exception:
             return False
 
     def _analyze_popup(self, window: auto.WindowControl) -> Optional[PopupInfo]:
@@ -411,11 +569,12 @@ class PopupDetector:
             # 获取所有文本控件
             for child in window.GetChildren():
                 try:
-                    if child.ControlTypeName == "TextControl":
-                        text = child.Name
-                        if text and text.strip():
-                            texts.append(text.strip())
-                except:
+                    if child.ControlTypeName != "TextControl":
+                        continue
+                    text = child.Name
+                    if text and text.strip():
+                        texts.append(text.strip())
+                except Exception:
                     continue
 
             # 递归查找深层文本
@@ -426,7 +585,7 @@ class PopupDetector:
                     text = ctrl.Name
                     if text and text.strip() and text not in texts:
                         texts.append(text.strip())
-                except:
+                except Exception:
                     continue
 
         except Exception as e:
@@ -446,12 +605,17 @@ class PopupDetector:
             return
 
         try:
-            for child in parent.GetChildren():
+            children = parent.GetChildren()
+        except Exception:
+            return
+
+        for child in children:
+            try:
                 if child.ControlTypeName == "TextControl":
                     result.append(child)
                 self._find_text_controls(child, result, current_depth + 1, max_depth)
-        except:
-            pass
+            except Exception:
+                continue
 
     def _extract_buttons(self, window: auto.WindowControl) -> List[str]:
         """提取弹窗按钮"""
@@ -461,11 +625,12 @@ class PopupDetector:
             # 查找所有按钮
             for child in window.GetChildren():
                 try:
-                    if child.ControlTypeName == "ButtonControl":
-                        name = child.Name
-                        if name and name.strip():
-                            buttons.append(name.strip())
-                except:
+                    if child.ControlTypeName != "ButtonControl":
+                        continue
+                    name = child.Name
+                    if name and name.strip():
+                        buttons.append(name.strip())
+                except Exception:
                     continue
 
             # 递归查找
@@ -476,7 +641,7 @@ class PopupDetector:
                     name = ctrl.Name
                     if name and name.strip() and name not in buttons:
                         buttons.append(name.strip())
-                except:
+                except Exception:
                     continue
 
         except Exception as e:
@@ -496,12 +661,17 @@ class PopupDetector:
             return
 
         try:
-            for child in parent.GetChildren():
+            children = parent.GetChildren()
+        except Exception:
+            return
+
+        for child in children:
+            try:
                 if child.ControlTypeName == "ButtonControl":
                     result.append(child)
                 self._find_button_controls(child, result, current_depth + 1, max_depth)
-        except:
-            pass
+            except Exception:
+                continue
 
     def _determine_popup_type(self, title: str, content: str) -> PopupType:
         """判断弹窗类型"""
@@ -531,17 +701,13 @@ class PopupDetector:
 
     def _check_risk_level(self, title: str, content: str) -> Optional[RiskLevel]:
         """检查风险等级"""
-        combined = f"{title} {content}"
-
-        # 按风险等级从高到低检查
-        for level in [RiskLevel.critical, RiskLevel.high, RiskLevel.medium, RiskLevel.low]:
-            keywords = RISK_KEYWORDS.get(level, [])
-            for keyword in keywords:
-                if keyword in combined:
-                    logger.warning(f"检测到风险关键词: '{keyword}', 级别: {level.value}")
-                    return level
+        match = find_risk_keyword(f"{title} {content}")
+        if not match:
+            return None
 
-        return None
+        keyword, level = match
+        logger.warning(f"检测到风险关键词: '{keyword}', 级别: {level.value}")
+        return level
 
     # ========================================================
     # 弹窗处理
@@ -584,15 +750,14 @@ class PopupDetector:
             except Exception:
                 pass
 
-            # 回退：尝试点击关闭按钮
-            close_buttons = ["关闭", "取消", "×", "X", "Close", "Cancel"]
-            for btn_name in close_buttons:
-                btn = window.ButtonControl(Name=btn_name)
-                if btn.Exists(0.5, 0):
-                    btn.Click()
-                    time.sleep(0.3)
-                    logger.info(f"已点击 '{btn_name}' 关闭弹窗")
-                    return True
+            # 回退：一次遍历查找任一关闭按钮
+            btn = self._find_button_by_names(window, CLOSE_BUTTON_NAMES)
+            if btn is not None:
+                btn_name = btn.Name
+                btn.Click()
+                time.sleep(0.3)
+                logger.info(f"已点击 '{btn_name}' 关闭弹窗")
+                return True
 
             # 尝试按 Escape 关闭
             window.SendKeys("{Escape}")
@@ -629,7 +794,7 @@ class PopupDetector:
             return PopupAction.ALERT
 
         # 检查是否可以自动关闭
-        combined = f"{popup.title} {popup.content}"
+        combined = popup.combined_text
         for keyword in AUTO_CLOSE_KEYWORDS:
             if keyword in combined:
                 if self.close_popup(popup):
@@ -669,15 +834,14 @@ class PopupDetector:
             except Exception:
                 pass
 
-            # 回退：按名称查找
-            confirm_names = ["确定", "确认", "好的", "OK", "是", "Yes"]
-            for name in confirm_names:
-                btn = popup.window.ButtonControl(Name=name)
-                if btn.Exists(0.5, 0):
-                    btn.Click()
-                    time.sleep(0.3)
-                    logger.info(f"已点击 '{name}' 确认弹窗")
-                    return True
+            # 回退：一次遍历查找任一确认按钮
+            btn = self._find_button_by_names(popup.window, CONFIRM_BUTTON_NAMES)
+            if btn is not None:
+                name = btn.Name
+                btn.Click()
+                time.sleep(0.3)
+                logger.info(f"已点击 '{name}' 确认弹窗")
+                return True
 
             return False
 
@@ -685,6 +849,28 @@ class PopupDetector:
             logger.error(f"点击确认按钮时出错: {e}")
             return False
 
+    def _find_button_by_names(
+        self,
+        window: auto.Control,
+        names: FrozenSet[str]
+    ) -> Optional[auto.Control]:
+        """
+        单次查找名称属于候选集合的按钮
+
+        使用析取条件一次遍历控件树，避免按名称逐个 Exists 等待。
+
+        Args:
+            window: 弹窗窗口
+            names: 候选按钮名称集合
+
+        Returns:
+            第一个匹配的按钮，未找到返回 None
+        """
+        btn = window.ButtonControl(Compare=lambda c, depth: c.Name in names)
+        if btn.Exists(0, 0):
+            return btn
+        return None
+
     def is_risk_popup(self, popup: PopupInfo) -> bool:
         """
         判断是否为风控弹窗
@@ -702,13 +888,38 @@ class PopupDetector:
     # ========================================================
 
     def _take_screenshot(self, window: auto.WindowControl, prefix: str) -> Optional[str]:
-        """保存弹窗截图"""
+        """
+        保存弹窗截图
+
+        像素内容与最近截图相同时直接返回已有文件路径，不再重复编码写盘。
+        """
         try:
+            # 用 uiautomation 自带的 GDI 位图抓取，不依赖可选的 PIL
+            bitmap = window.ToBitmap()
+            if not bitmap or not bitmap.Width or not bitmap.Height:
+                logger.error("抓取弹窗截图失败")
+                return None
+
+            pixels = bitmap.GetAllPixelColors()
+            digest = hashlib.blake2b(memoryview(pixels), digest_size=8).digest()
+
+            cached = self._screenshot_cache.get(digest)
+            if cached and Path(cached).exists():
+                self._screenshot_cache.move_to_end(digest)
+                logger.debug(f"弹窗截图与已有截图相同，复用: {cached}")
+                return cached
+
             self._screenshot_dir.mkdir(parents=True, exist_ok=True)
-            filename = f"{prefix}_{int(time.time())}.png"
+            filename = f"{prefix}_{int(time.time() * 1000)}.png"
             filepath = self._screenshot_dir / filename
 
-            window.CaptureToImage(str(filepath))
+            if not bitmap.ToFile(str(filepath)):
+                logger.error(f"保存截图失败: {filepath}")
+                return None
+            self._screenshot_cache[digest] = str(filepath)
+            if len(self._screenshot_cache) > SCREENSHOT_CACHE_SIZE:
+                self._screenshot_cache.popitem(last=False)
+
             logger.debug(f"弹窗截图已保存: {filepath}")
             return str(filepath)
 
@@ -744,26 +955,75 @@ class PopupDetector:
 # ============================================================
 
 _detector: Optional[PopupDetector] = None
+_detector_lock = threading.Lock()
+
+# 进行中的检测任务：同一时刻的并发调用共享一次 UIA 检测结果
+_inflight: Dict[Tuple[str, tuple], Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _run_with_uia(func, *args):
+    """在当前线程初始化 UIAutomation 后执行函数（供工作线程使用）"""
+    with auto.UIAutomationInitializerInThread():
+        return func(*args)
+
+
+def _run_coalesced(name: str, func, *args):
+    """
+    合并并发调用
+
+    已有同名、同参数的检测在执行时，后来的调用直接等待并复用其结果，
+    而不是各自重复遍历 UIA 树；参数不同（如 timeout）的调用各自执行。
+    """
+    key = (name, args)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _inflight[key] = future
+
+    if not is_owner:
+        return future.result()
+
+    try:
+        result = func(*args)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
 
 
 def get_popup_detector() -> PopupDetector:
     """获取弹窗检测器单例"""
     global _detector
     if _detector is None:
-        _detector = PopupDetector()
+        with _detector_lock:
+            if _detector is None:
+                _detector = PopupDetector()
     return _detector
 
 
 def detect_popup(timeout: float = 1.0) -> Optional[PopupInfo]:
-    """快捷检测弹窗"""
-    return get_popup_detector().detect_popup(timeout)
+    """快捷检测弹窗（并发调用合并为一次检测）"""
+    return _run_coalesced("detect_popup", get_popup_detector().detect_popup, timeout)
+
+
+def detect_all_popups() -> List[PopupInfo]:
+    """快捷检测所有弹窗（并发调用合并为一次检测）"""
+    return _run_coalesced("detect_all_popups", get_popup_detector().detect_all_popups)
+
+
+async def detect_popup_async(timeout: float = 1.0) -> Optional[PopupInfo]:
+    """快捷异步检测弹窗"""
+    return await asyncio.to_thread(_run_with_uia, detect_popup, timeout)
 
 
 def check_risk_keywords(text: str) -> Optional[RiskLevel]:
     """检查文本中的风控关键词"""
-    for level in [RiskLevel.critical, RiskLevel.high, RiskLevel.medium, RiskLevel.low]:
-        keywords = RISK_KEYWORDS.get(level, [])
-        for keyword in keywords:
-            if keyword in text:
-                return level
-    return None
+    match = find_risk_keyword(text)
+    return match[1] if match else None
@@ -9,13 +9,19 @@
 """
 
 import sys
+import bisect
 import time
 import logging
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Callable
+from typing import Optional, List, Dict, Any, Callable, Tuple, Deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from collections import deque
+from itertools import islice
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor
 
 import uiautomation as auto
 
@@ -27,11 +33,13 @@ from models.enums import RiskLevel
 from core.popup_detector import (
     PopupDetector,
     PopupInfo,
-    PopupType,
-    RISK_KEYWORDS,
+    RISK_LEVELS_BY_SEVERITY,
+    find_risk_keyword,
     get_popup_detector,
+    reset_risk_matcher,
 )
 from core.wechat_controller import get_wechat_controller, WeChatStatus
+from core.utils.keyword_matcher import KeywordMatcher
 
 
 logger = logging.getLogger(__name__)
@@ -41,13 +49,43 @@ logger = logging.getLogger(__name__)
 # OCR 支持（可选）
 # ============================================================
 
-try:
-    import pytesseract
-    from PIL import Image
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-    logger.debug("pytesseract 未安装，OCR 功能不可用")
+# 仅检查是否安装，实际导入推迟到首次 OCR（Pillow / OCR 库导入较慢，
+# 且默认不启用 OCR）
+OCR_AVAILABLE = find_spec("PIL") is not None and (
+    find_spec("tesserocr") is not None or find_spec("pytesseract") is not None
+)
+
+# 以下模块在 _load_ocr_modules() 中按需导入
+Image = None
+ImageStat = None
+tesserocr = None      # 优先：进程内常驻，语言模型只加载一次
+pytesseract = None    # 回退：每次调用启动 tesseract 子进程
+
+
+def _load_ocr_modules() -> None:
+    """首次使用 OCR 时导入相关模块"""
+    global Image, ImageStat, tesserocr, pytesseract
+    if Image is not None:
+        return
+
+    from PIL import Image as _Image, ImageStat as _ImageStat
+
+    try:
+        import tesserocr as _tesserocr
+    except ImportError:
+        _tesserocr = None
+
+    if _tesserocr is None:
+        import pytesseract as _pytesseract
+        pytesseract = _pytesseract
+
+    tesserocr = _tesserocr
+    ImageStat = _ImageStat
+    Image = _Image
+
+
+if not OCR_AVAILABLE:
+    logger.debug("tesserocr / pytesseract 未安装，OCR 功能不可用")
 
 
 # ============================================================
@@ -74,6 +112,11 @@ class RiskDetectionResult:
     popup_info: Optional[PopupInfo] = None
     screenshot_path: Optional[str] = None
     detection_time: datetime = field(default_factory=datetime.now)
+    # 检测时间的 epoch 秒数，构造时计算一次，供历史查询直接比较
+    detection_epoch: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.detection_epoch = self.detection_time.timestamp()
 
     @property
     def is_critical(self) -> bool:
@@ -126,6 +169,59 @@ WINDOW_TITLE_KEYWORDS: Dict[RiskLevel, List[str]] = {
 }
 
 
+# 风控检测关注的微信窗口类名（主窗口在前），值为排序序号
+_WECHAT_WINDOW_ORDER: Dict[str, int] = {
+    class_name: index
+    for index, class_name in enumerate((
+        "WeChatMainWndForPC",
+        "WeChatLoginWndForPC",
+        "ChatWnd",
+        "SnsWnd",
+        "SnsEditWnd",
+        "SelectContactWnd",
+    ))
+}
+
+# OCR 预处理：灰度方差低于该值视为无文字的空白画面，跳过 OCR
+OCR_MIN_VARIANCE = 50.0
+
+# OCR 前图像缩放上限（像素）
+OCR_MAX_SIZE = (1280, 1280)
+
+# tesseract 参数：LSTM 引擎，按单一文本块识别
+OCR_TESSERACT_CONFIG = "--oem 1 --psm 6"
+
+# 微信窗口枚举结果缓存时间（秒）
+WINDOW_CACHE_TTL = 1.0
+
+# 窗口标题关键词自动机（按等级从高到低，一次扫描返回最高等级命中）
+_TITLE_MATCHER: KeywordMatcher[RiskLevel] = KeywordMatcher(
+    (keyword, level)
+    for level in RISK_LEVELS_BY_SEVERITY
+    for keyword in WINDOW_TITLE_KEYWORDS.get(level, [])
+)
+
+
+def _save_bitmap(bitmap: "auto.Bitmap", filepath: str) -> bool:
+    """
+    在截图线程中编码并写入截图
+
+    只接收调用线程已抓取好的位图（GDI+ 对象，不依赖 COM 套间），
+    不在后台线程访问 UIA 元素。
+
+    Returns:
+        是否保存成功
+    """
+    try:
+        if bitmap.ToFile(filepath):
+            logger.debug(f"截图已保存: {filepath}")
+            return True
+        logger.error(f"保存截图失败: {filepath}")
+    except Exception as e:
+        logger.error(f"保存截图失败: {e}")
+    return False
+
+
 # ============================================================
 # 风控检测器
 # ============================================================
@@ -137,24 +233,74 @@ class RiskDetector:
     综合检测微信运行中的各类风控信号
     """
 
+    __slots__ = (
+        "_popup_detector",
+        "_controller",
+        "_config_snapshot",
+        "_screenshot_dir",
+        "_save_screenshots",
+        "_enable_ocr",
+        "_risk_callbacks",
+        "_cb_lock",
+        "_window_cache",
+        "_detection_history",
+        "_max_history",
+        "_history_ts",
+        "_tess_api",
+        "_tess_lock",
+        "_screenshot_pool",
+    )
+
     def __init__(self):
         """初始化风控检测器"""
         self._popup_detector = get_popup_detector()
         self._controller = get_wechat_controller()
 
-        self._screenshot_dir = Path(get_config("advanced.screenshot_dir", "screenshots"))
-        self._save_screenshots = get_config("advanced.save_screenshots", False)
-        self._enable_ocr = get_config("advanced.enable_ocr", False) and OCR_AVAILABLE
+        # 截图编码写盘线程，避免阻塞检测流程（抓取仍在调用线程完成）
+        self._screenshot_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="risk-shot"
+        )
+
+        # tesserocr 实例（首次 OCR 时创建）
+        self._tess_api = None
+        self._tess_lock = threading.Lock()
+
+        # 配置在初始化时一次性读取，检测过程中只读属性
+        self._load_config()
 
-        # 检测回调
-        self._risk_callbacks: List[Callable[[RiskDetectionResult], None]] = []
+        # 检测回调（写时复制：修改时加锁替换元组，遍历时无需加锁）
+        self._risk_callbacks: Tuple[Callable[[RiskDetectionResult], None], ...] = ()
+        self._cb_lock = threading.RLock()
 
-        # 检测历史
-        self._detection_history: List[RiskDetectionResult] = []
+        # 微信窗口枚举缓存: (枚举时间, 窗口列表)
+        self._window_cache: Tuple[float, List[auto.Control]] = (0.0, [])
+
+        # 检测历史（超出上限自动淘汰最旧记录）
         self._max_history = 100
+        self._detection_history: Deque[RiskDetectionResult] = deque(maxlen=self._max_history)
+        # 与 _detection_history 一一对应的检测时间戳，用于二分查找
+        self._history_ts: Deque[float] = deque(maxlen=self._max_history)
 
         logger.debug(f"风控检测器初始化完成, OCR: {'启用' if self._enable_ocr else '禁用'}")
 
+    def _load_config(self) -> None:
+        """读取配置快照"""
+        self._config_snapshot: Dict[str, Any] = {
+            "screenshot_dir": get_config("advanced.screenshot_dir", "screenshots"),
+            "save_screenshots": get_config("advanced.save_screenshots", False),
+            "enable_ocr": get_config("advanced.enable_ocr", False),
+        }
+
+        self._screenshot_dir = Path(self._config_snapshot["screenshot_dir"])
+        self._save_screenshots = self._config_snapshot["save_screenshots"]
+        self._enable_ocr = self._config_snapshot["enable_ocr"] and OCR_AVAILABLE
+
+    def reload_config(self) -> None:
+        """重新加载配置，并重建关键词自动机与扫描缓存"""
+        self._load_config()
+        reset_risk_matcher()
+        logger.debug("风控检测器配置已重新加载")
+
     # ========================================================
     # 主要接口
     # ========================================================
@@ -211,26 +357,27 @@ class RiskDetector:
                     if not title:
                         continue
 
-                    # 检查风控关键词
-                    for level in [RiskLevel.critical, RiskLevel.high, RiskLevel.medium]:
-                        keywords = WINDOW_TITLE_KEYWORDS.get(level, [])
-                        for keyword in keywords:
-                            if keyword in title:
-                                logger.warning(
-                                    f"窗口标题检测到风控关键词: '{keyword}', "
-                                    f"标题: '{title}', 级别: {level.value}"
-                                )
-
-                                screenshot = self._take_screenshot(window, "risk_title")
-
-                                return RiskDetectionResult(
-                                    detected=True,
-                                    risk_level=level,
-                                    source=RiskSource.WINDOW_TITLE,
-                                    keyword=keyword,
-                                    detail=f"窗口标题: {title}",
-                                    screenshot_path=screenshot,
-                                )
+                    # 检查风控关键词（单次扫描）
+                    match = _TITLE_MATCHER.find(title)
+                    if match is None:
+                        continue
+
+                    keyword, level = match
+                    logger.warning(
+                        f"窗口标题检测到风控关键词: '{keyword}', "
+                        f"标题: '{title}', 级别: {level.value}"
+                    )
+
+                    screenshot = self._take_screenshot(window, "risk_title")
+
+                    return RiskDetectionResult(
+                        detected=True,
+                        risk_level=level,
+                        source=RiskSource.WINDOW_TITLE,
+                        keyword=keyword,
+                        detail=f"窗口标题: {title}",
+                        screenshot_path=screenshot,
+                    )
 
                 except Exception as e:
                     logger.debug(f"检查窗口标题时出错: {e}")
@@ -249,10 +396,11 @@ class RiskDetector:
             检测结果
         """
         try:
-            # 检测弹窗
-            popup = self._popup_detector.detect_popup(timeout=0.5)
+            # 单次枚举所有弹窗，风控弹窗与文本风险检查共用结果
+            all_popups = self._popup_detector.detect_all_popups()
 
-            if popup and popup.is_risk_popup:
+            popup = next((p for p in all_popups if p.is_risk_popup), None)
+            if popup:
                 logger.warning(
                     f"检测到风控弹窗: 类型={popup.popup_type.value}, "
                     f"标题='{popup.title}', 级别={popup.risk_level.value if popup.risk_level else 'unknown'}"
@@ -262,23 +410,21 @@ class RiskDetector:
                     detected=True,
                     risk_level=popup.risk_level or RiskLevel.medium,
                     source=RiskSource.POPUP_CONTENT,
-                    keyword=self._find_matched_keyword(popup.title, popup.content),
+                    keyword=self._find_matched_keyword(popup.combined_text),
                     detail=f"弹窗: {popup.title} - {popup.content}",
                     popup_info=popup,
                     screenshot_path=popup.screenshot_path,
                 )
 
             # 即使没有检测到风控弹窗，也检查所有弹窗的内容
-            all_popups = self._popup_detector.detect_all_popups()
             for p in all_popups:
-                combined = f"{p.title} {p.content}"
-                risk_level = self._check_text_risk(combined)
+                risk_level = self._check_text_risk(p.combined_text)
                 if risk_level:
                     return RiskDetectionResult(
                         detected=True,
                         risk_level=risk_level,
                         source=RiskSource.POPUP_CONTENT,
-                        keyword=self._find_matched_keyword(p.title, p.content),
+                        keyword=self._find_matched_keyword(p.combined_text),
                         detail=f"弹窗: {p.title} - {p.content}",
                         popup_info=p,
                         screenshot_path=p.screenshot_path,
@@ -379,13 +525,23 @@ class RiskDetector:
                 return RiskDetectionResult(detected=False)
 
             # 截图并进行 OCR
-            screenshot_path = self._take_screenshot(main_window, "ocr_check")
+            screenshot_path = self._take_screenshot(main_window, "ocr_check", wait=True)
             if not screenshot_path:
                 return RiskDetectionResult(detected=False)
 
+            _load_ocr_modules()
+
+            # 预处理：灰度化，空白画面直接跳过
+            image = Image.open(screenshot_path).convert("L")
+            if ImageStat.Stat(image).var[0] < OCR_MIN_VARIANCE:
+                logger.debug("截图无明显文字区域，跳过 OCR")
+                return RiskDetectionResult(detected=False)
+
+            # 缩小后再识别
+            image.thumbnail(OCR_MAX_SIZE)
+
             # OCR 识别
-            image = Image.open(screenshot_path)
-            text = pytesseract.image_to_string(image, lang='chi_sim+eng')
+            text = self._recognize_text(image)
 
             # 检查识别结果中的风控关键词
             risk_level = self._check_text_risk(text)
@@ -408,55 +564,83 @@ class RiskDetector:
 
         return RiskDetectionResult(detected=False)
 
-    def _check_text_risk(self, text: str) -> Optional[RiskLevel]:
-        """检查文本中的风控关键词"""
-        if not text:
-            return None
+    def _recognize_text(self, image: "Image.Image") -> str:
+        """识别图像文字，优先使用常驻的 tesserocr 实例"""
+        if tesserocr is None:
+            return pytesseract.image_to_string(
+                image, lang='chi_sim+eng', config=OCR_TESSERACT_CONFIG
+            )
+
+        with self._tess_lock:
+            if self._tess_api is None:
+                self._tess_api = tesserocr.PyTessBaseAPI(
+                    lang='chi_sim+eng',
+                    psm=tesserocr.PSM.SINGLE_BLOCK,
+                    oem=tesserocr.OEM.LSTM_ONLY,
+                )
+            self._tess_api.SetImage(image)
+            return self._tess_api.GetUTF8Text()
+
+    def close(self) -> None:
+        """释放截图线程与 OCR 资源"""
+        self._screenshot_pool.shutdown(wait=False, cancel_futures=True)
 
-        for level in [RiskLevel.critical, RiskLevel.high, RiskLevel.medium, RiskLevel.low]:
-            keywords = RISK_KEYWORDS.get(level, [])
-            for keyword in keywords:
-                if keyword in text:
-                    return level
+        with self._tess_lock:
+            if self._tess_api is not None:
+                self._tess_api.End()
+                self._tess_api = None
 
-        return None
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _check_text_risk(self, text: str) -> Optional[RiskLevel]:
+        """检查文本中的风控关键词"""
+        match = find_risk_keyword(text)
+        return match[1] if match else None
 
     def _find_matched_keyword(self, *texts: str) -> str:
         """查找匹配的关键词"""
-        combined = " ".join(texts)
+        match = find_risk_keyword(" ".join(texts))
+        return match[0] if match else ""
 
-        for level in [RiskLevel.critical, RiskLevel.high, RiskLevel.medium, RiskLevel.low]:
-            keywords = RISK_KEYWORDS.get(level, [])
-            for keyword in keywords:
-                if keyword in combined:
-                    return keyword
+    def _get_wechat_windows(self) -> List[auto.Control]:
+        """
+        获取所有微信相关窗口
 
-        return ""
+        一次枚举桌面顶层窗口并按类名过滤，结果在短时间内复用，
+        避免每次轮询对每个类名分别 Exists 等待。
+        """
+        cached_time, cached_windows = self._window_cache
+        now = time.monotonic()
+        if now - cached_time < WINDOW_CACHE_TTL:
+            return cached_windows
 
-    def _get_wechat_windows(self) -> List[auto.WindowControl]:
-        """获取所有微信相关窗口"""
-        windows = []
+        try:
+            children = auto.GetRootControl().GetChildren()
+        except Exception as e:
+            logger.debug(f"枚举微信窗口时出错: {e}")
+            return []
 
-        # 主窗口
-        main_class_names = ["WeChatMainWndForPC", "WeChatLoginWndForPC"]
-        for class_name in main_class_names:
+        # 每个窗口只读一次类名；枚举期间关闭的窗口读取会抛异常，跳过即可
+        ranked = []
+        for window in children:
             try:
-                window = auto.WindowControl(searchDepth=1, ClassName=class_name)
-                if window.Exists(0.3, 0):
-                    windows.append(window)
-            except:
-                pass
-
-        # 其他微信窗口
-        other_class_names = ["ChatWnd", "SnsWnd", "SnsEditWnd", "SelectContactWnd"]
-        for class_name in other_class_names:
-            try:
-                window = auto.WindowControl(searchDepth=1, ClassName=class_name)
-                if window.Exists(0.3, 0):
-                    windows.append(window)
-            except:
-                pass
-
+                order = _WECHAT_WINDOW_ORDER.get(window.ClassName)
+            except Exception:
+                continue
+            if order is not None:
+                ranked.append((order, window))
+
+        # 主窗口优先，其余按类名顺序
+        ranked.sort(key=lambda item: item[0])
+        windows = [window for _, window in ranked]
+
+        # 空结果不缓存：微信刚启动或窗口刚重建时下一次轮询应立即重新枚举
+        if windows:
+            self._window_cache = (now, windows)
         return windows
 
     # ========================================================
@@ -467,8 +651,7 @@ class RiskDetector:
         """处理检测结果"""
         # 记录历史
         self._detection_history.append(result)
-        if len(self._detection_history) > self._max_history:
-            self._detection_history = self._detection_history[-self._max_history:]
+        self._history_ts.append(result.detection_epoch)
 
         # 触发回调
         for callback in self._risk_callbacks:
@@ -479,41 +662,71 @@ class RiskDetector:
 
     def register_callback(self, callback: Callable[[RiskDetectionResult], None]) -> None:
         """注册风控检测回调"""
-        self._risk_callbacks.append(callback)
+        with self._cb_lock:
+            self._risk_callbacks = self._risk_callbacks + (callback,)
 
     def unregister_callback(self, callback: Callable[[RiskDetectionResult], None]) -> None:
         """注销风控检测回调"""
-        if callback in self._risk_callbacks:
-            self._risk_callbacks.remove(callback)
+        with self._cb_lock:
+            self._risk_callbacks = tuple(
+                cb for cb in self._risk_callbacks if cb != callback
+            )
 
     def get_detection_history(self, limit: int = 10) -> List[RiskDetectionResult]:
         """获取检测历史"""
-        return self._detection_history[-limit:]
+        start = max(0, len(self._detection_history) - limit)
+        return list(islice(self._detection_history, start, None))
 
     def get_recent_risks(self, minutes: int = 60) -> List[RiskDetectionResult]:
         """获取最近一段时间的风险检测结果"""
-        cutoff = datetime.now().timestamp() - minutes * 60
+        cutoff = time.time() - minutes * 60
+        start = bisect.bisect_right(self._history_ts, cutoff)
         return [
-            r for r in self._detection_history
-            if r.detected and r.detection_time.timestamp() > cutoff
+            r for r in islice(self._detection_history, start, None)
+            if r.detected
         ]
 
     # ========================================================
     # 辅助方法
     # ========================================================
 
-    def _take_screenshot(self, window: auto.WindowControl, prefix: str) -> Optional[str]:
-        """保存截图"""
+    def _take_screenshot(
+        self,
+        window: auto.WindowControl,
+        prefix: str,
+        wait: bool = False
+    ) -> Optional[str]:
+        """
+        保存截图
+
+        在调用线程抓取窗口位图（UIA 元素只在其所属套间内使用），
+        PNG 编码和写盘交给后台线程，默认不等待写盘完成。
+
+        Args:
+            window: 要截图的窗口
+            prefix: 文件名前缀
+            wait: 是否等待截图写入完成（后续需要立即读取文件时使用）
+
+        Returns:
+            截图路径，抓取失败（或 wait=True 时写入失败）返回 None
+        """
         if not self._save_screenshots:
             return None
 
         try:
+            bitmap = window.ToBitmap()
+            if not bitmap or not bitmap.Width or not bitmap.Height:
+                logger.error("抓取窗口截图失败")
+                return None
+
             self._screenshot_dir.mkdir(parents=True, exist_ok=True)
-            filename = f"{prefix}_{int(time.time())}.png"
+            filename = f"{prefix}_{int(time.time() * 1000)}.png"
             filepath = self._screenshot_dir / filename
 
-            window.CaptureToImage(str(filepath))
-            logger.debug(f"截图已保存: {filepath}")
+            future = self._screenshot_pool.submit(_save_bitmap, bitmap, str(filepath))
+            if wait and not future.result():
+                return None
+
             return str(filepath)
 
         except Exception as e:
@@ -523,6 +736,7 @@ class RiskDetector:
     def clear_history(self) -> None:
         """清空检测历史"""
         self._detection_history.clear()
+        self._history_ts.clear()
 
 
 # ============================================================
@@ -540,6 +754,14 @@ def get_risk_detector() -> RiskDetector:
     return _detector
 
 
+def close_risk_detector() -> None:
+    """释放风控检测器单例的资源（未创建时不做任何事）"""
+    global _detector
+    if _detector is not None:
+        _detector.close()
+        _detector = None
+
+
 def detect_risk() -> RiskDetectionResult:
     """快捷风控检测"""
     return get_risk_detector().detect_risk()
@@ -547,9 +769,5 @@ def detect_risk() -> RiskDetectionResult:
 
 def check_text_for_risk(text: str) -> Optional[RiskLevel]:
     """检查文本中的风控关键词"""
-    for level in [RiskLevel.critical, RiskLevel.high, RiskLevel.medium, RiskLevel.low]:
-        keywords = RISK_KEYWORDS.get(level, [])
-        for keyword in keywords:
-            if keyword in text:
-                return level
-    return None
+    match = find_risk_keyword(text)
+    return match[1] if match else None
@@ -9,15 +9,17 @@
 - 启动时检查停机标记
 """
 
+import os
 import sys
 import json
 import time
 import atexit
 import signal
 import logging
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, Callable, List
-from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
@@ -26,11 +28,28 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.config_manager import get_config
 from models.enums import RiskLevel
-from core.risk_detector import RiskDetectionResult, RiskSource, get_risk_detector
+from core.risk_detector import (
+    RiskDetectionResult, RiskSource, close_risk_detector, get_risk_detector
+)
 
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # 可选：比标准库 json 快，且可直接序列化 dataclass
+except ImportError:
+    orjson = None
+
+
+def _dump_json(obj: Any) -> bytes:
+    """序列化为缩进的 UTF-8 JSON（ShutdownInfo / StateSnapshot 可直接传入）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    if hasattr(obj, "to_dict"):
+        obj = obj.to_dict()
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
 
 # ============================================================
 # 类型定义
@@ -73,7 +92,17 @@ class ShutdownInfo:
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            "shutdown_time": self.shutdown_time,
+            "risk_level": self.risk_level,
+            "reason": self.reason,
+            "event_type": self.event_type,
+            "detail": self.detail,
+            "screenshot_path": self.screenshot_path,
+            "recovery_hint": self.recovery_hint,
+            "auto_recovery": self.auto_recovery,
+            "recovery_after": self.recovery_after,
+        }
 
     @property
     def can_auto_recover(self) -> bool:
@@ -97,6 +126,15 @@ class StateSnapshot:
     current_task: Optional[str] = None
     statistics: Dict[str, Any] = field(default_factory=dict)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "risk_detection": self.risk_detection,
+            "pending_tasks": self.pending_tasks,
+            "current_task": self.current_task,
+            "statistics": self.statistics,
+        }
+
 
 # ============================================================
 # 停机控制器
@@ -127,9 +165,13 @@ class ShutdownController:
         self._flag_file = self._cache_dir / self.SHUTDOWN_FLAG_FILE
         self._snapshot_file = self._cache_dir / self.STATE_SNAPSHOT_FILE
 
-        # 回调函数
-        self._shutdown_callbacks: List[Callable[[ShutdownInfo], None]] = []
-        self._alert_callbacks: List[Callable[[RiskDetectionResult], None]] = []
+        # 停机标记解析缓存: ((mtime_ns, size), 停机信息)，文件未变化时不重复解析
+        self._flag_cache: Tuple[Optional[Tuple[int, int]], Optional[ShutdownInfo]] = (None, None)
+
+        # 回调函数（写时复制：注册时加锁替换元组，触发时无需加锁）
+        self._shutdown_callbacks: Tuple[Callable[[ShutdownInfo], None], ...] = ()
+        self._alert_callbacks: Tuple[Callable[[RiskDetectionResult], None], ...] = ()
+        self._cb_lock = threading.RLock()
 
         # 风控检测器
         self._risk_detector = get_risk_detector()
@@ -153,14 +195,22 @@ class ShutdownController:
         Returns:
             停机信息，如果没有标记则返回 None
         """
-        if not self._flag_file.exists():
+        try:
+            stat = self._flag_file.stat()
+        except FileNotFoundError:
+            self._flag_cache = (None, None)
             return None
 
         try:
-            with open(self._flag_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            file_key = (stat.st_mtime_ns, stat.st_size)
+            cached_key, shutdown_info = self._flag_cache
+
+            if cached_key != file_key or shutdown_info is None:
+                with open(self._flag_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
 
-            shutdown_info = ShutdownInfo.from_dict(data)
+                shutdown_info = ShutdownInfo.from_dict(data)
+                self._flag_cache = (file_key, shutdown_info)
 
             # 检查是否可以自动恢复
             if shutdown_info.can_auto_recover:
@@ -233,8 +283,7 @@ class ShutdownController:
                 recovery_after=recovery_after,
             )
 
-            with open(self._flag_file, "w", encoding="utf-8") as f:
-                json.dump(shutdown_info.to_dict(), f, ensure_ascii=False, indent=2)
+            self._write_json_atomic(self._flag_file, shutdown_info)
 
             logger.warning(f"已创建停机标记: {self._flag_file}")
             logger.warning(f"停机原因: {reason}, 级别: {level.value}")
@@ -252,6 +301,21 @@ class ShutdownController:
             logger.error(f"创建停机标记失败: {e}")
             return False
 
+    @staticmethod
+    def _write_json_atomic(path: Path, data: Any) -> None:
+        """
+        原子写入 JSON 文件
+
+        先写临时文件并落盘，再用 os.replace 替换目标文件，
+        进程中途被杀也不会留下写了一半的文件。
+        """
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_dump_json(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
     def clear_shutdown_flag(self) -> bool:
         """
         清除停机标记文件
@@ -264,6 +328,7 @@ class ShutdownController:
 
         try:
             self._flag_file.unlink()
+            self._flag_cache = (None, None)
             logger.info("停机标记已清除")
             return True
 
@@ -349,14 +414,16 @@ class ShutdownController:
         callback: Callable[[RiskDetectionResult], None]
     ) -> None:
         """注册告警回调"""
-        self._alert_callbacks.append(callback)
+        with self._cb_lock:
+            self._alert_callbacks = self._alert_callbacks + (callback,)
 
     def register_shutdown_callback(
         self,
         callback: Callable[[ShutdownInfo], None]
     ) -> None:
         """注册停机回调"""
-        self._shutdown_callbacks.append(callback)
+        with self._cb_lock:
+            self._shutdown_callbacks = self._shutdown_callbacks + (callback,)
 
     # ========================================================
     # 状态快照
@@ -381,8 +448,7 @@ class ShutdownController:
                 statistics={},      # TODO: 从统计管理器获取
             )
 
-            with open(self._snapshot_file, "w", encoding="utf-8") as f:
-                json.dump(asdict(snapshot), f, ensure_ascii=False, indent=2)
+            self._snapshot_file.write_bytes(_dump_json(snapshot))
 
             logger.debug(f"状态快照已保存: {self._snapshot_file}")
             return True
@@ -458,7 +524,11 @@ class ShutdownController:
     def _on_exit(self) -> None:
         """程序退出时的清理"""
         logger.debug("程序退出，执行清理...")
-        # 这里可以添加退出前的清理逻辑
+        # 释放截图线程池与 tesseract 实例，不依赖解释器退出时的 __del__
+        try:
+            close_risk_detector()
+        except Exception as e:
+            logger.debug(f"释放风控检测器失败: {e}")
 
     def request_shutdown(
         self,
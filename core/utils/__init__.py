@@ -11,6 +11,8 @@ from .element_helper import (
     find_element_with_fallback,
     find_button,
     find_input_box,
+    collect_control_names,
+    invalidate_element_cache,
 
     # 等待方法
     wait_for_element,
@@ -26,6 +28,7 @@ from .element_helper import (
     # 输入操作
     input_text_via_clipboard,
     paste_from_clipboard,
+    type_text,
     clear_and_input,
 
     # 窗口操作
@@ -34,6 +37,8 @@ from .element_helper import (
     get_window_rect,
 )
 
+from .keyword_matcher import KeywordMatcher
+
 __all__ = [
     # 元素查找
     "find_element_by_name",
@@ -41,6 +46,8 @@ __all__ = [
     "find_element_with_fallback",
     "find_button",
     "find_input_box",
+    "collect_control_names",
+    "invalidate_element_cache",
 
     # 等待方法
     "wait_for_element",
@@ -56,10 +63,14 @@ __all__ = [
     # 输入操作
     "input_text_via_clipboard",
     "paste_from_clipboard",
+    "type_text",
     "clear_and_input",
 
     # 窗口操作
     "activate_window",
     "is_window_foreground",
     "get_window_rect",
+
+    # 关键词匹配
+    "KeywordMatcher",
 ]
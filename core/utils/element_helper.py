@@ -5,13 +5,18 @@ UI 元素操作辅助模块
 """
 
 import time
+import ctypes
 import logging
-from typing import Optional, Tuple, Callable, Union, List
+import threading
+from ctypes import wintypes
+from collections import OrderedDict
+from typing import Optional, Tuple, Callable, Union, List, Sequence, Dict, Set
 
 import uiautomation as auto
-import pyautogui
 import pyperclip
 
+from ..clipboard_manager import ClipboardError, ClipboardManager
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,65 +33,645 @@ DEFAULT_CLICK_DELAY = 0.3
 DEFAULT_INPUT_DELAY = 0.1
 DEFAULT_WAIT_INTERVAL = 0.5
 
+# 点击输入框后等待焦点切换的时间（秒）
+FOCUS_SETTLE_DELAY = 0.05
+
+# 打开剪贴板的重试次数与间隔（秒）：被其他进程占用时尽快回退到 pyperclip
+CLIPBOARD_OPEN_RETRIES = 5
+CLIPBOARD_RETRY_DELAY = 0.01
+
+# 输入框默认类名
+INPUT_BOX_CLASS_NAMES_V3 = ("RichEdit20W",)
+INPUT_BOX_CLASS_NAMES_V4 = ("mmui::XTextEdit", "mmui::ReplyInputField")
+
 
 # ============================================================
-# 元素查找方法
+# Win32 API
 # ============================================================
 
-def find_element_by_name(
-    window: auto.WindowControl,
-    name: str,
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+KEYEVENTF_SCANCODE = 0x0008
+
+VK_MENU = 0x12  # Alt
+
+# 扫描码（不受键盘布局和输入法影响）
+SCAN_CTRL = 0x1D
+SCAN_A = 0x1E
+SCAN_V = 0x2F
+SCAN_DELETE = 0x53  # 扩展键
+
+
+class _MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", wintypes.WPARAM),  # ULONG_PTR
+    ]
+
+
+class _KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", wintypes.WPARAM),  # ULONG_PTR
+    ]
+
+
+class _HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", wintypes.DWORD),
+        ("wParamL", wintypes.WORD),
+        ("wParamH", wintypes.WORD),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", _MOUSEINPUT), ("ki", _KEYBDINPUT), ("hi", _HARDWAREINPUT)]
+
+
+class _INPUT(ctypes.Structure):
+    _anonymous_ = ("u",)
+    _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+_user32 = ctypes.WinDLL("user32", use_last_error=True)
+_kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+
+def _prototype(name: str, restype, *argtypes, dll=_user32):
+    """绑定 DLL 函数（默认 user32）并声明参数/返回类型，模块加载时解析一次"""
+    func = getattr(dll, name)
+    func.argtypes = list(argtypes)
+    func.restype = restype
+    return func
+
+
+_SendInput = _prototype(
+    "SendInput", wintypes.UINT, wintypes.UINT, ctypes.POINTER(_INPUT), ctypes.c_int
+)
+_GetSystemMetrics = _prototype("GetSystemMetrics", ctypes.c_int, ctypes.c_int)
+_GetForegroundWindow = _prototype("GetForegroundWindow", wintypes.HWND)
+_GetWindowRect = _prototype(
+    "GetWindowRect", wintypes.BOOL, wintypes.HWND, ctypes.POINTER(wintypes.RECT)
+)
+_SetForegroundWindow = _prototype("SetForegroundWindow", wintypes.BOOL, wintypes.HWND)
+_GetWindowThreadProcessId = _prototype(
+    "GetWindowThreadProcessId", wintypes.DWORD, wintypes.HWND, ctypes.POINTER(wintypes.DWORD)
+)
+_AttachThreadInput = _prototype(
+    "AttachThreadInput", wintypes.BOOL, wintypes.DWORD, wintypes.DWORD, wintypes.BOOL
+)
+_GetCurrentThreadId = _prototype("GetCurrentThreadId", wintypes.DWORD, dll=_kernel32)
+_IsIconic = _prototype("IsIconic", wintypes.BOOL, wintypes.HWND)
+_IsWindowVisible = _prototype("IsWindowVisible", wintypes.BOOL, wintypes.HWND)
+_ShowWindow = _prototype("ShowWindow", wintypes.BOOL, wintypes.HWND, ctypes.c_int)
+_SetWindowPos = _prototype(
+    "SetWindowPos", wintypes.BOOL,
+    wintypes.HWND, wintypes.HWND,
+    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+    wintypes.UINT
+)
+
+
+def _key_input(scan: int, key_up: bool = False, extended: bool = False) -> _INPUT:
+    """构造一个扫描码键盘事件"""
+    flags = KEYEVENTF_SCANCODE
+    if key_up:
+        flags |= KEYEVENTF_KEYUP
+    if extended:
+        flags |= KEYEVENTF_EXTENDEDKEY
+    event = _INPUT(type=INPUT_KEYBOARD)
+    event.ki = _KEYBDINPUT(wVk=0, wScan=scan, dwFlags=flags)
+    return event
+
+
+def _vk_input(vk: int, key_up: bool = False) -> _INPUT:
+    """构造一个虚拟键码键盘事件"""
+    event = _INPUT(type=INPUT_KEYBOARD)
+    event.ki = _KEYBDINPUT(wVk=vk, wScan=0, dwFlags=KEYEVENTF_KEYUP if key_up else 0)
+    return event
+
+
+def _send_inputs(events: List[_INPUT]) -> None:
+    """
+    一次 SendInput 调用注入全部事件（系统保证连续、不被其他输入插入）
+
+    Raises:
+        OSError: 注入的事件数少于请求数（通常是被 UIPI 拦截）
+    """
+    count = len(events)
+    sent = _SendInput(count, (_INPUT * count)(*events), ctypes.sizeof(_INPUT))
+    if sent != count:
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+def _unicode_inputs(text: str) -> List[_INPUT]:
+    """
+    文本转为 Unicode 键盘事件（每个 UTF-16 码元一次按下、一次抬起）
+
+    不经过键盘布局和输入法，BMP 以外的字符按代理对发送。
+    """
+    raw = text.encode("utf-16-le")
+    events = []
+    for i in range(0, len(raw), 2):
+        unit = raw[i] | (raw[i + 1] << 8)
+        for flags in (KEYEVENTF_UNICODE, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP):
+            event = _INPUT(type=INPUT_KEYBOARD)
+            event.ki = _KEYBDINPUT(wVk=0, wScan=unit, dwFlags=flags)
+            events.append(event)
+    return events
+
+
+def _key_combo(*scans: int, extended: bool = False) -> List[_INPUT]:
+    """组合键事件：按顺序按下，逆序抬起"""
+    return (
+        [_key_input(scan, extended=extended) for scan in scans]
+        + [_key_input(scan, key_up=True, extended=extended) for scan in reversed(scans)]
+    )
+
+
+def _mouse_input(flags: int, dx: int = 0, dy: int = 0) -> _INPUT:
+    """构造一个鼠标事件"""
+    event = _INPUT(type=INPUT_MOUSE)
+    event.mi = _MOUSEINPUT(dx=dx, dy=dy, mouseData=0, dwFlags=flags)
+    return event
+
+
+def _move_input(x: int, y: int) -> _INPUT:
+    """构造移动到屏幕坐标的事件（虚拟桌面绝对坐标，支持多显示器）"""
+    left = _GetSystemMetrics(76)    # SM_XVIRTUALSCREEN
+    top = _GetSystemMetrics(77)     # SM_YVIRTUALSCREEN
+    width = _GetSystemMetrics(78)   # SM_CXVIRTUALSCREEN
+    height = _GetSystemMetrics(79)  # SM_CYVIRTUALSCREEN
+
+    # 绝对坐标归一化到 0..65535
+    dx = (x - left) * 65535 // max(width - 1, 1)
+    dy = (y - top) * 65535 // max(height - 1, 1)
+    return _mouse_input(
+        MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK, dx, dy
+    )
+
+
+def _click_xy(x: int, y: int) -> None:
+    """移动并左键单击屏幕坐标，一次注入"""
+    _send_inputs([
+        _move_input(x, y),
+        _mouse_input(MOUSEEVENTF_LEFTDOWN),
+        _mouse_input(MOUSEEVENTF_LEFTUP),
+    ])
+
+
+def _mouse_down_at(x: int, y: int) -> None:
+    """移动到屏幕坐标并按下左键，一次注入"""
+    _send_inputs([_move_input(x, y), _mouse_input(MOUSEEVENTF_LEFTDOWN)])
+
+
+def _mouse_up() -> None:
+    """在当前位置抬起左键"""
+    _send_inputs([_mouse_input(MOUSEEVENTF_LEFTUP)])
+
+
+def _send_ctrl_v() -> None:
+    """发送 Ctrl+V"""
+    _send_inputs(_key_combo(SCAN_CTRL, SCAN_V))
+
+
+def _send_ctrl_a() -> None:
+    """发送 Ctrl+A"""
+    _send_inputs(_key_combo(SCAN_CTRL, SCAN_A))
+
+
+def _send_select_all_and_delete() -> None:
+    """一次注入 Ctrl+A、Delete 共 6 个事件"""
+    _send_inputs(
+        _key_combo(SCAN_CTRL, SCAN_A)
+        + _key_combo(SCAN_DELETE, extended=True)
+    )
+
+
+# ============================================================
+# 元素缓存
+# ============================================================
+
+# 缓存有效期（秒）与容量
+ELEMENT_CACHE_TTL = 2.0
+ELEMENT_CACHE_SIZE = 256
+
+# 查找确认存在后，操作类函数免于再次校验的时长（秒）
+VALIDATION_TTL = 0.5
+
+# (hwnd, 控件类型, 名称或类名, "name"|"class") -> (控件, 缓存时间)
+_element_cache: "OrderedDict[tuple, Tuple[auto.Control, float]]" = OrderedDict()
+_element_cache_lock = threading.Lock()
+
+
+def _get_cached_element(key: tuple) -> Optional[auto.Control]:
+    """读取未过期且仍然存在的缓存控件"""
+    with _element_cache_lock:
+        entry = _element_cache.get(key)
+    if entry is None:
+        return None
+
+    element, cached_at = entry
+    if time.monotonic() - cached_at < ELEMENT_CACHE_TTL and element.Exists(0, 0):
+        return element
+
+    with _element_cache_lock:
+        if _element_cache.get(key) is entry:
+            del _element_cache[key]
+    return None
+
+
+def _put_cached_element(key: tuple, element: auto.Control) -> None:
+    """写入缓存，超出容量时淘汰最早写入的条目"""
+    with _element_cache_lock:
+        _element_cache.pop(key, None)
+        _element_cache[key] = (element, time.monotonic())
+        while len(_element_cache) > ELEMENT_CACHE_SIZE:
+            _element_cache.popitem(last=False)
+
+
+def invalidate_element_cache(hwnd: Optional[int] = None) -> None:
+    """
+    清除元素缓存
+
+    Args:
+        hwnd: 只清除该窗口下的缓存，None 表示全部清除
+
+    Examples:
+        >>> invalidate_element_cache(window.NativeWindowHandle)
+    """
+    with _element_cache_lock:
+        if hwnd is None:
+            _element_cache.clear()
+            return
+        for key in [key for key in _element_cache if key[0] == hwnd]:
+            del _element_cache[key]
+
+
+# ============================================================
+# UIA 缓存查找
+# ============================================================
+
+# TreeScope_Children：直接子元素；TreeScope_Descendants：全部后代
+_TREE_SCOPE_CHILDREN = 2
+_TREE_SCOPE_DESCENDANTS = 4
+
+# 查找时随结果一次性取回的属性，后续读取不再跨进程
+CACHED_PROPERTIES = (
+    auto.PropertyId.NameProperty,
+    auto.PropertyId.ClassNameProperty,
+    auto.PropertyId.ControlTypeProperty,
+    auto.PropertyId.BoundingRectangleProperty,
+)
+
+# (IUIAutomation, IUIAutomationCacheRequest)
+_cache_request: Optional[tuple] = None
+
+
+def _get_uia():
+    """获取 uiautomation 内部的 IUIAutomation 客户端"""
+    return auto._AutomationClient.instance().IUIAutomation
+
+
+def _get_cache_request(uia):
+    """获取（首次调用时创建）包含 CACHED_PROPERTIES 的缓存请求"""
+    global _cache_request
+
+    if _cache_request is None or _cache_request[0] is not uia:
+        request = uia.CreateCacheRequest()
+        for property_id in CACHED_PROPERTIES:
+            request.AddProperty(property_id)
+        _cache_request = (uia, request)
+    return _cache_request[1]
+
+
+def _property_condition(
+    class_name: Optional[str] = None,
     control_type: Optional[str] = None,
-    timeout: float = DEFAULT_TIMEOUT,
-    search_depth: int = DEFAULT_SEARCH_DEPTH
+    name: Optional[str] = None
+):
+    """
+    构建属性条件（各属性之间为 AND）
+
+    Args:
+        class_name: 类名，None 表示不限
+        control_type: 控件类型名（ButtonControl 等），None 表示不限
+        name: 名称，None 表示不限
+
+    Returns:
+        IUIAutomationCondition
+    """
+    uia = _get_uia()
+    conditions = []
+    if name is not None:
+        conditions.append(
+            uia.CreatePropertyCondition(auto.PropertyId.NameProperty, name)
+        )
+    if class_name is not None:
+        conditions.append(
+            uia.CreatePropertyCondition(auto.PropertyId.ClassNameProperty, class_name)
+        )
+    if control_type:
+        control_type_id = getattr(auto.ControlType, control_type, None)
+        if control_type_id is None:
+            logger.warning(f"未知的控件类型: {control_type}")
+        else:
+            conditions.append(
+                uia.CreatePropertyCondition(auto.PropertyId.ControlTypeProperty, control_type_id)
+            )
+
+    if not conditions:
+        return uia.CreateTrueCondition()
+    condition = conditions[0]
+    for other in conditions[1:]:
+        condition = uia.CreateAndCondition(condition, other)
+    return condition
+
+
+def _cached_find(
+    window: auto.WindowControl,
+    condition,
+    timeout: float
 ) -> Optional[auto.Control]:
     """
-    通过名称查找 UI 元素
+    FindFirstBuildCache 查找第一个满足条件的后代元素
+
+    返回的控件附带 `_uia_cache` 字典（Name/ClassName/BoundingRectangle 及缓存时间），
+    可由 _cached_value / _element_rect 读取而无需再次跨进程调用。
 
     Args:
         window: 父窗口控件
-        name: 元素名称
-        control_type: 控件类型（ButtonControl、EditControl 等），None 表示通用 Control
+        condition: IUIAutomationCondition
+        timeout: 超时时间（秒）
+
+    Returns:
+        找到的控件，超时返回 None
+    """
+    request = _get_cache_request(_get_uia())
+    root = window.Element
+    deadline = time.monotonic() + timeout
+
+    while True:
+        found = root.FindFirstBuildCache(_TREE_SCOPE_DESCENDANTS, condition, request)
+        if found:
+            # 用缓存的 ControlType 构造控件，避免 CreateControlFromElement 再读一次当前值
+            constructor = auto.ControlConstructors.get(found.CachedControlType, auto.Control)
+            control = constructor(element=found)
+            rect = found.CachedBoundingRectangle
+            _mark_validated(control)
+            control._uia_cache = {
+                "time": control._validated_at,
+                "Name": found.CachedName,
+                "ClassName": found.CachedClassName,
+                "BoundingRectangle": (rect.left, rect.top, rect.right, rect.bottom),
+            }
+            return control
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(remaining, DEFAULT_WAIT_INTERVAL))
+
+
+def _find_first_or(
+    window: auto.WindowControl,
+    conditions: List,
+    timeout: float
+) -> Optional[auto.Control]:
+    """
+    一次遍历查找满足任一条件的元素
+
+    Args:
+        window: 父窗口控件
+        conditions: IUIAutomationCondition 列表
         timeout: 超时时间（秒）
+
+    Returns:
+        控件树中第一个满足任一条件的元素，超时返回 None
+    """
+    return _cached_find(window, _or_condition(conditions), timeout)
+
+
+def _or_condition(conditions: List):
+    """把多个条件合并为 OR 条件"""
+    uia = _get_uia()
+    condition = conditions[0]
+    for other in conditions[1:]:
+        condition = uia.CreateOrCondition(condition, other)
+    return condition
+
+
+def _mark_validated(element: auto.Control) -> auto.Control:
+    """记录元素刚刚确认存在的时间，供 _exists 跳过紧随其后的重复校验"""
+    element._validated_at = time.monotonic()
+    return element
+
+
+def _exists(element: Optional[auto.Control]) -> bool:
+    """
+    检查元素是否存在
+
+    由 find_* 返回、且确认存在不超过 VALIDATION_TTL 秒的元素直接视为存在，
+    省去一次 Exists(0, 0) 跨进程调用；其他元素照常调用 Exists(0, 0)。
+    """
+    if not element:
+        return False
+    validated_at = getattr(element, "_validated_at", None)
+    if isinstance(validated_at, float) and time.monotonic() - validated_at < VALIDATION_TTL:
+        return True
+    return element.Exists(0, 0)
+
+
+def _get_fresh_cache(element: auto.Control) -> Optional[dict]:
+    """获取控件上未过期的属性缓存"""
+    cache = getattr(element, "_uia_cache", None)
+    if isinstance(cache, dict) and time.monotonic() - cache["time"] < ELEMENT_CACHE_TTL:
+        return cache
+    return None
+
+
+def _cached_value(element: auto.Control, name: str):
+    """读取属性，优先使用查找时缓存的值"""
+    cache = _get_fresh_cache(element)
+    if cache is not None and name in cache:
+        return cache[name]
+    return getattr(element, name)
+
+
+def _element_rect(element: auto.Control) -> Tuple[int, int, int, int]:
+    """
+    获取元素矩形 (left, top, right, bottom)
+
+    矩形用于计算点击坐标，窗口移动或布局变化后旧值会点偏，
+    因此缓存值只在查找后 VALIDATION_TTL 秒内使用，之后读取实时值。
+    """
+    cache = getattr(element, "_uia_cache", None)
+    if isinstance(cache, dict) and time.monotonic() - cache["time"] < VALIDATION_TTL:
+        return cache["BoundingRectangle"]
+    rect = element.BoundingRectangle
+    return rect.left, rect.top, rect.right, rect.bottom
+
+
+def _is_shallow(search_depth: int) -> bool:
+    """搜索深度是否比默认值浅（需要限定深度，不能用覆盖全部后代的条件查找）"""
+    return search_depth < DEFAULT_SEARCH_DEPTH
+
+
+def _bounded_find(
+    window: auto.WindowControl,
+    selector: dict,
+    search_depth: int,
+    timeout: float
+) -> Optional[auto.Control]:
+    """
+    限定深度查找（uiautomation 的 TreeWalker 遍历，只搜索前 search_depth 层）
+
+    UIA 条件查找只能覆盖全部后代，调用方指定较浅的深度（如避免匹配到
+    聊天消息等深层内容）时走这里。
+
+    Args:
+        window: 父窗口控件
+        selector: 选择器字典（name 优先，其次 class_name）
         search_depth: 搜索深度
+        timeout: 超时时间（秒），0 表示只查找一次
 
     Returns:
         找到的控件，未找到返回 None
+    """
+    control_type = selector.get("control_type")
+    control_class = getattr(auto, control_type, None) if control_type else auto.Control
+    if control_class is None:
+        logger.warning(f"未知的控件类型: {control_type}")
+        control_class = auto.Control
+
+    if "name" in selector:
+        search_properties = {"Name": selector["name"]}
+    else:
+        search_properties = {"ClassName": selector["class_name"]}
 
-    Examples:
-        >>> button = find_element_by_name(window, "发表", "ButtonControl")
-        >>> text = find_element_by_name(window, "朋友圈", "TextControl")
+    element = control_class(
+        searchFromControl=window, searchDepth=search_depth, **search_properties
+    )
+    if element.Exists(timeout, DEFAULT_WAIT_INTERVAL):
+        return _mark_validated(element)
+    return None
+
+
+# ============================================================
+# 元素查找方法
+# ============================================================
+
+def _find_element(
+    window: auto.WindowControl,
+    kind: str,
+    value: str,
+    control_type: Optional[str],
+    timeout: float,
+    search_depth: int = DEFAULT_SEARCH_DEPTH
+) -> Optional[auto.Control]:
+    """
+    按名称或类名查找元素，命中缓存时只校验存在性
+
+    Args:
+        window: 父窗口控件
+        kind: "name" 或 "class"
+        value: 名称或类名
+        control_type: 控件类型
+        timeout: 超时时间（秒）
+        search_depth: 搜索深度，比 DEFAULT_SEARCH_DEPTH 浅时限定深度查找
+
+    Returns:
+        找到的控件，未找到返回 None
     """
+    label = "Name" if kind == "name" else "ClassName"
+
     if not window or not window.Exists(0, 0):
         logger.warning("父窗口不存在")
         return None
 
+    hwnd = None
     try:
-        # 根据控件类型选择查找方法
-        if control_type:
-            # 使用指定的控件类型
-            control_class = getattr(window, control_type, None)
-            if control_class:
-                element = control_class(searchDepth=search_depth, Name=name)
-            else:
-                logger.warning(f"未知的控件类型: {control_type}")
-                element = window.Control(searchDepth=search_depth, Name=name)
+        hwnd = window.NativeWindowHandle
+        # 无原生句柄（如 UIA 虚拟控件）时不同窗口的键会相同，不使用缓存
+        key = (hwnd, control_type, value, kind, search_depth) if hwnd else None
+
+        element = _get_cached_element(key) if key else None
+        if element is not None:
+            logger.debug(f"命中元素缓存: {label}={value}, Type={control_type or 'Control'}")
+            return _mark_validated(element)
+
+        if _is_shallow(search_depth):
+            selector = {"name" if kind == "name" else "class_name": value,
+                        "control_type": control_type}
+            element = _bounded_find(window, selector, search_depth, timeout)
         else:
-            # 使用通用 Control
-            element = window.Control(searchDepth=search_depth, Name=name)
+            # 名称/类名与控件类型组成 AND 条件交给 UIA 过滤，结果附带常用属性
+            if kind == "name":
+                condition = _property_condition(control_type=control_type, name=value)
+            else:
+                condition = _property_condition(value, control_type)
+            element = _cached_find(window, condition, timeout)
 
-        if element.Exists(timeout, 1):
-            logger.debug(f"找到元素: Name={name}, Type={control_type or 'Control'}")
+        if element is not None:
+            logger.debug(f"找到元素: {label}={value}, Type={control_type or 'Control'}")
+            if key:
+                _put_cached_element(key, element)
             return element
 
-        logger.debug(f"未找到元素: Name={name}, Type={control_type or 'Control'}")
+        logger.debug(f"未找到元素: {label}={value}, Type={control_type or 'Control'}")
         return None
 
     except Exception as e:
-        logger.error(f"查找元素异常 (Name={name}): {e}")
+        logger.error(f"查找元素异常 ({label}={value}): {e}")
+        # COM 异常通常意味着窗口结构已变化，缓存的句柄不再可信
+        invalidate_element_cache(hwnd)
         return None
 
 
+def find_element_by_name(
+    window: auto.WindowControl,
+    name: str,
+    control_type: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    search_depth: int = DEFAULT_SEARCH_DEPTH
+) -> Optional[auto.Control]:
+    """
+    通过名称查找 UI 元素
+
+    同一窗口下相同条件的查找结果缓存 ELEMENT_CACHE_TTL 秒。
+
+    Args:
+        window: 父窗口控件
+        name: 元素名称
+        control_type: 控件类型（ButtonControl、EditControl 等），None 表示通用 Control
+        timeout: 超时时间（秒）
+        search_depth: 搜索深度（比默认值浅时只搜索前 search_depth 层）
+
+    Returns:
+        找到的控件，未找到返回 None
+
+    Examples:
+        >>> button = find_element_by_name(window, "发表", "ButtonControl")
+        >>> text = find_element_by_name(window, "朋友圈", "TextControl")
+    """
+    return _find_element(window, "name", name, control_type, timeout, search_depth)
+
+
 def find_element_by_class(
     window: auto.WindowControl,
     class_name: str,
@@ -97,12 +682,14 @@ def find_element_by_class(
     """
     通过类名查找 UI 元素
 
+    同一窗口下相同条件的查找结果缓存 ELEMENT_CACHE_TTL 秒。
+
     Args:
         window: 父窗口控件
         class_name: 类名
         control_type: 控件类型（ButtonControl、EditControl 等），None 表示通用 Control
         timeout: 超时时间（秒）
-        search_depth: 搜索深度
+        search_depth: 搜索深度（比默认值浅时只搜索前 search_depth 层）
 
     Returns:
         找到的控件，未找到返回 None
@@ -111,32 +698,7 @@ def find_element_by_class(
         >>> input_box = find_element_by_class(window, "mmui::XTextEdit", "EditControl")
         >>> button = find_element_by_class(window, "mmui::XButton", "ButtonControl")
     """
-    if not window or not window.Exists(0, 0):
-        logger.warning("父窗口不存在")
-        return None
-
-    try:
-        # 根据控件类型选择查找方法
-        if control_type:
-            control_class = getattr(window, control_type, None)
-            if control_class:
-                element = control_class(searchDepth=search_depth, ClassName=class_name)
-            else:
-                logger.warning(f"未知的控件类型: {control_type}")
-                element = window.Control(searchDepth=search_depth, ClassName=class_name)
-        else:
-            element = window.Control(searchDepth=search_depth, ClassName=class_name)
-
-        if element.Exists(timeout, 1):
-            logger.debug(f"找到元素: ClassName={class_name}, Type={control_type or 'Control'}")
-            return element
-
-        logger.debug(f"未找到元素: ClassName={class_name}, Type={control_type or 'Control'}")
-        return None
-
-    except Exception as e:
-        logger.error(f"查找元素异常 (ClassName={class_name}): {e}")
-        return None
+    return _find_element(window, "class", class_name, control_type, timeout, search_depth)
 
 
 def find_element_with_fallback(
@@ -148,6 +710,10 @@ def find_element_with_fallback(
     """
     使用主选择器查找元素，失败时使用备用选择器
 
+    两个选择器合并为一个 OR 条件，只遍历一次控件树；
+    两者都能匹配时返回控件树中先出现的元素。任一选择器指定了较浅的
+    search_depth 时，按主、备顺序分别限定深度查找。
+
     Args:
         window: 父窗口控件
         primary_selector: 主选择器字典，包含 name/class_name/control_type/search_depth
@@ -164,48 +730,46 @@ def find_element_with_fallback(
         ...     {"class_name": "mmui::XButton", "control_type": "ButtonControl"}
         ... )
     """
-    # 尝试主选择器
-    if "name" in primary_selector:
-        element = find_element_by_name(
-            window,
-            primary_selector["name"],
-            primary_selector.get("control_type"),
-            timeout,
-            primary_selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-        )
-        if element:
-            return element
-    elif "class_name" in primary_selector:
-        element = find_element_by_class(
-            window,
-            primary_selector["class_name"],
-            primary_selector.get("control_type"),
-            timeout,
-            primary_selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-        )
-        if element:
-            return element
+    if not window or not window.Exists(0, 0):
+        logger.warning("父窗口不存在")
+        return None
 
-    # 尝试备用选择器
-    logger.debug("主选择器未找到元素，尝试备用选择器")
-    if "name" in fallback_selector:
-        return find_element_by_name(
-            window,
-            fallback_selector["name"],
-            fallback_selector.get("control_type"),
-            timeout,
-            fallback_selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-        )
-    elif "class_name" in fallback_selector:
-        return find_element_by_class(
-            window,
-            fallback_selector["class_name"],
-            fallback_selector.get("control_type"),
-            timeout,
-            fallback_selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-        )
+    selectors = [
+        selector for selector in (primary_selector, fallback_selector)
+        if "name" in selector or "class_name" in selector
+    ]
+    if not selectors:
+        logger.warning("选择器缺少 name 或 class_name")
+        return None
 
-    return None
+    try:
+        if any(_is_shallow(_selector_depth(selector)) for selector in selectors):
+            element = None
+            for selector in selectors:
+                element = _bounded_find(window, selector, _selector_depth(selector), timeout)
+                if element is not None:
+                    break
+        else:
+            # 主、备选择器合并为一个 OR 条件，只遍历一次控件树
+            conditions = [_selector_condition(selector) for selector in selectors]
+            element = _find_first_or(window, conditions, timeout)
+    except Exception as e:
+        logger.error(f"查找元素异常 ({primary_selector} / {fallback_selector}): {e}")
+        return None
+
+    if element is None:
+        logger.debug(f"未找到元素: {primary_selector} / {fallback_selector}")
+        return None
+
+    name = _cached_value(element, "Name")
+    class_name = _cached_value(element, "ClassName")
+    if "name" in primary_selector:
+        by_primary = primary_selector["name"] == name
+    else:
+        by_primary = primary_selector.get("class_name") == class_name
+    matched = "主选择器" if by_primary else "备用选择器"
+    logger.debug(f"找到元素 ({matched}): Name={name}, ClassName={class_name}")
+    return element
 
 
 def find_button(
@@ -233,8 +797,8 @@ def find_button(
 
 def find_input_box(
     window: auto.WindowControl,
-    class_names_v3: Optional[List[str]] = None,
-    class_names_v4: Optional[List[str]] = None,
+    class_names_v3: Optional[Sequence[str]] = None,
+    class_names_v4: Optional[Sequence[str]] = None,
     timeout: float = DEFAULT_TIMEOUT
 ) -> Optional[auto.EditControl]:
     """
@@ -242,8 +806,8 @@ def find_input_box(
 
     Args:
         window: 父窗口控件
-        class_names_v3: 微信 3.x 输入框类名列表（默认 ["RichEdit20W"]）
-        class_names_v4: 微信 4.0 输入框类名列表（默认 ["mmui::XTextEdit", "mmui::ReplyInputField"]）
+        class_names_v3: 微信 3.x 输入框类名列表（默认 INPUT_BOX_CLASS_NAMES_V3）
+        class_names_v4: 微信 4.0 输入框类名列表（默认 INPUT_BOX_CLASS_NAMES_V4）
         timeout: 超时时间（秒）
 
     Returns:
@@ -258,38 +822,333 @@ def find_input_box(
 
     # 默认类名列表
     if class_names_v3 is None:
-        class_names_v3 = ["RichEdit20W"]
+        class_names_v3 = INPUT_BOX_CLASS_NAMES_V3
     if class_names_v4 is None:
-        class_names_v4 = ["mmui::XTextEdit", "mmui::ReplyInputField"]
+        class_names_v4 = INPUT_BOX_CLASS_NAMES_V4
 
-    # 优先尝试 v4 类名（新版本优先）
-    for class_name in class_names_v4:
-        element = find_element_by_class(window, class_name, "EditControl", timeout)
-        if element:
-            logger.debug(f"找到输入框 (v4): {class_name}")
-            return element
+    class_names = list(class_names_v4) + list(class_names_v3)
 
-    # 尝试 v3 类名
-    for class_name in class_names_v3:
-        element = find_element_by_class(window, class_name, "EditControl", timeout)
-        if element:
-            logger.debug(f"找到输入框 (v3): {class_name}")
-            return element
+    try:
+        # v4、v3 类名合并为一个 OR 条件，一次遍历即可识别当前版本
+        if class_names:
+            element = _find_first_or(
+                window,
+                [_property_condition(name, "EditControl") for name in class_names],
+                timeout
+            )
+            if element:
+                class_name = _cached_value(element, "ClassName")
+                version = "v4" if class_name in class_names_v4 else "v3"
+                logger.debug(f"找到输入框 ({version}): {class_name}")
+                return element
+
+        # 最后尝试通用 EditControl（上面已等待过超时，这里只查一次）
+        element = _cached_find(
+            window,
+            _property_condition(control_type="EditControl"),
+            0 if class_names else timeout
+        )
+    except Exception as e:
+        logger.error(f"查找输入框异常: {e}")
+        return None
 
-    # 最后尝试通用 EditControl
-    element = window.EditControl(searchDepth=DEFAULT_SEARCH_DEPTH)
-    if element.Exists(timeout, 1):
-        logger.debug("找到输入框 (通用)")
+    if element:
+        logger.debug(f"找到输入框 (通用): {_cached_value(element, 'ClassName')}")
         return element
 
     logger.warning("未找到输入框")
     return None
 
 
+def _find_all_to_depth(root, request, max_depth: int) -> List:
+    """
+    逐层取回前 max_depth 层的全部元素（每个节点一次 FindAllBuildCache 子元素）
+
+    Args:
+        root: 起始 IUIAutomationElement
+        request: 缓存请求
+        max_depth: 最大深度（直接子元素为第 1 层）
+
+    Returns:
+        带缓存属性的 IUIAutomationElement 列表；单个节点查询失败时跳过该节点
+    """
+    condition = _get_uia().CreateTrueCondition()
+    elements = []
+    level = [root]
+    for _ in range(max_depth):
+        next_level = []
+        for node in level:
+            try:
+                children = node.FindAllBuildCache(_TREE_SCOPE_CHILDREN, condition, request)
+            except Exception as e:
+                logger.debug(f"读取子元素失败: {e}")
+                continue
+            next_level.extend(
+                children.GetElement(i) for i in range(children.Length if children else 0)
+            )
+        if not next_level:
+            break
+        elements.extend(next_level)
+        level = next_level
+    return elements
+
+
+def collect_control_names(
+    window: auto.WindowControl,
+    control_types: Sequence[str],
+    max_depth: Optional[int] = None
+) -> Dict[str, Set[str]]:
+    """
+    一次遍历收集窗口内指定类型控件的名称
+
+    用一次 FindAllBuildCache 取回全部匹配控件及其缓存的 Name/ControlType，
+    代替按名称逐个 FindFirst；适合 "这些名称中有几个存在" 一类的批量判断。
+    指定 max_depth 时只逐层遍历前 max_depth 层，避免匹配到聊天消息等深层内容。
+
+    Args:
+        window: 父窗口控件
+        control_types: 控件类型名列表（ButtonControl 等）
+        max_depth: 最大搜索深度，None 表示全部后代
+
+    Returns:
+        {控件类型名: 名称集合}，每个已知类型都有条目；查找失败时集合为空
+
+    Examples:
+        >>> names = collect_control_names(window, ["ButtonControl", "EditControl"])
+        >>> "朋友圈" in names["ButtonControl"]
+        True
+    """
+    result: Dict[str, Set[str]] = {}
+    type_names = {}
+    for control_type in control_types:
+        control_type_id = getattr(auto.ControlType, control_type, None)
+        if control_type_id is None:
+            logger.warning(f"未知的控件类型: {control_type}")
+            continue
+        type_names[control_type_id] = control_type
+        result[control_type] = set()
+
+    if not type_names:
+        return result
+
+    try:
+        request = _get_cache_request(_get_uia())
+        if max_depth is None:
+            condition = _or_condition(
+                [_property_condition(control_type=control_type) for control_type in result]
+            )
+            found = window.Element.FindAllBuildCache(_TREE_SCOPE_DESCENDANTS, condition, request)
+            elements = [found.GetElement(i) for i in range(found.Length if found else 0)]
+        else:
+            elements = _find_all_to_depth(window.Element, request, max_depth)
+        for element in elements:
+            control_type = type_names.get(element.CachedControlType)
+            name = element.CachedName
+            if control_type and name:
+                result[control_type].add(name)
+    except Exception as e:
+        logger.debug(f"收集控件名称失败: {e}")
+
+    return result
+
+
 # ============================================================
 # 等待方法
 # ============================================================
 
+# 等待探测的自适应间隔（秒）：从最小值开始指数退避到最大值。
+# 订阅结构变化事件后仍按此节奏探测（Name/IsEnabled/可见性变化不触发
+# StructureChanged），事件只用于提前唤醒
+WAIT_POLL_MIN_INTERVAL = 0.05
+WAIT_POLL_MAX_INTERVAL = 0.2
+
+# TreeScope_Subtree：元素自身及全部后代
+_TREE_SCOPE_SUBTREE = 7
+
+# (UIAutomationCore 模块, 事件处理器类)，随 comtypes 生成模块延迟构建
+_structure_handler_cache: Optional[tuple] = None
+
+
+def _get_structure_handler_class():
+    """获取 IUIAutomationStructureChangedEventHandler 的 COM 实现类"""
+    global _structure_handler_cache
+
+    uia_core = auto._AutomationClient.instance().UIAutomationCore
+    if _structure_handler_cache is not None and _structure_handler_cache[0] is uia_core:
+        return _structure_handler_cache[1]
+
+    import comtypes
+
+    class _StructureChangedHandler(comtypes.COMObject):
+        _com_interfaces_ = [uia_core.IUIAutomationStructureChangedEventHandler]
+
+        def __init__(self, changed: threading.Event):
+            super().__init__()
+            self._changed = changed
+
+        def HandleStructureChangedEvent(self, sender, changeType, runtimeId):
+            # 在 UIA 事件线程回调，只置位事件，探测留给等待线程
+            self._changed.set()
+
+    _structure_handler_cache = (uia_core, _StructureChangedHandler)
+    return _StructureChangedHandler
+
+
+def _subscribe_structure_changed(
+    window: auto.WindowControl,
+    changed: threading.Event
+) -> Optional[Callable[[], None]]:
+    """
+    订阅窗口子树的 StructureChanged 事件
+
+    Args:
+        window: 父窗口控件
+        changed: 结构变化时置位的事件
+
+    Returns:
+        取消订阅函数，订阅失败返回 None（调用方回退到轮询）
+    """
+    try:
+        uia = auto._AutomationClient.instance().IUIAutomation
+        element = window.Element
+        handler = _get_structure_handler_class()(changed)
+        uia.AddStructureChangedEventHandler(element, _TREE_SCOPE_SUBTREE, None, handler)
+    except Exception as e:
+        logger.debug(f"订阅结构变化事件失败，回退到轮询: {e}")
+        return None
+
+    def unsubscribe() -> None:
+        try:
+            uia.RemoveStructureChangedEventHandler(element, handler)
+        except Exception as e:
+            logger.debug(f"取消结构变化事件订阅失败: {e}")
+
+    return unsubscribe
+
+
+def _wait_until(
+    window: auto.WindowControl,
+    probe: Callable[[], object],
+    timeout: float,
+    interval: float
+):
+    """
+    等待 probe 返回真值
+
+    按自适应间隔探测：从 WAIT_POLL_MIN_INTERVAL 开始翻倍，不超过
+    WAIT_POLL_MAX_INTERVAL 和 interval。订阅到结构变化事件时，
+    事件到达会提前唤醒下一次探测，但不会拉长探测间隔。
+    先同步探测一次，命中时不订阅事件（常见情况下元素已经存在）。
+
+    Args:
+        window: 父窗口控件（事件订阅范围）
+        probe: 探测函数，应立即返回（不在内部等待）
+        timeout: 超时时间（秒）
+        interval: 最大轮询间隔（秒）
+
+    Returns:
+        probe 的真值结果，超时返回 None
+    """
+    # 用单调时钟计时：系统校时或手动改时间不会导致提前超时或超期不返回
+    deadline = time.monotonic() + timeout
+    result = probe()
+    if result or timeout <= 0:
+        return result or None
+
+    changed = threading.Event()
+    unsubscribe = _subscribe_structure_changed(window, changed)
+    max_interval = min(interval, WAIT_POLL_MAX_INTERVAL)
+    wait_interval = min(interval, WAIT_POLL_MIN_INTERVAL)
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+
+            if unsubscribe:
+                changed.wait(min(remaining, wait_interval))
+            else:
+                time.sleep(min(remaining, wait_interval))
+            wait_interval = min(wait_interval * 2, max_interval)
+
+            # 先清除再探测，探测期间发生的变化会让下一次等待立即返回
+            changed.clear()
+            result = probe()
+            if result:
+                return result
+    finally:
+        if unsubscribe:
+            unsubscribe()
+
+
+def _selector_depth(selector: dict) -> int:
+    """选择器的搜索深度（未指定时为 DEFAULT_SEARCH_DEPTH）"""
+    return selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
+
+
+def _selector_condition(selector: dict):
+    """选择器字典（name 优先，其次 class_name）转换为 UIA 条件"""
+    if "name" in selector:
+        return _property_condition(
+            control_type=selector.get("control_type"), name=selector["name"]
+        )
+    return _property_condition(selector["class_name"], selector.get("control_type"))
+
+
+def _fast_probe(window: auto.WindowControl, condition) -> Optional[auto.Control]:
+    """
+    立即探测一次元素（只做一次 FindFirst，不在内部等待）
+
+    由外层等待循环控制节奏；条件由调用方在循环外构建一次，
+    每次探测不再重复校验父窗口、构建条件。
+
+    Returns:
+        找到的元素，未找到或探测异常（如窗口已关闭）返回 None
+    """
+    try:
+        return _cached_find(window, condition, 0)
+    except Exception as e:
+        logger.debug(f"探测元素异常: {e}")
+        return None
+
+
+def _build_probe(
+    window: auto.WindowControl,
+    selector: dict
+) -> Optional[Callable[[], Optional[auto.Control]]]:
+    """
+    把选择器预先绑定为探测函数
+
+    选择器字段判断与条件构建只做一次，等待循环中每次探测只剩一次 FindFirst；
+    选择器指定了较浅的 search_depth 时每次探测做一次限定深度查找。
+
+    Returns:
+        探测函数；选择器缺少 name/class_name 或条件构建失败返回 None
+    """
+    if "name" not in selector and "class_name" not in selector:
+        logger.warning("选择器缺少 name 或 class_name")
+        return None
+
+    search_depth = _selector_depth(selector)
+    if _is_shallow(search_depth):
+        def bounded_probe() -> Optional[auto.Control]:
+            try:
+                return _bounded_find(window, selector, search_depth, 0)
+            except Exception as e:
+                logger.debug(f"探测元素异常: {e}")
+                return None
+        return bounded_probe
+
+    try:
+        condition = _selector_condition(selector)
+    except Exception as e:
+        logger.error(f"构建查找条件失败 ({selector}): {e}")
+        return None
+
+    return lambda: _fast_probe(window, condition)
+
+
 def wait_for_element(
     window: auto.WindowControl,
     selector: dict,
@@ -299,11 +1158,14 @@ def wait_for_element(
     """
     等待元素出现
 
+    订阅窗口的 UIA 结构变化事件，元素树变化时立即重新查找；
+    订阅失败时回退为轮询（间隔从 50ms 起自适应增长）。
+
     Args:
         window: 父窗口控件
         selector: 选择器字典，包含 name/class_name/control_type/search_depth
         timeout: 超时时间（秒）
-        interval: 检查间隔（秒）
+        interval: 最大检查间隔（秒）
 
     Returns:
         找到的元素，超时返回 None
@@ -315,34 +1177,15 @@ def wait_for_element(
         ...     timeout=10
         ... )
     """
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        if "name" in selector:
-            element = find_element_by_name(
-                window,
-                selector["name"],
-                selector.get("control_type"),
-                0.5,  # 短超时，因为外部有循环
-                selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-            )
-        elif "class_name" in selector:
-            element = find_element_by_class(
-                window,
-                selector["class_name"],
-                selector.get("control_type"),
-                0.5,
-                selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-            )
-        else:
-            logger.warning("选择器缺少 name 或 class_name")
-            return None
+    probe = _build_probe(window, selector)
+    if probe is None:
+        return None
 
-        if element:
-            logger.debug(f"元素已出现: {selector}")
-            return element
+    element = _wait_until(window, probe, timeout, interval)
 
-        time.sleep(interval)
+    if element:
+        logger.debug(f"元素已出现: {selector}")
+        return element
 
     logger.debug(f"等待元素超时: {selector}")
     return None
@@ -356,6 +1199,8 @@ def wait_for_element_disappear(
     """
     等待元素消失
 
+    与 wait_for_element 相同，优先由结构变化事件唤醒检查。
+
     Args:
         window: 父窗口控件
         selector: 选择器字典
@@ -371,34 +1216,16 @@ def wait_for_element_disappear(
         ...     timeout=30
         ... )
     """
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        if "name" in selector:
-            element = find_element_by_name(
-                window,
-                selector["name"],
-                selector.get("control_type"),
-                0.5,
-                selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-            )
-        elif "class_name" in selector:
-            element = find_element_by_class(
-                window,
-                selector["class_name"],
-                selector.get("control_type"),
-                0.5,
-                selector.get("search_depth", DEFAULT_SEARCH_DEPTH)
-            )
-        else:
-            logger.warning("选择器缺少 name 或 class_name")
-            return False
+    probe = _build_probe(window, selector)
+    if probe is None:
+        return False
 
-        if not element or not element.Exists(0, 0):
-            logger.debug(f"元素已消失: {selector}")
-            return True
+    def gone() -> bool:
+        return probe() is None
 
-        time.sleep(DEFAULT_WAIT_INTERVAL)
+    if _wait_until(window, gone, timeout, DEFAULT_WAIT_INTERVAL):
+        logger.debug(f"元素已消失: {selector}")
+        return True
 
     logger.debug(f"等待元素消失超时: {selector}")
     return False
@@ -424,9 +1251,9 @@ def wait_for_window(
         >>> dialog = wait_for_window("#32770", "打开", timeout=5)
         >>> sns_window = wait_for_window("mmui::SNSWindow")
     """
-    start_time = time.time()
+    start_time = time.monotonic()
 
-    while time.time() - start_time < timeout:
+    while time.monotonic() - start_time < timeout:
         try:
             if title:
                 window = auto.WindowControl(
@@ -474,7 +1301,7 @@ def safe_click(
     Examples:
         >>> success = safe_click(button, delay_after=0.5)
     """
-    if not element or not element.Exists(0, 0):
+    if not _exists(element):
         logger.warning("元素不存在，无法点击")
         return False
 
@@ -510,7 +1337,7 @@ def click_at_position(
         >>> success = click_at_position(100, 200)
     """
     try:
-        pyautogui.click(x, y)  # 屏幕坐标
+        _click_xy(x, y)  # 屏幕坐标
         logger.debug(f"已点击坐标: ({x}, {y})")
         if delay_after > 0:
             time.sleep(delay_after)
@@ -540,14 +1367,14 @@ def click_element_center(
     Examples:
         >>> success = click_element_center(button, offset_x=10, offset_y=5)
     """
-    if not element or not element.Exists(0, 0):
+    if not _exists(element):
         logger.warning("元素不存在，无法点击")
         return False
 
     try:
-        rect = element.BoundingRectangle
-        center_x = (rect.left + rect.right) // 2 + offset_x
-        center_y = (rect.top + rect.bottom) // 2 + offset_y
+        left, top, right, bottom = _element_rect(element)
+        center_x = (left + right) // 2 + offset_x
+        center_y = (top + bottom) // 2 + offset_y
 
         return click_at_position(center_x, center_y)
 
@@ -573,18 +1400,21 @@ def long_click(
     Examples:
         >>> success = long_click(camera_button, duration=1.5)
     """
-    if not element or not element.Exists(0, 0):
+    if not _exists(element):
         logger.warning("元素不存在，无法长按")
         return False
 
     try:
-        rect = element.BoundingRectangle
-        center_x = (rect.left + rect.right) // 2
-        center_y = (rect.top + rect.bottom) // 2
+        left, top, right, bottom = _element_rect(element)
+        center_x = (left + right) // 2
+        center_y = (top + bottom) // 2
 
-        pyautogui.mouseDown(center_x, center_y)  # 元素中心坐标
-        time.sleep(duration)
-        pyautogui.mouseUp(center_x, center_y)  # 元素中心坐标
+        _mouse_down_at(center_x, center_y)  # 元素中心坐标
+        try:
+            time.sleep(duration)
+        finally:
+            # 指针已在原位，抬起时无需再次移动
+            _mouse_up()
 
         logger.debug(f"已长按元素: {element.Name}, 时长: {duration}s")
         return True
@@ -598,6 +1428,62 @@ def long_click(
 # 输入操作
 # ============================================================
 
+def _paste_text_via_pyperclip(text: str) -> None:
+    """通过 pyperclip 备份剪贴板、粘贴文本并恢复（剪贴板被占用时的备用路径）"""
+    # 备份剪贴板
+    old_clipboard = pyperclip.paste()
+
+    try:
+        # 复制文本到剪贴板
+        pyperclip.copy(text)
+        time.sleep(DEFAULT_INPUT_DELAY)
+
+        # 粘贴
+        _send_ctrl_v()
+        time.sleep(DEFAULT_INPUT_DELAY)
+
+    finally:
+        # 恢复剪贴板
+        try:
+            pyperclip.copy(old_clipboard)
+        except Exception:
+            pass
+
+
+def _restore_clipboard(clipboard: ClipboardManager) -> None:
+    """恢复剪贴板备份（失败只记录日志，不抛出异常）"""
+    if not clipboard.has_backup():
+        return
+    try:
+        clipboard.restore()
+    except ClipboardError as e:
+        logger.debug(f"恢复剪贴板失败: {e}")
+
+
+def _paste_text(text: str) -> None:
+    """把文本放入剪贴板并粘贴到当前焦点，完成后恢复剪贴板"""
+    clipboard = ClipboardManager(CLIPBOARD_OPEN_RETRIES, CLIPBOARD_RETRY_DELAY)
+
+    # 备份与写入在同一次剪贴板事务中完成
+    try:
+        swapped = clipboard.swap_text(text)
+    except ClipboardError as e:
+        logger.debug(f"{e}，改用 pyperclip")
+        swapped = False
+
+    if not swapped:
+        _restore_clipboard(clipboard)
+        _paste_text_via_pyperclip(text)
+        return
+
+    try:
+        # 粘贴，等待目标窗口读取剪贴板后再恢复
+        _send_ctrl_v()
+        time.sleep(DEFAULT_INPUT_DELAY)
+    finally:
+        _restore_clipboard(clipboard)
+
+
 def input_text_via_clipboard(
     element: auto.Control,
     text: str
@@ -615,7 +1501,7 @@ def input_text_via_clipboard(
     Examples:
         >>> success = input_text_via_clipboard(input_box, "你好，世界！")
     """
-    if not element or not element.Exists(0, 0):
+    if not _exists(element):
         logger.warning("输入框不存在")
         return False
 
@@ -628,27 +1514,10 @@ def input_text_via_clipboard(
         element.Click()
         time.sleep(DEFAULT_INPUT_DELAY)
 
-        # 备份剪贴板
-        old_clipboard = pyperclip.paste()
-
-        try:
-            # 复制文本到剪贴板
-            pyperclip.copy(text)
-            time.sleep(DEFAULT_INPUT_DELAY)
-
-            # 粘贴
-            pyautogui.hotkey('ctrl', 'v')
-            time.sleep(DEFAULT_INPUT_DELAY)
+        _paste_text(text)
 
-            logger.debug(f"已输入文本，长度: {len(text)}")
-            return True
-
-        finally:
-            # 恢复剪贴板
-            try:
-                pyperclip.copy(old_clipboard)
-            except:
-                pass
+        logger.debug(f"已输入文本，长度: {len(text)}")
+        return True
 
     except Exception as e:
         logger.error(f"输入文本失败: {e}")
@@ -666,7 +1535,7 @@ def paste_from_clipboard() -> bool:
         >>> success = paste_from_clipboard()
     """
     try:
-        pyautogui.hotkey('ctrl', 'v')
+        _send_ctrl_v()
         time.sleep(DEFAULT_INPUT_DELAY)
         logger.debug("已从剪贴板粘贴")
         return True
@@ -676,6 +1545,60 @@ def paste_from_clipboard() -> bool:
         return False
 
 
+def type_text(text: str) -> bool:
+    """
+    向当前焦点直接键入文本（SendInput Unicode 事件，不经过剪贴板）
+
+    适合产品编号、群名等短文本：不覆盖用户剪贴板，也不需要等待剪贴板就绪。
+
+    Args:
+        text: 要输入的文本
+
+    Returns:
+        是否成功
+
+    Examples:
+        >>> success = type_text("F006")
+    """
+    if not text:
+        return True
+
+    try:
+        _send_inputs(_unicode_inputs(text))
+        logger.debug(f"已键入文本，长度: {len(text)}")
+        return True
+
+    except Exception as e:
+        logger.error(f"键入文本失败: {e}")
+        return False
+
+
+def _set_value(element: auto.Control, text: str) -> bool:
+    """
+    通过 ValuePattern.SetValue 设置文本，并读回 Value 确认已生效
+
+    部分微信输入框接受 SetValue 调用但不改变内容，读回不一致时视为失败，
+    由调用方回退到键盘/剪贴板路径。
+
+    Returns:
+        是否成功，控件不支持 ValuePattern、调用失败或值未生效返回 False
+    """
+    try:
+        pattern = element.GetPattern(auto.PatternId.ValuePattern)
+        if not pattern:
+            return False
+        # uiautomation 默认在 SetValue 后等待 0.5 秒，这里不需要
+        if not pattern.SetValue(text, waitTime=0):
+            return False
+        if pattern.Value != text:
+            logger.debug("ValuePattern 设置文本未生效")
+            return False
+        return True
+    except Exception as e:
+        logger.debug(f"ValuePattern 设置文本失败: {e}")
+        return False
+
+
 def clear_and_input(
     element: auto.Control,
     text: str
@@ -693,26 +1616,34 @@ def clear_and_input(
     Examples:
         >>> success = clear_and_input(input_box, "新内容")
     """
-    if not element or not element.Exists(0, 0):
+    if not _exists(element):
         logger.warning("输入框不存在")
         return False
 
     try:
+        # 优先通过 ValuePattern 直接写入：不依赖焦点、不经过剪贴板。
+        # 部分控件的 SetValue 会丢弃中文等非 ASCII 字符，这类文本仍走剪贴板
+        if (not text or text.isascii()) and _set_value(element, text):
+            # 后续操作（如按回车发送）需要焦点在输入框，与点击路径保持一致
+            try:
+                element.SetFocus()
+            except Exception as e:
+                logger.debug(f"输入框设置焦点失败: {e}")
+            logger.debug(f"已通过 ValuePattern 写入文本，长度: {len(text)}")
+            return True
+
         # 点击输入框获取焦点
         element.Click()
-        time.sleep(DEFAULT_INPUT_DELAY)
+        time.sleep(FOCUS_SETTLE_DELAY)
 
-        # 全选
-        pyautogui.hotkey('ctrl', 'a')
-        time.sleep(DEFAULT_INPUT_DELAY)
+        # 清空：优先 ValuePattern，不支持时全选并删除（一次注入，无需中间等待）
+        if not _set_value(element, ""):
+            _send_select_all_and_delete()
 
-        # 删除
-        pyautogui.press('delete')
-        time.sleep(DEFAULT_INPUT_DELAY)
-
-        # 输入新文本
+        # 输入新文本（焦点已在输入框，不再重复点击）
         if text:
-            return input_text_via_clipboard(element, text)
+            _paste_text(text)
+            logger.debug(f"已清空并输入文本，长度: {len(text)}")
 
         return True
 
@@ -725,6 +1656,33 @@ def clear_and_input(
 # 窗口操作
 # ============================================================
 
+def _set_foreground(hwnd: int) -> bool:
+    """
+    调用 SetForegroundWindow，调用期间把当前线程挂接到前台窗口线程的输入队列，
+    以满足系统的前台切换限制
+
+    Args:
+        hwnd: 目标窗口句柄
+
+    Returns:
+        是否成功
+    """
+    foreground = _GetForegroundWindow()
+    foreground_thread = _GetWindowThreadProcessId(foreground, None) if foreground else 0
+    current_thread = _GetCurrentThreadId()
+
+    attached = bool(
+        foreground_thread
+        and foreground_thread != current_thread
+        and _AttachThreadInput(current_thread, foreground_thread, True)
+    )
+    try:
+        return bool(_SetForegroundWindow(hwnd))
+    finally:
+        if attached:
+            _AttachThreadInput(current_thread, foreground_thread, False)
+
+
 def activate_window(window: auto.WindowControl) -> bool:
     """
     激活窗口到前台
@@ -738,51 +1696,40 @@ def activate_window(window: auto.WindowControl) -> bool:
     Examples:
         >>> success = activate_window(main_window)
     """
-    if not window or not window.Exists(0, 0):
+    if not _exists(window):
         logger.warning("窗口不存在，无法激活")
         return False
 
     try:
-        import ctypes
-
         hwnd = window.NativeWindowHandle
-        user32 = ctypes.windll.user32
+
+        # 已在前台（且未最小化）时无需任何切换
+        if _GetForegroundWindow() == hwnd and not _IsIconic(hwnd):
+            logger.debug(f"窗口已在前台: {hwnd}")
+            return True
 
         # 如果窗口最小化或不可见，先恢复
-        if user32.IsIconic(hwnd) or not user32.IsWindowVisible(hwnd):
-            user32.ShowWindow(hwnd, 9)  # SW_RESTORE = 9
+        if _IsIconic(hwnd) or not _IsWindowVisible(hwnd):
+            _ShowWindow(hwnd, 9)  # SW_RESTORE = 9
             time.sleep(0.3)
+            # 恢复后窗口可能重建控件树，缓存的元素句柄不再可信
+            invalidate_element_cache(hwnd)
 
-        try:
-            window.SetFocus()
-        except Exception:
-            pass
-
-        # 模拟 Alt 键解除前台锁定
-        user32.keybd_event(0x12, 0, 0, 0)  # Alt down
-        user32.keybd_event(0x12, 0, 2, 0)  # Alt up
+        # 模拟 Alt 键解除前台锁定（按下、抬起一次注入）
+        _send_inputs([_vk_input(VK_MENU), _vk_input(VK_MENU, key_up=True)])
 
         # 设置为前台窗口
-        result = user32.SetForegroundWindow(hwnd)
+        result = _set_foreground(hwnd)
 
         if not result:
+            # 兜底：置顶翻转一次后重试
             flags = 0x0002 | 0x0001 | 0x0040  # SWP_NOMOVE | SWP_NOSIZE | SWP_SHOWWINDOW
-            user32.BringWindowToTop(hwnd)
-            user32.SetWindowPos(hwnd, -1, 0, 0, 0, 0, flags)  # HWND_TOPMOST
-            user32.SetWindowPos(hwnd, -2, 0, 0, 0, 0, flags)  # HWND_NOTOPMOST
+            _SetWindowPos(hwnd, -1, 0, 0, 0, 0, flags)  # HWND_TOPMOST
+            _SetWindowPos(hwnd, -2, 0, 0, 0, 0, flags)  # HWND_NOTOPMOST
             time.sleep(0.1)
-            result = user32.SetForegroundWindow(hwnd)
+            result = _set_foreground(hwnd)
 
         if result:
-            # 确保窗口可见
-            user32.ShowWindow(hwnd, 5)  # SW_SHOW = 5
-
-            # 将窗口置顶
-            user32.SetWindowPos(
-                hwnd, 0, 0, 0, 0, 0,
-                0x0002 | 0x0001 | 0x0040  # SWP_NOMOVE | SWP_NOSIZE | SWP_SHOWWINDOW
-            )
-
             logger.debug(f"窗口已激活: {window.Name}")
             return True
         else:
@@ -807,14 +1754,12 @@ def is_window_foreground(window: auto.WindowControl) -> bool:
     Examples:
         >>> is_active = is_window_foreground(main_window)
     """
-    if not window or not window.Exists(0, 0):
+    if not _exists(window):
         return False
 
     try:
-        import ctypes
-
         hwnd = window.NativeWindowHandle
-        foreground_hwnd = ctypes.windll.user32.GetForegroundWindow()
+        foreground_hwnd = _GetForegroundWindow()
 
         return hwnd == foreground_hwnd
 
@@ -840,11 +1785,18 @@ def get_window_rect(window: auto.WindowControl) -> Optional[Tuple[int, int, int,
         ...     width = right - left
         ...     height = bottom - top
     """
-    if not window or not window.Exists(0, 0):
+    if not _exists(window):
         logger.warning("窗口不存在")
         return None
 
     try:
+        # 有原生句柄时直接调用 GetWindowRect，省去一次 UIA 跨进程属性读取
+        hwnd = window.NativeWindowHandle
+        if hwnd:
+            rect = wintypes.RECT()
+            if _GetWindowRect(hwnd, ctypes.byref(rect)):
+                return (rect.left, rect.top, rect.right, rect.bottom)
+
         rect = window.BoundingRectangle
         return (rect.left, rect.top, rect.right, rect.bottom)
 
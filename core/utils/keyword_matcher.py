@@ -0,0 +1,165 @@
+"""
+多关键词匹配模块
+
+基于 Aho-Corasick 自动机，一次线性扫描文本即可找出所有关键词，
+用于替代 "逐级别、逐关键词 in 判断" 的嵌套循环
+"""
+
+import re
+from collections import deque
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class KeywordMatcher(Generic[T]):
+    """
+    Aho-Corasick 多关键词匹配器
+
+    关键词按传入顺序编号，顺序越靠前优先级越高；
+    find() 返回文本中出现的优先级最高的关键词，与按顺序逐个 `in`
+    判断的结果一致。
+
+    Examples:
+        >>> matcher = KeywordMatcher([("封号", "critical"), ("失败", "low")])
+        >>> matcher.find("发送失败，账号被封号")
+        ('封号', 'critical')
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]]):
+        """
+        构建自动机
+
+        Args:
+            keywords: (关键词, 附加数据) 序列，按优先级从高到低排列
+        """
+        # 每个状态：转移表、失败指针、输出（关键词序号列表）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        self._keywords: List[Tuple[str, T]] = []
+        for keyword, payload in keywords:
+            if not keyword:
+                continue
+            self._add(keyword, len(self._keywords))
+            self._keywords.append((keyword, payload))
+
+        self._build()
+
+        # 最短关键词长度，更短的文本不可能命中
+        self._min_length = min((len(keyword) for keyword, _ in self._keywords), default=0)
+
+        # 预编译正则交替式作为 C 层预过滤：绝大多数文本不含任何关键词，
+        # 可在进入 Python 层自动机循环前直接排除
+        self._prefilter: Optional[re.Pattern] = None
+        if self._keywords:
+            self._prefilter = re.compile(
+                "|".join(re.escape(keyword) for keyword, _ in self._keywords)
+            )
+
+    def _add(self, keyword: str, index: int) -> None:
+        """插入关键词到 trie"""
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build(self) -> None:
+        """广度优先计算失败指针，并合并输出"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    @property
+    def min_length(self) -> int:
+        """最短关键词长度"""
+        return self._min_length
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, T]]:
+        """
+        遍历文本中所有关键词出现位置
+
+        Args:
+            text: 待扫描文本
+
+        Yields:
+            (结束位置, 关键词, 附加数据)
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        keywords = self._keywords
+
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                keyword, payload = keywords[index]
+                yield pos, keyword, payload
+
+    def find(self, text: str) -> Optional[Tuple[str, T]]:
+        """
+        查找文本中优先级最高的关键词
+
+        Args:
+            text: 待扫描文本
+
+        Returns:
+            (关键词, 附加数据)，未匹配返回 None
+        """
+        if not text or self._prefilter is None or len(text) < self._min_length:
+            return None
+
+        first = self._prefilter.search(text)
+        if first is None:
+            return None
+
+        # 正则返回最左命中，之前不可能有关键词出现：
+        # 前缀交给 C 层跳过，自动机只扫描剩余部分
+        if first.start():
+            text = text[first.start():]
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        best: Optional[int] = None
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                if best is None or index < best:
+                    best = index
+                    if best == 0:
+                        return self._keywords[0]
+
+        if best is None:
+            return None
+        return self._keywords[best]
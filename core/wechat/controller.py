@@ -4,19 +4,37 @@
 整合所有子模块，提供统一的控制接口
 """
 
+import os
 import time
 import ctypes
 import logging
-from typing import Optional
+from typing import Optional, Sequence
 
 import uiautomation as auto
 
+try:
+    import win32api
+    import win32con
+    import win32gui
+    import win32process
+    _HAS_WIN32 = True
+except ImportError:  # 非 Windows 环境或未安装 pywin32：跳过 user32 快速检查和进程名校验
+    _HAS_WIN32 = False
+
+try:
+    import psutil
+    _HAS_PSUTIL = True
+except ImportError:  # psutil 不在依赖列表中：未安装时只跳过进程枚举兜底
+    _HAS_PSUTIL = False
+
 from services.config_manager import get_config_manager, get_config
 from models.enums import Channel
+from core.utils.element_helper import collect_control_names
 from .window_manager import WindowManager, Rect, MonitorInfo
 from .version_detector import VersionDetector
 from .login_checker import LoginChecker, WeChatStatus
 from .navigation import NavigationOperator
+from .process_snapshot import iter_processes
 
 
 logger = logging.getLogger(__name__)
@@ -33,6 +51,171 @@ PROCESS_PRIORITY_MAP = {
 }
 
 
+# ============================================================
+# uiautomation 超时
+# ============================================================
+
+# 默认全局搜索超时（秒），配置项 automation.timeout.window_wait 未设置时使用
+DEFAULT_SEARCH_TIMEOUT = 3
+
+
+# ============================================================
+# 主窗口缓存
+# ============================================================
+
+# 主窗口有效性校验结果的有效期（秒）
+MAIN_WINDOW_CHECK_TTL = 0.25
+
+
+# ============================================================
+# 窗口识别常量
+# ============================================================
+
+# 朋友圈窗口类名（不包含 mmui::MainWindow，避免误判），配置中的类名优先
+MOMENTS_WINDOW_CLASSES = ("mmui::SNSWindow", "SnsWnd", "Qt51514QWindowIcon")
+
+# 朋友圈窗口标题关键字
+MOMENTS_TITLES = ("朋友圈", "Moments")
+
+# 主面板检查：窗口类名、进程名、左侧导航按钮名称、搜索框名称关键字
+MAIN_PANEL_CLASSES = frozenset({"mmui::MainWindow", "Qt51514QWindowIcon"})
+MAIN_PANEL_PROCESS_NAMES = frozenset({"weixin.exe", "wechat.exe", "wechatappex.exe"})
+NAV_NAMES = frozenset({"微信", "通讯录", "收藏", "朋友圈", "视频号", "设置"})
+SEARCH_KEYWORDS = ("搜索", "Search")
+WEIXIN_PANE_NAMES = ("Weixin", "微信")
+
+
+# ============================================================
+# 前台等待参数
+# ============================================================
+
+# 激活窗口后等待其成为前台的最长时间与检查间隔（秒）
+FOREGROUND_WAIT_TIMEOUT = 0.2
+FOREGROUND_POLL_INTERVAL = 0.01
+
+
+# ============================================================
+# 朋友圈窗口轮询参数
+# ============================================================
+
+# 查找朋友圈窗口的重试间隔：从最小值开始按倍数增长，直到最大值（秒）
+MOMENTS_POLL_MIN_INTERVAL = 0.05
+MOMENTS_POLL_MAX_INTERVAL = 0.5
+MOMENTS_POLL_BACKOFF = 1.6
+
+
+# ============================================================
+# 进程枚举兜底
+# ============================================================
+
+# 候选窗口的满分：已知主窗口类名 3 + 有标题 1 + 标题含 "微信"/"WeChat" 2 + 可见 1
+PERFECT_CANDIDATE_SCORE = 7
+
+
+class _CandidateSearch:
+    """进程枚举兜底的查找状态，作为 EnumWindows 的额外参数传给回调"""
+
+    __slots__ = ("target_pids", "known_classes", "best")
+
+    def __init__(self, target_pids: set, known_classes: tuple):
+        self.target_pids = target_pids
+        self.known_classes = known_classes
+        # 当前得分最高的候选：(得分, hwnd, 类名, 标题)
+        self.best: Optional[tuple[int, int, str, str]] = None
+
+
+def _score_candidate(class_name: str, title: str, is_visible: bool, known_classes: tuple) -> int:
+    """计算候选窗口得分，越高越可能是微信主窗口"""
+    value = 0
+    if class_name in known_classes:
+        value += 3
+    if title:
+        value += 1
+        if "微信" in title or "WeChat" in title:
+            value += 2
+    if is_visible:
+        value += 1
+    return value
+
+
+def _score_window_candidate(hwnd: int, search: _CandidateSearch) -> bool:
+    """
+    EnumWindows 回调：给属于微信进程的顶级窗口打分，保留得分最高的一个
+
+    定义在模块级，查找状态通过 EnumWindows 的额外参数传入，
+    不必每次查找都新建闭包。
+
+    Args:
+        hwnd: 窗口句柄
+        search: 查找状态
+
+    Returns:
+        True 继续枚举；遇到满分候选返回 False 提前结束
+    """
+    try:
+        # 有所有者的窗口（提示框、菜单、输入法等）不可能是主窗口，直接跳过；
+        # 不可见窗口保留（最小化到托盘的主窗口不可见），由评分区分
+        if win32gui.GetWindow(hwnd, win32con.GW_OWNER):
+            return True
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        if pid not in search.target_pids:
+            return True
+        class_name = ""
+        title = ""
+        try:
+            class_name = win32gui.GetClassName(hwnd)
+        except Exception:
+            pass
+        try:
+            title = win32gui.GetWindowText(hwnd)
+        except Exception:
+            pass
+        is_visible = False
+        try:
+            is_visible = bool(win32gui.IsWindowVisible(hwnd))
+        except Exception:
+            pass
+
+        value = _score_candidate(class_name, title, is_visible, search.known_classes)
+        if search.best is None or value > search.best[0]:
+            search.best = (value, hwnd, class_name, title)
+            if value >= PERFECT_CANDIDATE_SCORE:
+                return False
+    except Exception:
+        pass
+    return True
+
+
+def _match_child_title(hwnd: int, state: tuple) -> bool:
+    """EnumChildWindows 回调：记录标题在给定集合中的子窗口"""
+    titles, matched = state
+    try:
+        if win32gui.GetWindowText(hwnd) in titles:
+            matched.append(hwnd)
+    except Exception:
+        pass
+    return True
+
+
+def _has_child_window_titled(hwnd: int, titles: Sequence[str]) -> bool:
+    """
+    检查窗口是否有指定标题的子窗口（纯 user32 调用，不走 UIA）
+
+    Args:
+        hwnd: 父窗口句柄
+        titles: 可接受的子窗口标题
+
+    Returns:
+        是否存在
+    """
+    matched: list[int] = []
+    try:
+        win32gui.EnumChildWindows(hwnd, _match_child_title, (titles, matched))
+    except Exception as e:
+        logger.debug(f"枚举子窗口失败: {e}")
+    return bool(matched)
+
+
 # ============================================================
 # 微信控制器
 # ============================================================
@@ -49,6 +232,9 @@ class WeChatController:
         """初始化控制器"""
         self._config = get_config_manager()
         self._main_window: Optional[auto.WindowControl] = None
+        # 主窗口句柄及最近一次确认有效的时间（time.monotonic），有效期内不再重复校验
+        self._main_hwnd = 0
+        self._main_window_checked_at = 0.0
 
         # 初始化子模块
         self._window_manager = WindowManager()
@@ -56,8 +242,14 @@ class WeChatController:
         self._login_checker = LoginChecker(self._version_detector, self._window_manager)
         self._navigation = NavigationOperator()
 
-        # 设置 uiautomation 超时
-        timeout = get_config("automation.timeout.window_wait", 15)
+        # 主窗口类名和进程名在运行期间不变，初始化时取一次快照，
+        # 窗口查找和进程枚举回调中直接使用
+        self._main_window_classes = self._version_detector.get_main_window_classes()
+        self._process_names_lower = self._version_detector.PROCESS_NAMES_LOWER
+
+        # 设置 uiautomation 全局搜索超时：未显式指定超时的查找都会继承该值，
+        # 取值过大时界面未就绪会让一次状态检查阻塞很久，这里保持较小值快速失败
+        timeout = get_config("automation.timeout.window_wait", DEFAULT_SEARCH_TIMEOUT)
         auto.SetGlobalSearchTimeout(timeout)
 
         logger.debug("微信窗口控制器初始化完成")
@@ -77,21 +269,21 @@ class WeChatController:
             微信主窗口控件，未找到返回 None
         """
         window = self._window_manager.find_window_by_class(
-            self._version_detector.get_main_window_classes(),
+            self._main_window_classes,
             timeout=timeout,
             title_contains="微信"
         )
 
         if not window:
             window = self._window_manager.find_window_by_class(
-                self._version_detector.get_main_window_classes(),
+                self._main_window_classes,
                 timeout=2,
                 title_contains="WeChat"
             )
 
         if not window:
             window = self._window_manager.find_window_by_class(
-                self._version_detector.get_main_window_classes(),
+                self._main_window_classes,
                 timeout=2
             )
 
@@ -100,6 +292,11 @@ class WeChatController:
 
         if window:
             self._main_window = window
+            try:
+                self._main_hwnd = window.NativeWindowHandle or 0
+            except Exception:
+                self._main_hwnd = 0
+            self._main_window_checked_at = time.monotonic()
             # 检测版本
             detected = self._version_detector.detect_version_from_window(window)
             if not detected:
@@ -109,67 +306,40 @@ class WeChatController:
 
     def _find_wechat_window_by_process(self) -> Optional[auto.WindowControl]:
         """通过进程枚举查找微信主窗口（用于类名识别失败的兜底）"""
+        if not (_HAS_WIN32 and _HAS_PSUTIL):
+            logger.debug("无法加载窗口枚举依赖")
+            return None
+
+        target_names = self._process_names_lower
+
+        # 一次进程快照得到全部微信进程 PID，回调中只做集合查找，
+        # 避免对桌面上每个窗口都构造 psutil.Process
         try:
-            import win32gui
-            import win32process
-            import psutil
+            target_pids = {
+                proc.info["pid"]
+                for proc in psutil.process_iter(["pid", "name"])
+                if (proc.info["name"] or "").lower() in target_names
+            }
         except Exception as e:
-            logger.debug(f"无法加载窗口枚举依赖: {e}")
+            logger.debug(f"枚举进程失败: {e}")
             return None
 
-        target_names = {name.lower() for name in self._version_detector.get_process_names()}
-        candidates: list[tuple[int, str, str, bool]] = []
-        known_classes = set(self._version_detector.get_main_window_classes())
-
-        def callback(hwnd, _):
-            try:
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                proc = psutil.Process(pid)
-                if proc.name().lower() not in target_names:
-                    return True
-                class_name = ""
-                title = ""
-                try:
-                    class_name = win32gui.GetClassName(hwnd)
-                except Exception:
-                    pass
-                try:
-                    title = win32gui.GetWindowText(hwnd)
-                except Exception:
-                    pass
-                is_visible = False
-                try:
-                    is_visible = win32gui.IsWindowVisible(hwnd)
-                except Exception:
-                    pass
-                candidates.append((hwnd, class_name, title, is_visible))
-            except Exception:
-                pass
-            return True
+        if not target_pids:
+            return None
 
+        search = _CandidateSearch(target_pids, self._main_window_classes)
         try:
-            win32gui.EnumWindows(callback, None)
+            win32gui.EnumWindows(_score_window_candidate, search)
         except Exception as e:
-            logger.debug(f"枚举窗口失败: {e}")
-            return None
+            # 回调返回 False 提前结束枚举时，pywin32 可能抛出错误，此时已拿到满分候选
+            if search.best is None or search.best[0] < PERFECT_CANDIDATE_SCORE:
+                logger.debug(f"枚举窗口失败: {e}")
+                return None
 
-        if not candidates:
+        if search.best is None:
             return None
 
-        def score(item):
-            _, class_name, title, is_visible = item
-            value = 0
-            if class_name in known_classes:
-                value += 3
-            if title:
-                value += 1
-                if "微信" in title or "WeChat" in title:
-                    value += 2
-            if is_visible:
-                value += 1
-            return value
-
-        hwnd, class_name, title, _ = max(candidates, key=score)
+        _, hwnd, class_name, title = search.best
         window = auto.ControlFromHandle(hwnd)
         if window:
             logger.info(f"通过进程枚举找到微信窗口: class={class_name}, title={title}")
@@ -213,29 +383,36 @@ class WeChatController:
         class_name = self._config.get_selector("moments_window.class_name")
 
         # 可能的朋友圈窗口类名（不包含 mmui::MainWindow，避免误判）
-        moments_classes = []
+        moments_classes = MOMENTS_WINDOW_CLASSES
         if class_name:
-            moments_classes.append(class_name)
-        moments_classes.extend([
-            "mmui::SNSWindow",
-            "SnsWnd",
-            "Qt51514QWindowIcon",
-        ])
+            moments_classes = (class_name,) + moments_classes
+
+        title_candidates = MOMENTS_TITLES
 
-        title_candidates = ["朋友圈", "Moments"]
+        # 查找用的控件描述只构造一次，每轮扫描复用（Exists 每次都会重新搜索）
+        title_windows = {
+            title: auto.WindowControl(searchDepth=1, SubName=title)
+            for title in title_candidates
+        }
+        class_windows = {
+            cls: auto.WindowControl(searchDepth=1, ClassName=cls)
+            for cls in moments_classes
+        }
 
         def _find_by_title(title: str) -> Optional[auto.WindowControl]:
-            window = auto.WindowControl(searchDepth=1, SubName=title)
-            if window.Exists(0.5, 0):
+            window = title_windows[title]
+            if window.Exists(0, 0):
                 return window
             return None
 
-        def _find_by_class(cls: str, title_contains: Optional[str] = None) -> Optional[auto.WindowControl]:
-            window = auto.WindowControl(searchDepth=1, ClassName=cls)
-            if not window.Exists(0.5, 0):
+        def _find_by_class(cls: str, title_contains: Sequence[str] = ()) -> Optional[auto.WindowControl]:
+            """按类名查找；指定 title_contains 时标题需包含其中任一关键字"""
+            window = class_windows[cls]
+            if not window.Exists(0, 0):
                 return None
             if title_contains:
-                if window.Name and title_contains in window.Name:
+                name = window.Name
+                if name and any(title in name for title in title_contains):
                     return window
                 return None
             return window
@@ -283,8 +460,11 @@ class WeChatController:
             # 其他类名的窗口，默认认为是朋友圈窗口
             return True
 
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        # 单次扫描只做零超时探测，由外层循环负责重试；
+        # 重试间隔指数退避，窗口刚打开时能尽快发现，长时间等待时减少 UIA 调用
+        delay = MOMENTS_POLL_MIN_INTERVAL
+        deadline = time.monotonic() + timeout
+        while True:
             # 优先按标题查找（避免无效类名导致重复日志）
             for title in title_candidates:
                 window = _find_by_title(title)
@@ -295,11 +475,11 @@ class WeChatController:
             # 再按类名查找
             for cls in moments_classes:
                 if cls == "Qt51514QWindowIcon":
-                    for title in title_candidates:
-                        window = _find_by_class(cls, title_contains=title)
-                        if window and _is_real_moments_window(window):
-                            logger.info(f"找到朋友圈窗口: class={cls}, title={title}")
-                            return window
+                    # Qt 类名与主窗口相同，只查找一次，再用标题区分
+                    window = _find_by_class(cls, title_contains=title_candidates)
+                    if window and _is_real_moments_window(window):
+                        logger.info(f"找到朋友圈窗口: class={cls}, title={window.Name}")
+                        return window
                     continue
 
                 window = _find_by_class(cls)
@@ -307,9 +487,11 @@ class WeChatController:
                     logger.info(f"找到朋友圈窗口: {cls}")
                     return window
 
-            time.sleep(0.5)
-
-        return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * MOMENTS_POLL_BACKOFF, MOMENTS_POLL_MAX_INTERVAL)
 
     def get_main_window(self) -> Optional[auto.WindowControl]:
         """
@@ -318,11 +500,33 @@ class WeChatController:
         Returns:
             微信主窗口
         """
-        if self._main_window and self._main_window.Exists(0, 0):
+        if self._main_window and self._is_main_window_valid():
             return self._main_window
 
         return self.find_wechat_window()
 
+    def _is_main_window_valid(self) -> bool:
+        """
+        检查已缓存的主窗口是否仍然有效
+
+        MAIN_WINDOW_CHECK_TTL 秒内确认过的直接视为有效；否则优先用
+        IsWindow 校验句柄（一次 user32 调用），取不到句柄时退回 UIA Exists。
+        """
+        now = time.monotonic()
+        if now - self._main_window_checked_at < MAIN_WINDOW_CHECK_TTL:
+            return True
+
+        try:
+            if self._main_hwnd and _HAS_WIN32:
+                valid = bool(win32gui.IsWindow(self._main_hwnd))
+            else:
+                valid = self._main_window.Exists(0, 0)
+        except Exception:
+            valid = False
+
+        self._main_window_checked_at = now if valid else 0.0
+        return valid
+
     def is_main_panel(
         self,
         window: Optional[auto.WindowControl] = None,
@@ -342,9 +546,19 @@ class WeChatController:
             logger.warning("Main window not found for main panel check.")
             return False
 
-        class_name = window.ClassName or ""
-        title = window.Name or ""
-        class_ok = class_name in ("mmui::MainWindow", "Qt51514QWindowIcon")
+        # 有窗口句柄时直接用 user32 读取类名和标题，没有 pywin32 时才读 UIA 属性
+        hwnd = 0
+        try:
+            hwnd = window.NativeWindowHandle or 0
+        except Exception:
+            pass
+        if hwnd and _HAS_WIN32:
+            class_name = win32gui.GetClassName(hwnd) or ""
+            title = win32gui.GetWindowText(hwnd) or ""
+        else:
+            class_name = window.ClassName or ""
+            title = window.Name or ""
+        class_ok = class_name in MAIN_PANEL_CLASSES
         title_ok = ("\u5fae\u4fe1" in title) or ("WeChat" in title)
         if not (class_ok and title_ok):
             logger.debug(
@@ -355,28 +569,23 @@ class WeChatController:
             return False
 
         process_ok: Optional[bool] = None
-        try:
-            import os
-            import win32api
-            import win32con
-            import win32process
-
-            hwnd = window.NativeWindowHandle
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            handle = win32api.OpenProcess(
-                win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
-                False,
-                pid,
-            )
+        if hwnd and _HAS_WIN32:
             try:
-                exe_path = win32process.GetModuleFileNameEx(handle, 0)
-                exe_name = os.path.basename(exe_path).lower()
-            finally:
-                win32api.CloseHandle(handle)
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                handle = win32api.OpenProcess(
+                    win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
+                    False,
+                    pid,
+                )
+                try:
+                    exe_path = win32process.GetModuleFileNameEx(handle, 0)
+                    exe_name = os.path.basename(exe_path).lower()
+                finally:
+                    win32api.CloseHandle(handle)
 
-            process_ok = exe_name in {"weixin.exe", "wechat.exe", "wechatappex.exe"}
-        except Exception as e:
-            logger.debug("Main panel process check skipped: %s", e)
+                process_ok = exe_name in MAIN_PANEL_PROCESS_NAMES
+            except Exception as e:
+                logger.debug("Main panel process check skipped: %s", e)
 
         if process_ok is False:
             logger.warning("Main panel process name mismatch.")
@@ -387,50 +596,34 @@ class WeChatController:
         if rect:
             size_ok = rect.width >= min_width and rect.height >= min_height
 
-        weixin_pane = False
-        try:
-            pane = window.PaneControl(searchDepth=3, Name="Weixin")
-            if pane.Exists(0, 0):
-                weixin_pane = True
-        except Exception:
-            pass
+        # 以下任一特征满足即可，按开销从低到高依次检查，命中即返回
+        if size_ok:
+            return True
+
+        # 先用 user32 枚举子窗口，面板不是原生子窗口时才用 UIA 查找
+        weixin_pane = bool(hwnd and _HAS_WIN32 and _has_child_window_titled(hwnd, WEIXIN_PANE_NAMES))
         if not weixin_pane:
-            try:
-                pane = window.PaneControl(searchDepth=3, Name="\u5fae\u4fe1")
-                if pane.Exists(0, 0):
-                    weixin_pane = True
-            except Exception:
-                pass
-
-        nav_names = [
-            "\u5fae\u4fe1",
-            "\u901a\u8baf\u5f55",
-            "\u6536\u85cf",
-            "\u670b\u53cb\u5708",
-            "\u89c6\u9891\u53f7",
-            "\u8bbe\u7f6e",
-        ]
-        nav_count = 0
-        for name in nav_names:
-            try:
-                btn = window.ButtonControl(searchDepth=6, Name=name)
-                if btn.Exists(0, 0):
-                    nav_count += 1
-            except Exception:
-                continue
+            for pane_name in WEIXIN_PANE_NAMES:
+                try:
+                    pane = window.PaneControl(searchDepth=3, Name=pane_name)
+                    if pane.Exists(0, 0):
+                        weixin_pane = True
+                        break
+                except Exception:
+                    continue
+        if weixin_pane:
+            return True
 
-        search_box = False
-        for keyword in ["\u641c\u7d22", "Search"]:
-            try:
-                box = window.EditControl(searchDepth=6, SubName=keyword)
-                if box.Exists(0, 0):
-                    search_box = True
-                    break
-            except Exception:
-                continue
+        # 一次遍历收集全部按钮/输入框名称，之后的判断都是集合查找
+        names = collect_control_names(window, ("ButtonControl", "EditControl"))
+        nav_count = len(NAV_NAMES & names.get("ButtonControl", set()))
+        search_box = any(
+            keyword in name
+            for name in names.get("EditControl", ())
+            for keyword in SEARCH_KEYWORDS
+        )
 
-        ui_ok = weixin_pane or search_box or nav_count >= 1
-        if not (ui_ok or size_ok):
+        if not (search_box or nav_count >= 1):
             logger.debug(
                 "Main panel UI check insufficient: size_ok=%s weixin_pane=%s nav_count=%s search_box=%s",
                 size_ok,
@@ -497,9 +690,9 @@ class WeChatController:
         height = get_config("display.wechat_window.height", 1080)
 
         try:
-            # 先激活窗口
+            # 先激活窗口，等到窗口真正成为前台再移动
             self.activate_window(window)
-            time.sleep(0.2)
+            self._wait_foreground(window)
 
             # 移动窗口到目标位置
             result = self.move_window(x, y, width, height, window)
@@ -511,6 +704,38 @@ class WeChatController:
             logger.error(f"重置微信主窗口位置失败: {e}")
             return False
 
+    def _wait_foreground(self, window: auto.WindowControl, timeout: float = FOREGROUND_WAIT_TIMEOUT) -> bool:
+        """
+        等待窗口成为前台窗口
+
+        每 FOREGROUND_POLL_INTERVAL 秒检查一次 GetForegroundWindow，
+        激活通常几十毫秒内完成；无法取得句柄时退回固定等待 timeout 秒。
+
+        Args:
+            window: 目标窗口
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否已成为前台窗口
+        """
+        hwnd = 0
+        try:
+            hwnd = window.NativeWindowHandle or 0
+        except Exception:
+            pass
+
+        if not hwnd or not _HAS_WIN32:
+            time.sleep(timeout)
+            return False
+
+        deadline = time.monotonic() + timeout
+        while win32gui.GetForegroundWindow() != hwnd:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(FOREGROUND_POLL_INTERVAL, remaining))
+        return True
+
     # ========================================================
     # 窗口位置和大小 (委托给 WindowManager)
     # ========================================================
@@ -594,7 +819,7 @@ class WeChatController:
         Returns:
             微信状态
         """
-        if not self._main_window or not self._main_window.Exists(0, 0):
+        if not self._main_window or not self._is_main_window_valid():
             self.find_wechat_window(timeout=timeout)
         return self._login_checker.check_login_status(self._main_window, timeout)
 
@@ -648,26 +873,17 @@ class WeChatController:
             return False
 
         try:
-            import subprocess
-
-            process_name = self._version_detector.PROCESS_NAME
+            process_name = self._version_detector.PROCESS_NAME.lower()
 
-            # 获取微信进程 ID
-            result = subprocess.run(
-                ["tasklist", "/FI", f"IMAGENAME eq {process_name}", "/FO", "CSV"],
-                capture_output=True,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
+            # 获取微信进程 ID（一次进程快照，不再启动 tasklist 子进程）
+            pid = next(
+                (pid for pid, name in iter_processes() if name.lower() == process_name),
+                None
             )
-
-            lines = result.stdout.strip().split('\n')
-            if len(lines) < 2:
+            if pid is None:
                 logger.error("未找到微信进程")
                 return False
 
-            # 解析 PID
-            pid = int(lines[1].split(',')[1].strip('"'))
-
             # 设置优先级
             kernel32 = ctypes.windll.kernel32
             handle = kernel32.OpenProcess(0x0200 | 0x0400, False, pid)  # PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION
@@ -812,3 +1028,5 @@ class WeChatController:
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self._main_window = None
+        self._main_hwnd = 0
+        self._main_window_checked_at = 0.0
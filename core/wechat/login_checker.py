@@ -9,8 +9,10 @@
 
 import os
 import time
+import ctypes
 import logging
 import subprocess
+from ctypes import wintypes
 from pathlib import Path
 from typing import Optional
 from enum import Enum
@@ -18,6 +20,7 @@ from enum import Enum
 import uiautomation as auto
 
 from services.config_manager import get_config
+from core.utils.element_helper import collect_control_names
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +39,83 @@ class WeChatStatus(Enum):
     UNKNOWN = "unknown"              # 未知状态
 
 
+# ============================================================
+# 状态标志
+# ============================================================
+
+# 登录后才有的按钮/文本名称
+LOGGED_IN_NAMES = frozenset({"发现", "通讯录", "聊天"})
+
+# 登录界面的按钮/文本名称
+LOGIN_NAMES = frozenset({"登录", "进入微信", "扫码登录"})
+
+# 锁定状态的提示文本
+LOCKED_NAMES = frozenset({"已锁定"})
+
+# 查找状态标志的最大深度：导航按钮、登录/锁定提示都在浅层，
+# 更深处的聊天消息、联系人名称不参与判断
+STATUS_SEARCH_DEPTH = 5
+
+# 已登录主窗口的标题与最小尺寸（宽, 高）：4.0 的登录窗口与主窗口类名相同，
+# 只能靠尺寸区分（登录/锁定窗口明显更小）
+LOGGED_IN_TITLES = frozenset({"微信", "WeChat"})
+LOGGED_IN_MIN_SIZE = (500, 400)
+
+# 等待登录时读取窗口标题/位置的间隔（秒）：变化时立即做一次完整状态检测
+LOGIN_POLL_INTERVAL = 0.5
+
+
+_user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+
+def _prototype(name: str, restype, *argtypes):
+    """绑定 user32 函数并声明参数/返回类型，模块加载时解析一次"""
+    func = getattr(_user32, name)
+    func.argtypes = list(argtypes)
+    func.restype = restype
+    return func
+
+
+_IsWindow = _prototype("IsWindow", wintypes.BOOL, wintypes.HWND)
+_GetWindowTextW = _prototype(
+    "GetWindowTextW", ctypes.c_int, wintypes.HWND, wintypes.LPWSTR, ctypes.c_int
+)
+_GetWindowRect = _prototype(
+    "GetWindowRect", wintypes.BOOL, wintypes.HWND, ctypes.POINTER(wintypes.RECT)
+)
+_GetClassNameW = _prototype(
+    "GetClassNameW", ctypes.c_int, wintypes.HWND, wintypes.LPWSTR, ctypes.c_int
+)
+
+
+def _window_signature(hwnd: int) -> Optional[tuple]:
+    """
+    读取窗口标题和矩形，作为廉价的变化检测依据（纯 user32 调用，不走 UIA）
+
+    Args:
+        hwnd: 窗口句柄
+
+    Returns:
+        (标题, left, top, right, bottom)，窗口已销毁或读取矩形失败返回 None
+    """
+    if not _IsWindow(hwnd):
+        return None
+
+    title = ctypes.create_unicode_buffer(256)
+    _GetWindowTextW(hwnd, title, 256)
+    rect = wintypes.RECT()
+    if not _GetWindowRect(hwnd, ctypes.byref(rect)):
+        return None
+    return title.value, rect.left, rect.top, rect.right, rect.bottom
+
+
+def _window_class_name(hwnd: int) -> str:
+    """读取窗口类名（纯 user32 调用）"""
+    class_name = ctypes.create_unicode_buffer(256)
+    _GetClassNameW(hwnd, class_name, 256)
+    return class_name.value
+
+
 # ============================================================
 # 登录检查器
 # ============================================================
@@ -57,6 +137,8 @@ class LoginChecker:
         """
         self._version_detector = version_detector
         self._window_manager = window_manager
+        # 自动查找到的微信路径（只缓存找到的结果，未找到时下次仍会重新查找）
+        self._wechat_path: Optional[str] = None
         logger.debug("登录检查器初始化完成")
 
     # ========================================================
@@ -93,48 +175,35 @@ class LoginChecker:
         if not main_window:
             return WeChatStatus.UNKNOWN
 
-        # 检查是否已登录 - 通过查找登录后才有的元素
+        # 快速判断：主窗口类名 + 标题 + 尺寸都符合已登录主窗口时，
+        # 只探测一次锁定提示，不做完整 UIA 遍历（锁定时主窗口外观不变）
+        if self._looks_logged_in(main_window):
+            logger.debug("主窗口类名/标题/尺寸符合已登录状态")
+            if self._has_locked_text(main_window):
+                return WeChatStatus.LOCKED
+            return WeChatStatus.LOGGED_IN
+
+        # 一次遍历收集按钮和文本名称，再与各状态的标志名称求交集
         # 微信4.0登录后会显示"发现"、"通讯录"等按钮
         try:
-            # 尝试查找登录后才有的元素
-            logged_in_indicators = [
-                ("ButtonControl", "发现"),
-                ("ButtonControl", "通讯录"),
-                ("ButtonControl", "聊天"),
-                ("TextControl", "发现"),
-                ("TextControl", "通讯录"),
-            ]
-
-            for control_type, name in logged_in_indicators:
-                if control_type == "ButtonControl":
-                    element = main_window.ButtonControl(searchDepth=5, Name=name)
-                else:
-                    element = main_window.TextControl(searchDepth=5, Name=name)
-
-                if element.Exists(1, 0):
-                    logger.debug(f"找到登录标志: {name}")
-                    # 检查是否锁定状态
-                    lock_hint = main_window.TextControl(searchDepth=5, Name="已锁定")
-                    if lock_hint.Exists(0, 0):
-                        return WeChatStatus.LOCKED
-                    return WeChatStatus.LOGGED_IN
+            collected = collect_control_names(
+                main_window, ("ButtonControl", "TextControl"), max_depth=STATUS_SEARCH_DEPTH
+            )
+            names = collected.get("ButtonControl", set()) | collected.get("TextControl", set())
+
+            found = names & LOGGED_IN_NAMES
+            if found:
+                logger.debug(f"找到登录标志: {', '.join(sorted(found))}")
+                # 检查是否锁定状态
+                if names & LOCKED_NAMES:
+                    return WeChatStatus.LOCKED
+                return WeChatStatus.LOGGED_IN
 
             # 检查是否显示登录二维码或"登录"按钮
-            login_indicators = [
-                ("ButtonControl", "登录"),
-                ("ButtonControl", "进入微信"),
-                ("TextControl", "扫码登录"),
-            ]
-
-            for control_type, name in login_indicators:
-                if control_type == "ButtonControl":
-                    element = main_window.ButtonControl(searchDepth=5, Name=name)
-                else:
-                    element = main_window.TextControl(searchDepth=5, Name=name)
-
-                if element.Exists(1, 0):
-                    logger.debug(f"找到登录界面标志: {name}")
-                    return WeChatStatus.NOT_LOGGED_IN
+            found = names & LOGIN_NAMES
+            if found:
+                logger.debug(f"找到登录界面标志: {', '.join(sorted(found))}")
+                return WeChatStatus.NOT_LOGGED_IN
 
         except Exception as e:
             logger.debug(f"检查登录状态时出错: {e}")
@@ -145,6 +214,53 @@ class LoginChecker:
 
         return WeChatStatus.UNKNOWN
 
+    def _looks_logged_in(self, main_window: auto.WindowControl) -> bool:
+        """
+        仅凭 user32 读取的类名、标题和尺寸判断是否为已登录的主窗口
+
+        Args:
+            main_window: 微信主窗口
+
+        Returns:
+            是否符合已登录主窗口特征；无法判断时返回 False
+        """
+        try:
+            hwnd = main_window.NativeWindowHandle
+            if not hwnd:
+                return False
+            signature = _window_signature(hwnd)
+            if signature is None:
+                return False
+            title, left, top, right, bottom = signature
+            if title not in LOGGED_IN_TITLES:
+                return False
+            min_width, min_height = LOGGED_IN_MIN_SIZE
+            if right - left < min_width or bottom - top < min_height:
+                return False
+            return _window_class_name(hwnd) in self._version_detector.get_main_window_classes()
+        except Exception as e:
+            logger.debug(f"快速判断登录状态失败: {e}")
+            return False
+
+    def _has_locked_text(self, main_window: auto.WindowControl) -> bool:
+        """
+        立即探测主窗口内是否有锁定提示文本（不等待）
+
+        Args:
+            main_window: 微信主窗口
+
+        Returns:
+            是否处于锁定状态；探测异常时返回 False
+        """
+        try:
+            return any(
+                main_window.TextControl(searchDepth=STATUS_SEARCH_DEPTH, Name=name).Exists(0, 0)
+                for name in LOCKED_NAMES
+            )
+        except Exception as e:
+            logger.debug(f"探测锁定状态失败: {e}")
+            return False
+
     def wait_for_login(
         self,
         main_window: Optional[auto.WindowControl] = None,
@@ -154,29 +270,51 @@ class LoginChecker:
         """
         等待微信登录
 
+        每 LOGIN_POLL_INTERVAL 秒读取一次窗口标题和位置，发生变化（登录后窗口
+        通常会改变标题或大小）时立即做完整状态检测；未变化时每 check_interval
+        秒兜底检测一次。
+
         Args:
             main_window: 微信主窗口（可选）
             timeout: 最大等待时间（秒）
-            check_interval: 检查间隔（秒）
+            check_interval: 完整检测的最长间隔（秒）
 
         Returns:
             是否登录成功
         """
         logger.info(f"等待微信登录，超时 {timeout} 秒...")
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            status = self.check_login_status(main_window)
-
-            if status == WeChatStatus.LOGGED_IN:
-                logger.info("微信已登录")
-                return True
-
-            if status == WeChatStatus.NOT_RUNNING:
-                logger.warning("微信未运行")
-                return False
-
-            time.sleep(check_interval)
+        deadline = time.monotonic() + timeout
+
+        hwnd = None
+        if main_window:
+            try:
+                hwnd = main_window.NativeWindowHandle
+            except Exception:
+                hwnd = None
+
+        last_signature = None
+        next_check = 0.0
+        while True:
+            signature = _window_signature(hwnd) if hwnd else None
+            now = time.monotonic()
+            if signature != last_signature or now >= next_check:
+                last_signature = signature
+                next_check = now + check_interval
+
+                status = self.check_login_status(main_window)
+
+                if status == WeChatStatus.LOGGED_IN:
+                    logger.info("微信已登录")
+                    return True
+
+                if status == WeChatStatus.NOT_RUNNING:
+                    logger.warning("微信未运行")
+                    return False
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(LOGIN_POLL_INTERVAL, remaining))
 
         logger.warning("等待登录超时")
         return False
@@ -199,6 +337,7 @@ class LoginChecker:
             wechat_path = self._find_wechat_path()
 
         if not wechat_path or not Path(wechat_path).exists():
+            self._wechat_path = None
             logger.error("未找到微信安装路径")
             return False
 
@@ -217,9 +356,14 @@ class LoginChecker:
         """
         自动查找微信安装路径
 
+        首次找到后缓存在实例上，重复启动时不再探测文件系统和注册表
+
         Returns:
             微信可执行文件路径
         """
+        if self._wechat_path:
+            return self._wechat_path
+
         common_paths = [
             Path(os.environ.get("PROGRAMFILES", "C:\\Program Files")) / "Tencent" / "WeChat" / "WeChat.exe",
             Path(os.environ.get("PROGRAMFILES(X86)", "C:\\Program Files (x86)")) / "Tencent" / "WeChat" / "WeChat.exe",
@@ -229,7 +373,8 @@ class LoginChecker:
         for path in common_paths:
             if path.exists():
                 logger.info(f"找到微信: {path}")
-                return str(path)
+                self._wechat_path = str(path)
+                return self._wechat_path
 
         # 尝试从注册表查找
         try:
@@ -243,7 +388,8 @@ class LoginChecker:
 
             exe_path = Path(install_path) / "WeChat.exe"
             if exe_path.exists():
-                return str(exe_path)
+                self._wechat_path = str(exe_path)
+                return self._wechat_path
         except Exception:
             pass
 
@@ -7,22 +7,246 @@
 - 转发对话框操作
 """
 
-import os
 import time
 import ctypes
 import logging
-from typing import Optional, Tuple
+from ctypes import wintypes
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, List, NamedTuple, Optional, Set, Tuple
 
 import pyautogui
-import pyperclip
+import uiautomation as auto
+import win32con
+import win32gui
+import win32process
 
 from services.config_manager import get_config_manager
 from models.enums import Channel
+from core.utils.element_helper import (
+    click_at_position,
+    click_element_center,
+    find_button,
+    type_text,
+)
+from .process_snapshot import iter_processes
 
 
 logger = logging.getLogger(__name__)
 
 
+# 等待界面变化的上限（秒），与原先固定等待的时长一致
+STEP_TIMEOUT = 3.0
+# 转发对话框出现的等待上限（秒）：原流程点击转发后共等待 3+3+3 秒才查找对话框
+FORWARD_DIALOG_TIMEOUT = 9.0
+# 轮询界面状态的间隔（秒）
+WAIT_POLL_INTERVAL = 0.05
+# 窗口切到前台后留给界面重绘的时间（秒）
+SETTLE_DELAY = 0.3
+# 没有可观测窗口状态的步骤（菜单弹出、页面加载、搜索结果）仍按固定时长等待
+STEP_DELAY = 3
+# 转发对话框标题：先按完整标题精确查找，找不到再枚举窗口按关键字匹配
+FORWARD_DIALOG_TITLES = ("发送给", "发送给：", "转发")
+FORWARD_DIALOG_KEYWORDS = ("发送给", "转发")
+# 小程序按钮的控件名称：能通过 UIA 找到时按控件中心点击，找不到再用配置坐标
+MINIPROGRAM_BUTTON_NAMES = {
+    "more": "更多",
+    "reenter": "重新进入小程序",
+    "search": "搜索",
+}
+# 按名称查找按钮的最短等待（秒）
+UIA_PROBE_TIMEOUT = 0.5
+# 按名称找到的按钮与配置坐标的最大偏差（像素）：超出视为同名的其他控件
+UIA_POSITION_TOLERANCE = 40
+# 小程序宿主进程名（小写）
+MINIPROGRAM_PROCESS_NAME = "wechatappex.exe"
+# 小程序窗口位置的缓存有效期（秒）：连续几次点击之间窗口不会移动
+RECT_CACHE_TTL = 0.1
+
+
+# ============================================================
+# Windows API
+# ============================================================
+
+_user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+_FindWindowW = _user32.FindWindowW
+_FindWindowW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR]
+_FindWindowW.restype = wintypes.HWND
+
+_ShowWindow = _user32.ShowWindow
+_ShowWindow.argtypes = [wintypes.HWND, ctypes.c_int]
+_ShowWindow.restype = wintypes.BOOL
+
+_SetForegroundWindow = _user32.SetForegroundWindow
+_SetForegroundWindow.argtypes = [wintypes.HWND]
+_SetForegroundWindow.restype = wintypes.BOOL
+
+
+class ChannelLayout(NamedTuple):
+    """一个渠道小程序的窗口位置与按钮坐标（屏幕绝对坐标）"""
+    restore: Tuple[int, int]
+    more: Tuple[int, int]
+    reenter: Tuple[int, int]
+    search: Tuple[int, int]
+    product: Tuple[int, int]
+    forward: Tuple[int, int]
+
+
+# 按钮坐标默认值（配置缺失时使用）
+DEFAULT_BUTTON_POSITIONS = {
+    "more": (2150, 323),
+    "reenter": (1871, 835),
+    "search": (2255, 371),
+    "product": (1950, 554),
+    "forward": (2177, 1110),
+}
+DEFAULT_RESTORE_POSITION = (1493, 236)
+
+
+@lru_cache(maxsize=4)
+def _load_channel_layout(config: Any, config_key: str, config_version: int) -> ChannelLayout:
+    """
+    解析一个渠道的坐标配置
+
+    config_version 只参与缓存键：配置重新加载或修改后版本号变化，自动重新解析。
+
+    Args:
+        config: 配置管理器
+        config_key: 小程序配置键名（miniprogram 或 miniprogram_customer）
+        config_version: 配置版本号
+
+    Returns:
+        渠道坐标
+    """
+    window_config = config.get(f"{config_key}.restore_window", {})
+    buttons_config = config.get(f"{config_key}.buttons", {})
+
+    def button(name: str) -> Tuple[int, int]:
+        default_x, default_y = DEFAULT_BUTTON_POSITIONS[name]
+        btn = buttons_config.get(name, {})
+        return (btn.get("absolute_x", default_x), btn.get("absolute_y", default_y))
+
+    return ChannelLayout(
+        restore=(
+            window_config.get("x", DEFAULT_RESTORE_POSITION[0]),
+            window_config.get("y", DEFAULT_RESTORE_POSITION[1]),
+        ),
+        more=button("more"),
+        reenter=button("reenter"),
+        search=button("search"),
+        product=button("product"),
+        forward=button("forward"),
+    )
+
+
+@dataclass
+class _Step:
+    """
+    操作链中的一步
+
+    action 失败时抛出异常；wait_for 为执行后等待的界面状态，
+    delay 为之后的固定等待（没有可观测状态时使用）
+    """
+    name: str
+    action: Callable[[], Any]
+    wait_for: Optional[Callable[[], bool]] = None
+    timeout: float = STEP_TIMEOUT
+    delay: float = 0
+
+
+def _near_position(control: auto.Control, position: Tuple[int, int]) -> bool:
+    """
+    判断控件是否位于屏幕坐标附近（允许 UIA_POSITION_TOLERANCE 像素偏差）
+
+    Args:
+        control: UIA 控件
+        position: 屏幕坐标 (x, y)
+
+    Returns:
+        坐标落在控件矩形外扩容差后的范围内返回 True；读取矩形失败返回 False
+    """
+    try:
+        rect = control.BoundingRectangle
+    except Exception:
+        return False
+    x, y = position
+    tolerance = UIA_POSITION_TOLERANCE
+    return (rect.left - tolerance <= x <= rect.right + tolerance
+            and rect.top - tolerance <= y <= rect.bottom + tolerance)
+
+
+def _find_pids_by_name(exe_name: str) -> Set[int]:
+    """
+    一次进程快照找出指定 exe 的全部 pid
+
+    先比较长度，只有长度相同的进程名才转小写比较，绝大多数进程不产生新字符串。
+
+    Args:
+        exe_name: 小写 exe 文件名
+
+    Returns:
+        pid 集合
+    """
+    size = len(exe_name)
+    return {
+        pid for pid, name in iter_processes()
+        if len(name) == size and name.lower() == exe_name
+    }
+
+
+def _first_thread_window(tid: int, match: Callable[[int], bool]) -> Optional[int]:
+    """
+    在指定线程的顶层窗口中查找第一个满足条件的窗口
+
+    一个线程通常只有几个窗口，比枚举桌面上全部顶层窗口便宜得多。
+
+    Args:
+        tid: 线程 ID
+        match: 判断条件
+
+    Returns:
+        窗口句柄，未找到（或线程已退出）返回 None
+    """
+    found: List[int] = []
+
+    def callback(hwnd, _):
+        if match(hwnd):
+            found.append(hwnd)
+            return False  # 停止枚举
+        return True
+
+    try:
+        win32gui.EnumThreadWindows(tid, callback, None)
+    except win32gui.error:
+        pass  # callback 返回 False 停止枚举，或线程已退出
+    return found[0] if found else None
+
+
+def _fast_click(x: int, y: int) -> None:
+    """
+    单击屏幕坐标（SendInput 一次注入移动、按下、抬起）
+
+    不经过 pyautogui 的 PAUSE 等待、failsafe 角落检测和屏幕尺寸探测。
+
+    Raises:
+        OSError: 输入被系统拦截
+    """
+    if not click_at_position(x, y, delay_after=0):
+        raise OSError(f"SendInput 点击失败: ({x}, {y})")
+
+
+def _send_text(text: str) -> None:
+    """
+    向当前焦点键入文本（SendInput Unicode 事件，不经过剪贴板）
+
+    Raises:
+        OSError: 输入被系统拦截
+    """
+    if not type_text(text):
+        raise OSError(f"SendInput 输入文本失败: {text}")
+
+
 # ============================================================
 # 导航操作器
 # ============================================================
@@ -37,8 +261,107 @@ class NavigationOperator:
     def __init__(self):
         """初始化导航操作器"""
         self._config = get_config_manager()
+        # 上次找到的小程序窗口句柄，校验仍有效时直接复用，不再枚举全部窗口
+        self._mp_hwnd: Optional[int] = None
+        # 小程序窗口所在线程 (线程 ID, 进程 ID) 和转发对话框所在线程 ID，
+        # 句柄失效后先在该线程内查找
+        self._mp_thread: Optional[Tuple[int, int]] = None
+        self._forward_tid: Optional[int] = None
+        # 小程序窗口位置缓存 (获取时间, (x, y, width, height))
+        self._rect_cache: Optional[Tuple[float, Tuple[int, int, int, int]]] = None
+        # UIA 找不到的按钮（小程序未暴露该控件），之后直接使用坐标；
+        # 只对记录时的小程序窗口有效，窗口句柄变化后重新按名称查找
+        self._uia_missing: Set[str] = set()
+        self._uia_missing_hwnd: Optional[int] = None
         logger.debug("导航操作器初始化完成")
 
+    def _resolve_channel_buttons(self, channel: Channel = None) -> ChannelLayout:
+        """
+        获取渠道坐标（按配置版本缓存，配置不变时不再逐项查找）
+
+        Args:
+            channel: 渠道类型
+
+        Returns:
+            渠道坐标
+        """
+        config_key = self._get_miniprogram_config_key(channel)
+        return _load_channel_layout(self._config, config_key, self._config.version)
+
+    def _wait_for(
+        self,
+        predicate: Callable[[], bool],
+        timeout: float = STEP_TIMEOUT,
+        interval: float = WAIT_POLL_INTERVAL
+    ) -> bool:
+        """
+        轮询等待界面状态，条件满足立即返回
+
+        Args:
+            predicate: 判断条件，抛出异常视为不满足
+            timeout: 等待上限（秒）
+            interval: 轮询间隔（秒）
+
+        Returns:
+            超时前条件是否满足
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if predicate():
+                    return True
+            except Exception as e:
+                logger.debug(f"等待条件检查失败: {e}")
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+
+    def _run_chain(self, steps: List[_Step]) -> bool:
+        """
+        依次执行操作链，任一步失败立即停止
+
+        等待条件超时不算失败（与原先的固定等待一致），继续执行下一步。
+
+        Args:
+            steps: 操作步骤
+
+        Returns:
+            是否全部执行成功
+        """
+        for step in steps:
+            try:
+                step.action()
+                logger.debug(f"{step.name}完成")
+            except Exception as e:
+                logger.error(f"{step.name}失败: {e}")
+                return False
+
+            if step.wait_for is not None and not self._wait_for(step.wait_for, step.timeout):
+                logger.debug(f"{step.name}后等待界面状态超时")
+            if step.delay > 0:
+                time.sleep(step.delay)
+        return True
+
+    def _wait_foreground(self, hwnd: Optional[int], timeout: float = STEP_TIMEOUT) -> bool:
+        """
+        等待窗口切到前台，再留出界面重绘时间
+
+        Args:
+            hwnd: 窗口句柄，None 时直接返回 False
+            timeout: 等待上限（秒）
+
+        Returns:
+            窗口是否已在前台
+        """
+        if not hwnd:
+            return False
+        ok = self._wait_for(lambda: win32gui.GetForegroundWindow() == hwnd, timeout)
+        if ok:
+            time.sleep(SETTLE_DELAY)
+        else:
+            logger.debug(f"等待窗口切到前台超时: hwnd={hwnd}")
+        return ok
+
     def _get_miniprogram_config_key(self, channel: Channel = None) -> str:
         """
         根据渠道获取小程序配置键名
@@ -62,85 +385,82 @@ class NavigationOperator:
         """
         查找小程序窗口，返回窗口句柄
 
+        优先复用上次找到的句柄（窗口仍存在、可见且类名不变），失效时才重新枚举
+
         Returns:
             窗口句柄，未找到返回 None
         """
-        import win32gui
-        import win32process
-
-        result_hwnd = None
-
-        def get_process_name(pid: int) -> str:
+        if self._mp_hwnd is not None:
             try:
-                import win32api
-                import win32con
-
-                handle = win32api.OpenProcess(
-                    win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
-                    False,
-                    pid,
-                )
-                try:
-                    exe_path = win32process.GetModuleFileNameEx(handle, 0)
-                    return os.path.basename(exe_path)
-                finally:
-                    win32api.CloseHandle(handle)
+                if (
+                    win32gui.IsWindow(self._mp_hwnd)
+                    and win32gui.IsWindowVisible(self._mp_hwnd)
+                    and win32gui.GetClassName(self._mp_hwnd) == "Chrome_WidgetWin_0"
+                ):
+                    return self._mp_hwnd
             except Exception:
                 pass
-
-            try:
-                import ctypes.wintypes as wt
-
-                PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
-                handle = ctypes.windll.kernel32.OpenProcess(
-                    PROCESS_QUERY_LIMITED_INFORMATION, False, pid
+            self._mp_hwnd = None
+
+        # 窗口重建时通常仍在原来的线程里，先只看该线程的窗口
+        if self._mp_thread is not None:
+            tid, mp_pid = self._mp_thread
+            result_hwnd = _first_thread_window(
+                tid,
+                lambda hwnd: (
+                    win32gui.IsWindowVisible(hwnd)
+                    and win32gui.GetClassName(hwnd) == "Chrome_WidgetWin_0"
+                    and win32process.GetWindowThreadProcessId(hwnd)[1] == mp_pid
                 )
-                if not handle:
-                    return ""
-                try:
-                    size = wt.DWORD(260)
-                    buf = ctypes.create_unicode_buffer(size.value)
-                    if ctypes.windll.kernel32.QueryFullProcessImageNameW(
-                        handle, 0, buf, ctypes.byref(size)
-                    ):
-                        return os.path.basename(buf.value)
-                finally:
-                    ctypes.windll.kernel32.CloseHandle(handle)
-            except Exception:
-                pass
+            )
+            if result_hwnd:
+                logger.debug(f"在原线程中找到小程序窗口: hwnd={result_hwnd}")
+                self._mp_hwnd = result_hwnd
+                return result_hwnd
 
-            return ""
+        result_hwnd = None
+        # 小程序宿主进程的 pid 集合，遇到第一个候选窗口时才做一次进程快照
+        host_pids: Optional[Set[int]] = None
 
         def callback(hwnd, _):
-            nonlocal result_hwnd
-            if win32gui.IsWindowVisible(hwnd):
-                try:
-                    class_name = win32gui.GetClassName(hwnd)
-                    if class_name == "Chrome_WidgetWin_0":
-                        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                        try:
-                            proc_name = get_process_name(pid)
-                            if proc_name.lower() == "wechatappex.exe":
-                                result_hwnd = hwnd
-                                return False  # 停止枚举
-                        except:
-                            pass
-                except:
-                    pass
+            nonlocal result_hwnd, host_pids
+            if not win32gui.IsWindowVisible(hwnd):
+                return True
+            # 只有 Chrome_WidgetWin_0 窗口才需要查进程
+            if win32gui.GetClassName(hwnd) != "Chrome_WidgetWin_0":
+                return True
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            if host_pids is None:
+                host_pids = _find_pids_by_name(MINIPROGRAM_PROCESS_NAME)
+            if pid in host_pids:
+                result_hwnd = hwnd
+                return False  # 停止枚举
             return True
 
         try:
             win32gui.EnumWindows(callback, None)
-        except:
-            pass  # EnumWindows 在 callback 返回 False 时会抛异常，这是正常的
+        except win32gui.error as e:
+            # callback 返回 False 停止枚举时 EnumWindows 会抛出错误码 0，属正常情况
+            if result_hwnd is None:
+                logger.warning(f"枚举窗口失败: {e}")
 
         if result_hwnd:
             logger.debug(f"找到小程序窗口: hwnd={result_hwnd}")
+            self._mp_thread = win32process.GetWindowThreadProcessId(result_hwnd)
         else:
             logger.debug("未找到小程序窗口")
+            self._mp_thread = None
 
+        self._mp_hwnd = result_hwnd
         return result_hwnd
 
+    def invalidate_miniprogram_cache(self) -> None:
+        """清除缓存的小程序窗口句柄、位置和按钮查找记录，下次查找时重新枚举"""
+        self._mp_hwnd = None
+        self._rect_cache = None
+        self._uia_missing.clear()
+        self._uia_missing_hwnd = None
+
     def restore_miniprogram_window(self, x: int, y: int) -> bool:
         """
         恢复小程序窗口位置并置顶（不改变大小）
@@ -152,40 +472,46 @@ class NavigationOperator:
         Returns:
             是否成功
         """
-        import win32gui
-        import win32con
-
         hwnd = self.find_miniprogram_window()
         if hwnd is None:
             logger.warning("未找到小程序窗口，无法恢复位置")
             return False
 
         try:
-            user32 = ctypes.windll.user32
+            # 恢复窗口（仅最小化时需要；须在读取大小之前，否则读到的是最小化后的尺寸）
+            if win32gui.IsIconic(hwnd):
+                _ShowWindow(hwnd, win32con.SW_RESTORE)
 
             # 获取当前窗口大小（保持不变）
             rect = win32gui.GetWindowRect(hwnd)
             current_width = rect[2] - rect[0]
             current_height = rect[3] - rect[1]
 
-            # 恢复窗口（如果最小化）
-            user32.ShowWindow(hwnd, 9)  # SW_RESTORE
-
-            # 设置窗口位置并置顶（保持原大小）
-            win32gui.SetWindowPos(
-                hwnd,
-                win32con.HWND_TOPMOST,
-                x, y, current_width, current_height,
-                win32con.SWP_SHOWWINDOW
-            )
+            # 已在目标位置且已置顶时跳过 SetWindowPos
+            ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+            in_place = (rect[0], rect[1]) == (x, y) and bool(ex_style & win32con.WS_EX_TOPMOST)
+            if not in_place:
+                # 设置窗口位置并置顶（保持原大小）
+                win32gui.SetWindowPos(
+                    hwnd,
+                    win32con.HWND_TOPMOST,
+                    x, y, current_width, current_height,
+                    win32con.SWP_SHOWWINDOW
+                )
 
-            # 激活窗口到前台
-            user32.SetForegroundWindow(hwnd)
+            # 激活窗口到前台（已是前台时跳过）
+            if win32gui.GetForegroundWindow() != hwnd:
+                _SetForegroundWindow(hwnd)
 
-            logger.info(f"小程序窗口已移动并置顶: 位置({x},{y}), 大小{current_width}x{current_height}（保持不变）")
+            if in_place:
+                logger.debug(f"小程序窗口已在目标位置并置顶: ({x},{y})")
+            else:
+                self._rect_cache = None
+                logger.info(f"小程序窗口已移动并置顶: 位置({x},{y}), 大小{current_width}x{current_height}（保持不变）")
             return True
         except Exception as e:
             logger.error(f"恢复小程序窗口失败: {e}")
+            self.invalidate_miniprogram_cache()
             return False
 
     def cancel_miniprogram_topmost(self) -> bool:
@@ -195,9 +521,6 @@ class NavigationOperator:
         Returns:
             是否成功
         """
-        import win32gui
-        import win32con
-
         hwnd = self.find_miniprogram_window()
         if hwnd is None:
             logger.debug("未找到小程序窗口，无需取消置顶")
@@ -222,28 +545,37 @@ class NavigationOperator:
             return True
         except Exception as e:
             logger.error(f"取消小程序窗口置顶失败: {e}")
+            self.invalidate_miniprogram_cache()
             return False
 
     def get_miniprogram_window_rect(self) -> Optional[Tuple[int, int, int, int]]:
         """
         获取小程序窗口位置和大小
 
+        RECT_CACHE_TTL 内的连续调用直接返回上次结果，窗口被移动时由
+        restore_miniprogram_window 清除缓存。
+
         Returns:
             (x, y, width, height) 或 None
         """
-        import win32gui
+        now = time.monotonic()
+        if self._rect_cache is not None and now - self._rect_cache[0] < RECT_CACHE_TTL:
+            return self._rect_cache[1]
 
         hwnd = self.find_miniprogram_window()
         if hwnd is None:
             return None
 
         try:
-            rect = win32gui.GetWindowRect(hwnd)
-            x, y, x2, y2 = rect
-            return (x, y, x2 - x, y2 - y)
-        except:
+            x, y, x2, y2 = win32gui.GetWindowRect(hwnd)
+        except win32gui.error:
+            self.invalidate_miniprogram_cache()
             return None
 
+        rect = (x, y, x2 - x, y2 - y)
+        self._rect_cache = (now, rect)
+        return rect
+
     def click_miniprogram_button(self, x_offset: int, y_offset: int) -> bool:
         """
         点击小程序窗口内的按钮
@@ -265,77 +597,104 @@ class NavigationOperator:
         click_y = win_y + y_offset
 
         try:
-            pyautogui.click(click_x, click_y)  # 小程序按钮坐标
+            _fast_click(click_x, click_y)  # 小程序按钮坐标
             logger.debug(f"点击小程序按钮: ({click_x}, {click_y})")
             return True
         except Exception as e:
             logger.error(f"点击小程序按钮失败: {e}")
             return False
 
-    def refresh_miniprogram(self, channel: Channel = None) -> bool:
+    def _click_miniprogram_button(self, key: str, position: Tuple[int, int], wait: float = 0) -> None:
+        """
+        点击小程序按钮：优先按控件名称定位，找不到时点击配置坐标
+
+        按名称查找时 wait 作为等待按钮出现的上限，按钮一出现立即点击；
+        UIA 在当前窗口中找不到过的按钮之后固定等待 wait 再点击坐标。
+        按名称找到的控件须位于配置坐标附近，否则视为同名的其他控件（如
+        网页内容中的"搜索"），仍点击配置坐标。
+
+        Args:
+            key: 按钮键名（more / reenter / search）
+            position: 配置的屏幕坐标
+            wait: 点击前最多等待的时间（秒）
+
+        Raises:
+            OSError: 点击失败
+        """
+        name = MINIPROGRAM_BUTTON_NAMES.get(key)
+        hwnd = self.find_miniprogram_window()
+        if hwnd != self._uia_missing_hwnd:
+            self._uia_missing.clear()
+            self._uia_missing_hwnd = hwnd
+
+        if name and hwnd and key not in self._uia_missing:
+            button = find_button(
+                auto.ControlFromHandle(hwnd), name, timeout=max(wait, UIA_PROBE_TIMEOUT)
+            )
+            # 已等待过 wait，找不到或位置不符时直接点击坐标
+            if button is None:
+                self._uia_missing.add(key)
+                logger.debug(f"未找到小程序按钮控件 {name}，改用坐标")
+            elif not _near_position(button, position):
+                logger.debug(f"小程序按钮控件 {name} 不在配置坐标附近，改用坐标")
+            elif click_element_center(button):
+                logger.debug(f"按名称点击小程序按钮: {name}")
+                return
+        elif wait > 0:
+            time.sleep(wait)
+
+        _fast_click(*position)
+        logger.debug(f"点击小程序按钮 {key}: {position}")
+
+    def refresh_miniprogram(
+        self,
+        channel: Channel = None,
+        layout: Optional[ChannelLayout] = None
+    ) -> bool:
         """
         刷新小程序（弹出窗口 -> 点击更多 -> 点击重新进入）
 
         Args:
             channel: 渠道类型（用于选择配置）
+            layout: 已解析的渠道坐标（调用方已获取时传入，不再重复解析）
 
         Returns:
             是否成功
         """
         # 根据渠道获取配置
-        config_key = self._get_miniprogram_config_key(channel)
-        window_config = self._config.get(f"{config_key}.restore_window", {})
-        buttons_config = self._config.get(f"{config_key}.buttons", {})
+        if layout is None:
+            layout = self._resolve_channel_buttons(channel)
 
         # 1. 弹出小程序窗口（只调整位置，不改变大小）
-        self.restore_miniprogram_window(
-            window_config.get("x", 1493),
-            window_config.get("y", 236)
-        )
-        time.sleep(3)  # 等待3秒
-
-        # 2. 点击更多按钮（使用绝对坐标）
-        more_btn = buttons_config.get("more", {})
-        more_x = more_btn.get("absolute_x", 2150)
-        more_y = more_btn.get("absolute_y", 323)
+        self.restore_miniprogram_window(*layout.restore)
+        self._wait_foreground(self.find_miniprogram_window())
+
+        # 2. 点击更多按钮
         try:
-            pyautogui.click(more_x, more_y)  # 更多按钮坐标
-            logger.debug(f"点击更多按钮: ({more_x}, {more_y})")
+            self._click_miniprogram_button("more", layout.more)
         except Exception as e:
             logger.error(f"点击更多按钮失败: {e}")
             return False
-        time.sleep(3)  # 等待3秒
 
-        # 3. 点击重新进入小程序（使用绝对坐标）
-        reenter_btn = buttons_config.get("reenter", {})
-        reenter_x = reenter_btn.get("absolute_x", 1871)
-        reenter_y = reenter_btn.get("absolute_y", 835)
+        # 3. 点击重新进入小程序（等待菜单弹出：能找到控件时出现即点，否则固定等待）
         try:
-            pyautogui.click(reenter_x, reenter_y)  # 重新进入按钮坐标
-            logger.debug(f"点击重新进入小程序: ({reenter_x}, {reenter_y})")
+            self._click_miniprogram_button("reenter", layout.reenter, wait=STEP_DELAY)
         except Exception as e:
             logger.error(f"点击重新进入小程序失败: {e}")
             return False
-        time.sleep(3)  # 等待3秒
+        time.sleep(STEP_DELAY)  # 等待小程序重新加载
 
         # 4. 再次恢复小程序窗口位置（只调整位置，不改变大小）
-        self.restore_miniprogram_window(
-            window_config.get("x", 1493),
-            window_config.get("y", 236)
-        )
-        time.sleep(3)  # 等待3秒
-
-        # 5. 点击搜索按钮（使用绝对坐标）
-        search_btn = buttons_config.get("search", {})
-        search_x = search_btn.get("absolute_x", 2255)
-        search_y = search_btn.get("absolute_y", 371)
+        self.restore_miniprogram_window(*layout.restore)
+        self._wait_foreground(self.find_miniprogram_window())
+
+        # 5. 点击搜索按钮
         try:
-            pyautogui.click(search_x, search_y)  # 搜索按钮坐标
-            logger.debug(f"点击搜索按钮: ({search_x}, {search_y})")
+            self._click_miniprogram_button("search", layout.search)
         except Exception as e:
             logger.error(f"点击搜索按钮失败: {e}")
             return False
-        time.sleep(3)  # 等待3秒
+        time.sleep(STEP_DELAY)  # 等待搜索页加载
 
         logger.info("小程序刷新并点击搜索完成")
         return True
@@ -351,29 +710,46 @@ class NavigationOperator:
         Returns:
             窗口句柄，未找到返回 None
         """
-        import win32gui
+        # 标题已知时由系统直接查找，无需对每个顶层窗口回调
+        for title in FORWARD_DIALOG_TITLES:
+            hwnd = _FindWindowW(None, title)
+            if hwnd and win32gui.IsWindowVisible(hwnd):
+                logger.debug(f"找到转发对话框: hwnd={hwnd}")
+                self._forward_tid = win32process.GetWindowThreadProcessId(hwnd)[0]
+                return hwnd
+
+        def is_dialog(hwnd) -> bool:
+            if not win32gui.IsWindowVisible(hwnd):
+                return False
+            title = win32gui.GetWindowText(hwnd)
+            return any(keyword in title for keyword in FORWARD_DIALOG_KEYWORDS)
+
+        # 对话框每次转发都会重新创建，但由同一个微信界面线程创建
+        if self._forward_tid is not None:
+            result_hwnd = _first_thread_window(self._forward_tid, is_dialog)
+            if result_hwnd:
+                logger.debug(f"在原线程中找到转发对话框: hwnd={result_hwnd}")
+                return result_hwnd
 
         result_hwnd = None
 
         def callback(hwnd, _):
             nonlocal result_hwnd
-            if win32gui.IsWindowVisible(hwnd):
-                try:
-                    title = win32gui.GetWindowText(hwnd)
-                    if '发送给' in title or '转发' in title:
-                        result_hwnd = hwnd
-                        return False
-                except:
-                    pass
+            if is_dialog(hwnd):
+                result_hwnd = hwnd
+                return False
             return True
 
         try:
             win32gui.EnumWindows(callback, None)
-        except:
-            pass
+        except win32gui.error as e:
+            # callback 返回 False 停止枚举时 EnumWindows 会抛出错误码 0，属正常情况
+            if result_hwnd is None:
+                logger.warning(f"枚举窗口失败: {e}")
 
         if result_hwnd:
             logger.debug(f"找到转发对话框: hwnd={result_hwnd}")
+            self._forward_tid = win32process.GetWindowThreadProcessId(result_hwnd)[0]
 
         return result_hwnd
 
@@ -387,9 +763,6 @@ class NavigationOperator:
         Returns:
             是否成功
         """
-        import win32gui
-        import win32con
-
         pyautogui.FAILSAFE = False
 
         # 获取配置
@@ -398,21 +771,23 @@ class NavigationOperator:
         send_button = forward_config.get("send_button", {})
 
         # 等待转发对话框出现
-        time.sleep(3)  # 等待3秒
+        self._wait_for(lambda: self.find_forward_dialog() is not None, FORWARD_DIALOG_TIMEOUT)
         hwnd = self.find_forward_dialog()
         if hwnd is None:
             logger.error("未找到转发对话框")
             return False
 
         # 激活对话框
-        win32gui.SetForegroundWindow(hwnd)
-        time.sleep(3)  # 等待3秒
+        _SetForegroundWindow(hwnd)
+        self._wait_foreground(hwnd)
 
         # 10. 输入群聊名称（对话框打开后光标自动在搜索框）
-        pyperclip.copy(group_name)
-        time.sleep(0.5)
-        pyautogui.hotkey('ctrl', 'v')
-        time.sleep(3)  # 等待3秒
+        try:
+            _send_text(group_name)
+        except OSError as e:
+            logger.error(f"输入群聊名称失败: {e}")
+            return False
+        time.sleep(STEP_DELAY)  # 等待搜索框联想结果
 
         # 获取对话框位置
         rect = win32gui.GetWindowRect(hwnd)
@@ -425,9 +800,9 @@ class NavigationOperator:
         else:
             group_x = dialog_x + group_option.get("x_offset", 150)
             group_y = dialog_y + group_option.get("y_offset", 180)
-        pyautogui.click(group_x, group_y)  # 群聊选项坐标
+        _fast_click(group_x, group_y)  # 群聊选项坐标
         logger.debug(f"点击群聊选项: ({group_x}, {group_y})")
-        time.sleep(3)  # 等待3秒
+        time.sleep(STEP_DELAY)  # 选中状态在对话框内部绘制，没有可等待的窗口
 
         # 12. 点击发送按钮（支持绝对坐标或对话框偏移坐标）
         if "absolute_x" in send_button and "absolute_y" in send_button:
@@ -436,9 +811,11 @@ class NavigationOperator:
         else:
             send_x = dialog_x + send_button.get("x_offset", 663)
             send_y = dialog_y + send_button.get("y_offset", 778)
-        pyautogui.click(send_x, send_y)  # 发送按钮坐标
+        _fast_click(send_x, send_y)  # 发送按钮坐标
         logger.debug(f"点击发送按钮: ({send_x}, {send_y})")
-        time.sleep(3)  # 等待3秒
+        # 发送完成后对话框自动关闭
+        if not self._wait_for(lambda: not win32gui.IsWindow(hwnd) or not win32gui.IsWindowVisible(hwnd)):
+            logger.warning("发送后转发对话框仍未关闭")
 
         logger.info(f"已转发到群聊: {group_name}")
         return True
@@ -461,67 +838,41 @@ class NavigationOperator:
         product_code = content_code[:4] if len(content_code) >= 4 else content_code
         logger.info(f"产品编号: {product_code}, 渠道: {channel.value if channel else '默认'}")
 
-        # 根据渠道获取配置
-        config_key = self._get_miniprogram_config_key(channel)
-        buttons_config = self._config.get(f"{config_key}.buttons", {})
+        # 根据渠道获取配置（整个流程只解析一次，刷新步骤复用）
+        layout = self._resolve_channel_buttons(channel)
 
         # 1-5. 刷新小程序并点击搜索
-        if not self.refresh_miniprogram(channel):
+        if not self.refresh_miniprogram(channel, layout):
             return False
-        time.sleep(3)  # 等待3秒
-
-        # 6. 输入产品编号
-        pyperclip.copy(product_code)
-        time.sleep(0.5)
-        pyautogui.hotkey('ctrl', 'v')
-        time.sleep(3)  # 等待3秒
-
-        # 7. 按 Enter 搜索
-        pyautogui.press('enter')
-        time.sleep(3)  # 等待3秒
-
-        # 7.1 重新激活小程序窗口（防止焦点丢失）
-        window_config = self._config.get(f"{config_key}.restore_window", {})
-        self.restore_miniprogram_window(
-            window_config.get("x", 1493),
-            window_config.get("y", 236)
-        )
-        time.sleep(0.5)
-
-        # 8. 点击产品链接（使用绝对坐标）
-        product_btn = buttons_config.get("product", {})
-        product_x = product_btn.get("absolute_x", 1950)
-        product_y = product_btn.get("absolute_y", 554)
-        try:
-            pyautogui.click(product_x, product_y)  # 产品链接坐标
-            logger.debug(f"点击产品链接: ({product_x}, {product_y})")
-        except Exception as e:
-            logger.error(f"点击产品链接失败: {e}")
-            return False
-        time.sleep(3)  # 等待3秒
 
-        # 9. 点击转发按钮（使用绝对坐标）
-        forward_btn = buttons_config.get("forward", {})
-        forward_x = forward_btn.get("absolute_x", 2177)
-        forward_y = forward_btn.get("absolute_y", 1110)
-        try:
-            pyautogui.click(forward_x, forward_y)  # 转发按钮坐标
-            logger.debug(f"点击转发按钮: ({forward_x}, {forward_y})")
-        except Exception as e:
-            logger.error(f"点击转发按钮失败: {e}")
+        # 6-9. 输入产品编号 -> 搜索 -> 重新激活窗口 -> 点击产品链接 -> 点击转发按钮
+        # 重新激活后 restore_miniprogram_window 已刷新 _mp_hwnd，等待前台时直接比较句柄
+        steps = [
+            _Step("输入产品编号", lambda: _send_text(product_code),
+                  delay=STEP_DELAY),  # 等待搜索框联想结果
+            _Step("按 Enter 搜索", lambda: pyautogui.press('enter'),
+                  delay=STEP_DELAY),  # 等待搜索结果
+            _Step("重新激活小程序窗口", lambda: self.restore_miniprogram_window(*layout.restore),
+                  wait_for=lambda: win32gui.GetForegroundWindow() == self._mp_hwnd,
+                  timeout=0.5, delay=SETTLE_DELAY),
+            _Step(f"点击产品链接 {layout.product}", lambda: _fast_click(*layout.product),
+                  delay=STEP_DELAY),  # 等待产品页加载
+            _Step(f"点击转发按钮 {layout.forward}", lambda: _fast_click(*layout.forward)),
+        ]
+        if not self._run_chain(steps):
             return False
-        time.sleep(3)  # 等待3秒
 
-        logger.info(f"产品 {product_code} 转发页面已打开")
-
-        # 如果提供了群聊名称，执行转发操作
+        # 如果提供了群聊名称，执行转发操作（forward_to_group 内部等待转发对话框出现）
         if group_name:
-            time.sleep(3)  # 等待3秒
+            logger.info(f"产品 {product_code} 转发页面已打开")
             result = self.forward_to_group(group_name)
             # 流程完成后取消小程序窗口置顶
             self.cancel_miniprogram_topmost()
             return result
 
+        self._wait_for(lambda: self.find_forward_dialog() is not None)
+        logger.info(f"产品 {product_code} 转发页面已打开")
+
         # 流程完成后取消小程序窗口置顶
         self.cancel_miniprogram_topmost()
         return True
@@ -0,0 +1,100 @@
+"""
+进程快照模块
+
+用 CreateToolhelp32Snapshot 在进程内枚举进程名，
+替代启动 tasklist 子进程或逐个 OpenProcess 查询 exe 路径
+"""
+
+import ctypes
+import logging
+from ctypes import wintypes
+from typing import Dict, Iterator, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Windows API
+# ============================================================
+
+TH32CS_SNAPPROCESS = 0x00000002
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+
+class _PROCESSENTRY32W(ctypes.Structure):
+    _fields_ = [
+        ("dwSize", wintypes.DWORD),
+        ("cntUsage", wintypes.DWORD),
+        ("th32ProcessID", wintypes.DWORD),
+        ("th32DefaultHeapID", ctypes.c_size_t),  # ULONG_PTR
+        ("th32ModuleID", wintypes.DWORD),
+        ("cntThreads", wintypes.DWORD),
+        ("th32ParentProcessID", wintypes.DWORD),
+        ("pcPriClassBase", wintypes.LONG),
+        ("dwFlags", wintypes.DWORD),
+        ("szExeFile", wintypes.WCHAR * 260),
+    ]
+
+
+_kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+_CreateToolhelp32Snapshot = _kernel32.CreateToolhelp32Snapshot
+_CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+_CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+
+_Process32FirstW = _kernel32.Process32FirstW
+_Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(_PROCESSENTRY32W)]
+_Process32FirstW.restype = wintypes.BOOL
+
+_Process32NextW = _kernel32.Process32NextW
+_Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(_PROCESSENTRY32W)]
+_Process32NextW.restype = wintypes.BOOL
+
+_CloseHandle = _kernel32.CloseHandle
+_CloseHandle.argtypes = [wintypes.HANDLE]
+_CloseHandle.restype = wintypes.BOOL
+
+
+# ============================================================
+# 进程枚举
+# ============================================================
+
+def iter_processes() -> Iterator[Tuple[int, str]]:
+    """
+    遍历一次进程快照
+
+    不需要逐个 OpenProcess，也不会因权限不足而失败；
+    调用方提前结束遍历时快照句柄同样会被关闭。
+
+    Yields:
+        (pid, exe 文件名)；快照创建失败时不产生任何项
+    """
+    snapshot = _CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if not snapshot or snapshot == INVALID_HANDLE_VALUE:
+        logger.debug(f"创建进程快照失败: {ctypes.get_last_error()}")
+        return
+
+    try:
+        entry = _PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(_PROCESSENTRY32W)
+        ok = _Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            yield entry.th32ProcessID, entry.szExeFile
+            ok = _Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        _CloseHandle(snapshot)
+
+
+def snapshot_process_names() -> Dict[int, str]:
+    """
+    一次进程快照得到全部进程的 exe 文件名
+
+    Returns:
+        {pid: exe 文件名}，快照失败返回空字典
+
+    Examples:
+        >>> names = snapshot_process_names()
+        >>> names.get(pid, "").lower() == "wechatappex.exe"
+    """
+    return dict(iter_processes())
@@ -7,16 +7,22 @@
 - 检测微信进程是否运行
 """
 
+import time
 import logging
-import subprocess
 from typing import Optional
 
 import uiautomation as auto
 
+from .process_snapshot import iter_processes
+
 
 logger = logging.getLogger(__name__)
 
 
+# 进程列表的缓存有效期（秒）：短时间内连续查询共用一次进程快照
+PROCESS_CACHE_TTL = 2.0
+
+
 # ============================================================
 # 版本检测器
 # ============================================================
@@ -42,27 +48,61 @@ class VersionDetector:
     PROCESS_NAME = "WeChat.exe"
     PROCESS_NAME_V4 = "WeChatAppEx.exe"  # 微信 4.0+
     PROCESS_NAME_V4_QT = "Weixin.exe"    # 微信 4.1+ (Qt)
-    PROCESS_NAMES = ["WeChat.exe", "WeChatAppEx.exe", "Weixin.exe"]
+    PROCESS_NAMES = frozenset((PROCESS_NAME, PROCESS_NAME_V4, PROCESS_NAME_V4_QT))
+    PROCESS_NAMES_LOWER = frozenset(name.lower() for name in PROCESS_NAMES)
 
-    # 所有可能的主窗口类名
-    MAIN_WINDOW_CLASSES = [MAIN_WINDOW_CLASS_V4, MAIN_WINDOW_CLASS_V4_QT, MAIN_WINDOW_CLASS_V3]
-    LOGIN_WINDOW_CLASSES = [LOGIN_WINDOW_CLASS_V4, LOGIN_WINDOW_CLASS_V4_QT, LOGIN_WINDOW_CLASS_V3]
+    # 所有可能的主窗口类名（按优先级排序，不可变，getter 直接返回无需复制）
+    MAIN_WINDOW_CLASSES = (MAIN_WINDOW_CLASS_V4, MAIN_WINDOW_CLASS_V4_QT, MAIN_WINDOW_CLASS_V3)
+    LOGIN_WINDOW_CLASSES = (LOGIN_WINDOW_CLASS_V4, LOGIN_WINDOW_CLASS_V4_QT, LOGIN_WINDOW_CLASS_V3)
 
     def __init__(self):
         """初始化版本检测器"""
         self._detected_version: Optional[str] = None  # 检测到的微信版本 (v4 或 v3)
+        self._process_cache: Optional[tuple[float, frozenset[str]]] = None  # (获取时间, 小写进程名集合)
         logger.debug("版本检测器初始化完成")
 
-    def detect_version_from_window(self, window: auto.WindowControl) -> Optional[str]:
+    def _get_running_processes(self, ttl: float = PROCESS_CACHE_TTL) -> frozenset[str]:
+        """
+        获取正在运行的进程名集合（小写，带缓存）
+
+        Args:
+            ttl: 缓存有效期（秒）
+
+        Returns:
+            小写 exe 文件名集合
+        """
+        now = time.monotonic()
+        if self._process_cache is not None and now - self._process_cache[0] < ttl:
+            return self._process_cache[1]
+
+        running = frozenset(name.lower() for _, name in iter_processes())
+        self._process_cache = (now, running)
+        return running
+
+    def invalidate_process_cache(self) -> None:
+        """清除进程列表缓存，下次查询重新枚举进程"""
+        self._process_cache = None
+
+    def detect_version_from_window(
+        self,
+        window: auto.WindowControl,
+        force: bool = False
+    ) -> Optional[str]:
         """
         从窗口检测微信版本
 
+        已检测到版本时直接返回，不再读取窗口类名。
+
         Args:
             window: 微信窗口控件
+            force: 是否忽略已检测结果重新检测
 
         Returns:
             "v4" 或 "v3"，检测失败返回 None
         """
+        if self._detected_version and not force:
+            return self._detected_version
+
         if not window or not window.Exists(0, 0):
             return None
 
@@ -85,33 +125,35 @@ class VersionDetector:
             logger.error(f"检测版本失败: {e}")
             return None
 
-    def detect_version_from_process(self) -> Optional[str]:
+    def detect_version_from_process(self, force: bool = False) -> Optional[str]:
         """
         从进程名检测微信版本
 
+        已检测到版本时直接返回，不再枚举进程。
+
+        Args:
+            force: 是否忽略已检测结果重新检测
+
         Returns:
             "v4" 或 "v3"，检测失败返回 None
         """
+        if self._detected_version and not force:
+            return self._detected_version
+
         try:
-            result = subprocess.run(
-                ["tasklist"],
-                capture_output=True,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            output_lower = result.stdout.lower()
+            running = self._get_running_processes()
 
             # 检查 4.0 进程
             if (
-                self.PROCESS_NAME_V4.lower() in output_lower
-                or self.PROCESS_NAME_V4_QT.lower() in output_lower
+                self.PROCESS_NAME_V4.lower() in running
+                or self.PROCESS_NAME_V4_QT.lower() in running
             ):
                 self._detected_version = "v4"
                 logger.info("检测到微信版本: 4.0+ (从进程)")
                 return "v4"
 
             # 检查 3.x 进程
-            if self.PROCESS_NAME.lower() in output_lower:
+            if self.PROCESS_NAME.lower() in running:
                 self._detected_version = "v3"
                 logger.info("检测到微信版本: 3.x (从进程)")
                 return "v3"
@@ -149,32 +191,32 @@ class VersionDetector:
         """
         return self._detected_version == "v3"
 
-    def get_main_window_classes(self) -> list[str]:
+    def get_main_window_classes(self) -> tuple[str, ...]:
         """
-        获取主窗口类名列表（按优先级排序）
+        获取主窗口类名（按优先级排序）
 
         Returns:
-            窗口类名列表
+            窗口类名元组
         """
-        return self.MAIN_WINDOW_CLASSES.copy()
+        return self.MAIN_WINDOW_CLASSES
 
-    def get_login_window_classes(self) -> list[str]:
+    def get_login_window_classes(self) -> tuple[str, ...]:
         """
-        获取登录窗口类名列表（按优先级排序）
+        获取登录窗口类名（按优先级排序）
 
         Returns:
-            窗口类名列表
+            窗口类名元组
         """
-        return self.LOGIN_WINDOW_CLASSES.copy()
+        return self.LOGIN_WINDOW_CLASSES
 
-    def get_process_names(self) -> list[str]:
+    def get_process_names(self) -> frozenset[str]:
         """
-        获取微信进程名列表
+        获取微信进程名集合
 
         Returns:
-            进程名列表
+            进程名集合
         """
-        return self.PROCESS_NAMES.copy()
+        return self.PROCESS_NAMES
 
     def is_wechat_running(self) -> bool:
         """
@@ -185,19 +227,13 @@ class VersionDetector:
         """
         try:
             # 获取所有进程列表
-            result = subprocess.run(
-                ["tasklist"],
-                capture_output=True,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            output_lower = result.stdout.lower()
-
-            # 检查所有可能的微信进程名
-            for process_name in self.PROCESS_NAMES:
-                if process_name.lower() in output_lower:
-                    logger.debug(f"找到微信进程: {process_name}")
-                    return True
+            running = self._get_running_processes()
+
+            # 检查所有可能的微信进程名（两边都是小写集合，直接求交集）
+            found = self.PROCESS_NAMES_LOWER & running
+            if found:
+                logger.debug(f"找到微信进程: {', '.join(sorted(found))}")
+                return True
 
             return False
         except Exception as e:
@@ -12,8 +12,9 @@
 import time
 import ctypes
 import logging
+from ctypes import wintypes
 from pathlib import Path
-from typing import Optional, NamedTuple, Tuple
+from typing import Optional, NamedTuple, Sequence, Tuple
 from dataclasses import dataclass
 
 import uiautomation as auto
@@ -24,6 +25,16 @@ from services.config_manager import get_config
 logger = logging.getLogger(__name__)
 
 
+# 查找窗口的重试间隔（秒）：从最小值开始按倍数递增到最大值，
+# 窗口刚出现时能尽快发现，长时间等待时减少 UIA 调用
+WINDOW_POLL_MIN_INTERVAL = 0.025
+WINDOW_POLL_MAX_INTERVAL = 0.5
+WINDOW_POLL_BACKOFF = 1.6
+
+# 显示器列表的缓存有效期（秒）：运行期间显示器几乎不会变化
+MONITORS_CACHE_TTL = 5.0
+
+
 # ============================================================
 # 类型定义
 # ============================================================
@@ -65,12 +76,88 @@ SW_RESTORE = 9
 SW_SHOW = 5
 SW_MINIMIZE = 6
 SW_MAXIMIZE = 3
+SW_SHOWMINIMIZED = 2
 HWND_TOP = 0
 HWND_TOPMOST = -1
 HWND_NOTOPMOST = -2
 SWP_NOMOVE = 0x0002
 SWP_NOSIZE = 0x0001
 SWP_SHOWWINDOW = 0x0040
+VK_MENU = 0x12  # Alt
+KEYEVENTF_KEYUP = 0x0002
+
+
+_user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+
+def _prototype(name: str, restype, *argtypes):
+    """绑定 user32 函数并声明参数/返回类型，模块加载时解析一次"""
+    func = getattr(_user32, name)
+    func.argtypes = list(argtypes)
+    func.restype = restype
+    return func
+
+
+class _WINDOWPLACEMENT(ctypes.Structure):
+    _fields_ = [
+        ("length", wintypes.UINT),
+        ("flags", wintypes.UINT),
+        ("showCmd", wintypes.UINT),
+        ("ptMinPosition", wintypes.POINT),
+        ("ptMaxPosition", wintypes.POINT),
+        ("rcNormalPosition", wintypes.RECT),
+    ]
+
+
+_SetForegroundWindow = _prototype("SetForegroundWindow", wintypes.BOOL, wintypes.HWND)
+_GetForegroundWindow = _prototype("GetForegroundWindow", wintypes.HWND)
+_GetWindowPlacement = _prototype(
+    "GetWindowPlacement", wintypes.BOOL, wintypes.HWND, ctypes.POINTER(_WINDOWPLACEMENT)
+)
+_ShowWindow = _prototype("ShowWindow", wintypes.BOOL, wintypes.HWND, ctypes.c_int)
+_IsWindowVisible = _prototype("IsWindowVisible", wintypes.BOOL, wintypes.HWND)
+_BringWindowToTop = _prototype("BringWindowToTop", wintypes.BOOL, wintypes.HWND)
+_SetWindowPos = _prototype(
+    "SetWindowPos", wintypes.BOOL,
+    wintypes.HWND, wintypes.HWND,
+    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+    wintypes.UINT
+)
+_MoveWindow = _prototype(
+    "MoveWindow", wintypes.BOOL,
+    wintypes.HWND, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, wintypes.BOOL
+)
+_keybd_event = _prototype(
+    "keybd_event", None, wintypes.BYTE, wintypes.BYTE, wintypes.DWORD, wintypes.WPARAM
+)
+MONITORINFOF_PRIMARY = 1
+
+
+class _MONITORINFO(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", wintypes.DWORD),
+        ("rcMonitor", wintypes.LONG * 4),
+        ("rcWork", wintypes.LONG * 4),
+        ("dwFlags", wintypes.DWORD),
+    ]
+
+
+# 显示器枚举回调类型
+_MonitorEnumProc = ctypes.WINFUNCTYPE(
+    wintypes.BOOL,
+    wintypes.HMONITOR,
+    wintypes.HDC,
+    ctypes.POINTER(wintypes.RECT),
+    wintypes.LPARAM
+)
+
+_EnumDisplayMonitors = _prototype(
+    "EnumDisplayMonitors", wintypes.BOOL,
+    wintypes.HDC, ctypes.POINTER(wintypes.RECT), _MonitorEnumProc, wintypes.LPARAM
+)
+_GetMonitorInfoW = _prototype(
+    "GetMonitorInfoW", wintypes.BOOL, wintypes.HMONITOR, ctypes.POINTER(_MONITORINFO)
+)
 
 
 # ============================================================
@@ -87,6 +174,8 @@ class WindowManager:
     def __init__(self):
         """初始化窗口管理器"""
         self._screenshot_dir = Path(get_config("advanced.screenshot_dir", "screenshots"))
+        # 显示器列表缓存 (获取时间, 显示器列表)
+        self._monitors_cache: Optional[Tuple[float, list[MonitorInfo]]] = None
         logger.debug("窗口管理器初始化完成")
 
     # ========================================================
@@ -95,7 +184,7 @@ class WindowManager:
 
     def find_window_by_class(
         self,
-        class_names: list[str],
+        class_names: Sequence[str],
         timeout: int = 10,
         title_contains: Optional[str] = None
     ) -> Optional[auto.WindowControl]:
@@ -110,9 +199,10 @@ class WindowManager:
         Returns:
             窗口控件，未找到返回 None
         """
-        start_time = time.time()
+        delay = WINDOW_POLL_MIN_INTERVAL
+        deadline = time.monotonic() + timeout
 
-        while time.time() - start_time < timeout:
+        while True:
             for class_name in class_names:
                 try:
                     window = auto.WindowControl(
@@ -133,7 +223,11 @@ class WindowManager:
                 except Exception as e:
                     logger.debug(f"查找窗口时出错 ({class_name}): {e}")
 
-            time.sleep(0.5)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * WINDOW_POLL_BACKOFF, WINDOW_POLL_MAX_INTERVAL)
 
         logger.warning(f"未找到窗口，超时 {timeout} 秒")
         return None
@@ -153,19 +247,24 @@ class WindowManager:
         Returns:
             窗口控件，未找到返回 None
         """
-        start_time = time.time()
+        delay = WINDOW_POLL_MIN_INTERVAL
+        deadline = time.monotonic() + timeout
+        window = auto.WindowControl(searchDepth=1, SubName=title)
 
-        while time.time() - start_time < timeout:
+        while True:
             try:
-                # 枚举所有顶级窗口
-                window = auto.WindowControl(searchDepth=1, SubName=title)
-                if window.Exists(0.5, 0):
+                # 枚举所有顶级窗口（零超时探测，由外层循环负责重试）
+                if window.Exists(0, 0):
                     logger.info(f"找到窗口: {window.Name}")
                     return window
             except Exception as e:
                 logger.debug(f"查找窗口时出错: {e}")
 
-            time.sleep(0.5)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * WINDOW_POLL_BACKOFF, WINDOW_POLL_MAX_INTERVAL)
 
         logger.warning(f"未找到标题包含 '{title}' 的窗口")
         return None
@@ -191,42 +290,53 @@ class WindowManager:
         try:
             hwnd = window.NativeWindowHandle
 
-            # 获取窗口状态
-            user32 = ctypes.windll.user32
+            # 一次 GetWindowPlacement 得到最小化状态；托盘隐藏的窗口 showCmd 不变，可见性仍需单独判断
+            placement = _WINDOWPLACEMENT()
+            placement.length = ctypes.sizeof(_WINDOWPLACEMENT)
+            minimized = (
+                _GetWindowPlacement(hwnd, ctypes.byref(placement))
+                and placement.showCmd == SW_SHOWMINIMIZED
+            )
 
             # 如果窗口最小化或不可见，先恢复
-            if user32.IsIconic(hwnd) or not user32.IsWindowVisible(hwnd):
-                user32.ShowWindow(hwnd, SW_RESTORE)
+            if minimized or not _IsWindowVisible(hwnd):
+                _ShowWindow(hwnd, SW_RESTORE)
                 time.sleep(0.3)
+            elif _GetForegroundWindow() == hwnd:
+                logger.debug(f"窗口已在前台: hwnd={hwnd}")
+                return True
 
             try:
                 window.SetFocus()
             except Exception:
                 pass
 
-            # 设置为前台窗口
-            # 先模拟 Alt 键按下释放，解除前台锁定
-            user32.keybd_event(0x12, 0, 0, 0)  # Alt down
-            user32.keybd_event(0x12, 0, 2, 0)  # Alt up
+            # 设置为前台窗口，直接成功时不需要下面的解锁操作
+            result = _SetForegroundWindow(hwnd)
+            used_fallback = not result
 
-            result = user32.SetForegroundWindow(hwnd)
+            if not result:
+                # 模拟 Alt 键按下释放，解除前台锁定
+                _keybd_event(VK_MENU, 0, 0, 0)  # Alt down
+                _keybd_event(VK_MENU, 0, KEYEVENTF_KEYUP, 0)  # Alt up
+                result = _SetForegroundWindow(hwnd)
 
             if not result:
                 flags = SWP_NOMOVE | SWP_NOSIZE | SWP_SHOWWINDOW
-                user32.BringWindowToTop(hwnd)
-                user32.SetWindowPos(hwnd, HWND_TOPMOST, 0, 0, 0, 0, flags)
-                user32.SetWindowPos(hwnd, HWND_NOTOPMOST, 0, 0, 0, 0, flags)
+                _BringWindowToTop(hwnd)
+                _SetWindowPos(hwnd, HWND_TOPMOST, 0, 0, 0, 0, flags)
+                _SetWindowPos(hwnd, HWND_NOTOPMOST, 0, 0, 0, 0, flags)
                 time.sleep(0.1)
-                result = user32.SetForegroundWindow(hwnd)
+                result = _SetForegroundWindow(hwnd)
 
             if result:
-                # 确保窗口可见
-                user32.ShowWindow(hwnd, SW_SHOW)
+                # SetForegroundWindow 直接成功时窗口已可见且位于 Z 序顶部；
+                # 经过解锁重试时再确保一次
+                if used_fallback:
+                    _ShowWindow(hwnd, SW_SHOW)
+                    _SetWindowPos(hwnd, HWND_TOP, 0, 0, 0, 0, SWP_NOMOVE | SWP_NOSIZE | SWP_SHOWWINDOW)
 
-                # 将窗口置顶
-                user32.SetWindowPos(hwnd, HWND_TOP, 0, 0, 0, 0, SWP_NOMOVE | SWP_NOSIZE | SWP_SHOWWINDOW)
-
-                logger.debug(f"窗口已激活: {window.Name}")
+                logger.debug(f"窗口已激活: hwnd={hwnd}")
                 return True
             else:
                 logger.warning("SetForegroundWindow 返回失败")
@@ -252,7 +362,7 @@ class WindowManager:
 
         try:
             hwnd = window.NativeWindowHandle
-            ctypes.windll.user32.ShowWindow(hwnd, SW_MINIMIZE)
+            _ShowWindow(hwnd, SW_MINIMIZE)
             logger.debug("窗口已最小化")
             return True
         except Exception as e:
@@ -310,7 +420,6 @@ class WindowManager:
 
         try:
             hwnd = window.NativeWindowHandle
-            user32 = ctypes.windll.user32
 
             if width is None or height is None:
                 # 保持原始大小
@@ -322,7 +431,7 @@ class WindowManager:
                     width = width or 800
                     height = height or 600
 
-            user32.MoveWindow(hwnd, x, y, width, height, True)
+            _MoveWindow(hwnd, x, y, width, height, True)
             logger.debug(f"窗口已移动至 ({x}, {y})，大小: {width}x{height}")
             return True
 
@@ -366,26 +475,24 @@ class WindowManager:
         """
         获取所有显示器信息
 
+        结果缓存 MONITORS_CACHE_TTL 秒；显示器配置变化时可调用 invalidate_monitors 立即刷新。
+
         Returns:
             显示器信息列表
         """
+        now = time.monotonic()
+        if self._monitors_cache is not None and now - self._monitors_cache[0] < MONITORS_CACHE_TTL:
+            return list(self._monitors_cache[1])
+
         monitors = []
 
         def callback(hMonitor, hdcMonitor, lprcMonitor, dwData):
             # 获取显示器信息
-            class MONITORINFO(ctypes.Structure):
-                _fields_ = [
-                    ("cbSize", ctypes.c_ulong),
-                    ("rcMonitor", ctypes.c_long * 4),
-                    ("rcWork", ctypes.c_long * 4),
-                    ("dwFlags", ctypes.c_ulong),
-                ]
-
-            info = MONITORINFO()
-            info.cbSize = ctypes.sizeof(MONITORINFO)
-            ctypes.windll.user32.GetMonitorInfoW(hMonitor, ctypes.byref(info))
-
-            is_primary = bool(info.dwFlags & 1)  # MONITORINFOF_PRIMARY
+            info = _MONITORINFO()
+            info.cbSize = ctypes.sizeof(_MONITORINFO)
+            _GetMonitorInfoW(hMonitor, ctypes.byref(info))
+
+            is_primary = bool(info.dwFlags & MONITORINFOF_PRIMARY)
             rect = Rect(*info.rcMonitor)
             work_rect = Rect(*info.rcWork)
 
@@ -397,20 +504,16 @@ class WindowManager:
             ))
             return True
 
-        # 枚举回调类型
-        MonitorEnumProc = ctypes.WINFUNCTYPE(
-            ctypes.c_bool,
-            ctypes.c_ulong,
-            ctypes.c_ulong,
-            ctypes.POINTER(ctypes.c_long * 4),
-            ctypes.c_double
-        )
+        _EnumDisplayMonitors(None, None, _MonitorEnumProc(callback), 0)
 
-        ctypes.windll.user32.EnumDisplayMonitors(
-            None, None, MonitorEnumProc(callback), 0
-        )
+        # 枚举失败（空列表）不缓存，下次重新枚举
+        if monitors:
+            self._monitors_cache = (now, monitors)
+        return list(monitors)
 
-        return monitors
+    def invalidate_monitors(self) -> None:
+        """清除显示器列表缓存（收到 WM_DISPLAYCHANGE 等显示器变化时调用）"""
+        self._monitors_cache = None
 
     # ========================================================
     # 截图功能
@@ -153,7 +153,7 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "wechat_version": "v3.9.11",
         "timeout": {
             "element_wait": 10,
-            "window_wait": 15,
+            "window_wait": 3,
             "upload_wait": 30,
             "publish_wait": 20,
         },
@@ -563,6 +563,8 @@ class ConfigManager:
         self._selectors: Dict[str, Any] = {}
         self._config_lock = threading.RLock()
         self._selectors_lock = threading.RLock()
+        # 配置版本号：每次加载或修改配置后递增，调用方据此判断缓存是否过期
+        self._version = 0
 
         self._encryption: Optional[EncryptionManager] = None
         self._validator = ConfigValidator()
@@ -607,6 +609,8 @@ class ConfigManager:
             else:
                 logger.warning(f"配置文件不存在，使用默认配置: {self.config_file}")
 
+            self._version += 1
+
             # 验证配置
             errors = self._validator.validate(self._config)
             for error in errors:
@@ -720,6 +724,11 @@ class ConfigManager:
     # 公共接口
     # ========================================================
 
+    @property
+    def version(self) -> int:
+        """配置版本号，配置重新加载或 set() 后递增"""
+        return self._version
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         获取配置值
@@ -779,6 +788,7 @@ class ConfigManager:
 
             old_value = config.get(keys[-1])
             config[keys[-1]] = value
+            self._version += 1
 
             logger.debug(f"配置已更新: {key} = {value} (原值: {old_value})")
 
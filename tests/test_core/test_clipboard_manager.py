@@ -196,6 +196,23 @@ class TestBackupRestore:
         with pytest.raises(ClipboardError, match="无法打开剪贴板进行备份"):
             manager.backup()
 
+    @patch('core.clipboard_manager.win32clipboard')
+    def test_swap_text_single_transaction(self, mock_clipboard):
+        """测试备份与写入在同一次打开剪贴板内完成"""
+        mock_clipboard.OpenClipboard.return_value = None
+        mock_clipboard.EnumClipboardFormats.side_effect = [13, 0]
+        mock_clipboard.GetClipboardData.return_value = "原内容"
+
+        manager = ClipboardManager()
+        result = manager.swap_text("新内容")
+
+        assert result is True
+        assert manager._has_backup is True
+        assert manager._backup_content.data == "原内容"
+        mock_clipboard.OpenClipboard.assert_called_once()
+        mock_clipboard.SetClipboardData.assert_called_once_with(13, "新内容")
+        mock_clipboard.CloseClipboard.assert_called_once()
+
     @patch('core.clipboard_manager.win32clipboard')
     def test_restore_without_backup(self, mock_clipboard):
         """测试没有备份时恢复"""
@@ -2,13 +2,18 @@
 测试元素帮助工具模块
 
 测试 core/utils/element_helper.py 中定义的所有工具函数
-使用 mock 模拟 uiautomation 和 pyautogui
+使用 mock 模拟 uiautomation 和 Win32 输入
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, PropertyMock
 import time
 
 
+def _virtual_screen_metrics(index):
+    """模拟 1920x1080 单屏的虚拟桌面度量"""
+    return {76: 0, 77: 0, 78: 1920, 79: 1080}[index]
+
+
 class TestElementFinding:
     """测试元素查找方法"""
 
@@ -32,13 +37,39 @@ class TestElementFinding:
         from core.utils.element_helper import find_element_by_name
 
         mock_window = Mock()
-        mock_element = Mock()
-        mock_element.Exists.return_value = False
-        mock_window.Control.return_value = mock_element
+        mock_window.Element.FindFirstBuildCache.return_value = None
 
-        result = find_element_by_name(mock_window, "不存在的按钮")
+        result = find_element_by_name(mock_window, "不存在的按钮", timeout=0)
         assert result is None
 
+    @patch('core.utils.element_helper.auto')
+    def test_find_element_by_name_filters_control_type(self, mock_auto):
+        """测试控件类型与名称组成 AND 条件交给 UIA 过滤"""
+        from core.utils.element_helper import find_element_by_name
+
+        mock_window = Mock()
+        mock_uia = mock_auto._AutomationClient.instance.return_value.IUIAutomation
+
+        result = find_element_by_name(mock_window, "发表", "ButtonControl")
+        assert result is not None
+        mock_uia.CreateAndCondition.assert_called_once()
+        mock_window.ButtonControl.assert_not_called()
+
+    @patch('core.utils.element_helper.auto')
+    def test_find_element_by_name_honours_search_depth(self, mock_auto):
+        """测试指定较浅的搜索深度时限定深度查找，不做全部后代的条件查找"""
+        from core.utils.element_helper import find_element_by_name
+
+        mock_window = Mock()
+        mock_auto.ButtonControl.return_value.Exists.return_value = True
+
+        result = find_element_by_name(mock_window, "发送", "ButtonControl", search_depth=3)
+        assert result is mock_auto.ButtonControl.return_value
+        mock_auto.ButtonControl.assert_called_once_with(
+            searchFromControl=mock_window, searchDepth=3, Name="发送"
+        )
+        mock_window.Element.FindFirstBuildCache.assert_not_called()
+
     @patch('core.utils.element_helper.auto')
     def test_find_element_by_class_success(self, mock_auto):
         """测试按类名查找元素成功"""
@@ -65,6 +96,41 @@ class TestElementFinding:
         result = find_button(mock_window, "发表")
         assert result is not None
 
+    @patch('core.utils.element_helper.auto')
+    def test_find_element_with_fallback_single_search(self, mock_auto):
+        """测试主备选择器合并为一次 OR 查找"""
+        from core.utils.element_helper import find_element_with_fallback
+
+        mock_window = Mock()
+        mock_uia = mock_auto._AutomationClient.instance.return_value.IUIAutomation
+
+        result = find_element_with_fallback(
+            mock_window,
+            {"name": "发表", "control_type": "ButtonControl"},
+            {"class_name": "mmui::XButton", "control_type": "ButtonControl"},
+            timeout=1
+        )
+
+        assert result is not None
+        mock_uia.CreateOrCondition.assert_called_once()
+        assert mock_window.Element.FindFirstBuildCache.call_count == 1
+
+    @patch('core.utils.element_helper.auto')
+    def test_find_element_with_fallback_not_found(self, mock_auto):
+        """测试主备选择器都未找到"""
+        from core.utils.element_helper import find_element_with_fallback
+
+        mock_window = Mock()
+        mock_window.Element.FindFirstBuildCache.return_value = None
+
+        result = find_element_with_fallback(
+            mock_window,
+            {"name": "发表"},
+            {"class_name": "mmui::XButton"},
+            timeout=0
+        )
+        assert result is None
+
     @patch('core.utils.element_helper.auto')
     def test_find_input_box_v4(self, mock_auto):
         """测试查找 v4 版本输入框"""
@@ -79,6 +145,152 @@ class TestElementFinding:
         assert result is not None
 
 
+class TestElementCache:
+    """测试元素缓存"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        from core.utils.element_helper import invalidate_element_cache
+        invalidate_element_cache()
+        yield
+        invalidate_element_cache()
+
+    @patch('core.utils.element_helper.auto')
+    def test_cache_hit_skips_search(self, mock_auto):
+        """测试重复查找命中缓存，不再遍历控件树"""
+        from core.utils.element_helper import find_element_by_name
+
+        mock_window = Mock()
+        mock_window.NativeWindowHandle = 1001
+
+        first = find_element_by_name(mock_window, "发送")
+        second = find_element_by_name(mock_window, "发送")
+
+        assert first is second
+        assert mock_window.Element.FindFirstBuildCache.call_count == 1
+
+    @patch('core.utils.element_helper.auto')
+    def test_invalidate_by_hwnd(self, mock_auto):
+        """测试按窗口句柄清除缓存"""
+        from core.utils.element_helper import find_element_by_name, invalidate_element_cache
+
+        mock_window = Mock()
+        mock_window.NativeWindowHandle = 1002
+
+        find_element_by_name(mock_window, "发送")
+        invalidate_element_cache(1002)
+        find_element_by_name(mock_window, "发送")
+
+        assert mock_window.Element.FindFirstBuildCache.call_count == 2
+
+    @patch('core.utils.element_helper.auto')
+    def test_no_cache_without_hwnd(self, mock_auto):
+        """测试窗口没有原生句柄时不使用缓存"""
+        from core.utils.element_helper import find_element_by_name
+
+        first_window = Mock()
+        first_window.NativeWindowHandle = 0
+        second_window = Mock()
+        second_window.NativeWindowHandle = 0
+
+        find_element_by_name(first_window, "发送")
+        find_element_by_name(second_window, "发送")
+
+        assert second_window.Element.FindFirstBuildCache.call_count == 1
+
+
+class TestFindInputBox:
+    """测试输入框查找"""
+
+    @patch('core.utils.element_helper.auto')
+    def test_single_search_for_all_class_names(self, mock_auto):
+        """测试 v3、v4 类名合并为一次查找"""
+        from core.utils.element_helper import find_input_box
+
+        mock_window = Mock()
+        found = mock_window.Element.FindFirstBuildCache.return_value
+        found.CachedClassName = "RichEdit20W"
+        mock_uia = mock_auto._AutomationClient.instance.return_value.IUIAutomation
+
+        result = find_input_box(mock_window, timeout=1)
+
+        assert result is not None
+        assert mock_window.Element.FindFirstBuildCache.call_count == 1
+        # 3 个类名两两合并为 OR 条件
+        assert mock_uia.CreateOrCondition.call_count == 2
+
+    @patch('core.utils.element_helper.auto')
+    def test_not_found(self, mock_auto):
+        """测试所有类名和通用输入框都未找到"""
+        from core.utils.element_helper import find_input_box
+
+        mock_window = Mock()
+        mock_window.Element.FindFirstBuildCache.return_value = None
+
+        result = find_input_box(mock_window, timeout=0)
+        assert result is None
+        # 类名 OR 查找一次 + 通用 EditControl 查找一次
+        assert mock_window.Element.FindFirstBuildCache.call_count == 2
+
+
+class TestCollectControlNames:
+    """测试批量收集控件名称"""
+
+    @staticmethod
+    def _found_elements(*items):
+        """构造 FindAllBuildCache 返回的元素数组"""
+        elements = [Mock(CachedControlType=type_id, CachedName=name) for type_id, name in items]
+        found = Mock(Length=len(elements))
+        found.GetElement.side_effect = elements.__getitem__
+        return found
+
+    @patch('core.utils.element_helper.auto')
+    def test_single_find_all(self, mock_auto):
+        """测试一次 FindAll 按类型分组收集名称"""
+        from core.utils.element_helper import collect_control_names
+
+        mock_auto.ControlType.ButtonControl = 50000
+        mock_auto.ControlType.EditControl = 50004
+        mock_window = Mock()
+        mock_window.Element.FindAllBuildCache.return_value = self._found_elements(
+            (50000, "朋友圈"), (50000, "设置"), (50004, "搜索"), (50000, "")
+        )
+
+        names = collect_control_names(mock_window, ["ButtonControl", "EditControl"])
+
+        assert names == {"ButtonControl": {"朋友圈", "设置"}, "EditControl": {"搜索"}}
+        assert mock_window.Element.FindAllBuildCache.call_count == 1
+
+    @patch('core.utils.element_helper.auto')
+    def test_find_all_error(self, mock_auto):
+        """测试查找异常时返回空集合"""
+        from core.utils.element_helper import collect_control_names
+
+        mock_auto.ControlType.ButtonControl = 50000
+        mock_window = Mock()
+        mock_window.Element.FindAllBuildCache.side_effect = Exception("COM error")
+
+        assert collect_control_names(mock_window, ["ButtonControl"]) == {"ButtonControl": set()}
+
+    @patch('core.utils.element_helper.auto')
+    def test_max_depth_limits_walk(self, mock_auto):
+        """测试指定深度时逐层读取子元素，不超过最大深度"""
+        from core.utils.element_helper import collect_control_names
+
+        mock_auto.ControlType.ButtonControl = 50000
+        mock_window = Mock()
+        found = self._found_elements((50000, "发现"), (50020, "已锁定"))
+        mock_window.Element.FindAllBuildCache.return_value = found
+
+        names = collect_control_names(mock_window, ["ButtonControl"], max_depth=1)
+
+        assert names == {"ButtonControl": {"发现"}}
+        # 只读取第 1 层（TreeScope_Children），不再向下遍历
+        assert mock_window.Element.FindAllBuildCache.call_args[0][0] == 2
+        for index in range(found.Length):
+            found.GetElement(index).FindAllBuildCache.assert_not_called()
+
+
 class TestWaitMethods:
     """测试等待方法"""
 
@@ -104,14 +316,58 @@ class TestWaitMethods:
 
         mock_window = Mock()
         mock_window.Exists.return_value = True
-        mock_element = Mock()
-        mock_element.Exists.return_value = False
-        mock_window.Control.return_value = mock_element
+        mock_window.Element.FindFirstBuildCache.return_value = None
 
         # selector 的 key 应该是小写的 name，设置短超时
         result = wait_for_element(mock_window, selector={"name": "不存在"}, timeout=0.5)
         assert result is None
 
+    @patch('core.utils.element_helper._subscribe_structure_changed', return_value=None)
+    @patch('core.utils.element_helper.auto')
+    def test_wait_for_element_builds_condition_once(self, mock_auto, mock_subscribe):
+        """测试轮询期间查找条件只构建一次"""
+        from core.utils.element_helper import wait_for_element
+
+        mock_window = Mock()
+        mock_window.Element.FindFirstBuildCache.side_effect = [None, None, Mock()]
+        mock_uia = mock_auto._AutomationClient.instance.return_value.IUIAutomation
+
+        result = wait_for_element(mock_window, selector={"name": "发表"}, timeout=2)
+
+        assert result is not None
+        assert mock_window.Element.FindFirstBuildCache.call_count == 3
+        mock_uia.CreatePropertyCondition.assert_called_once()
+
+    @patch('core.utils.element_helper._subscribe_structure_changed')
+    @patch('core.utils.element_helper.auto')
+    def test_wait_for_element_polls_when_subscribed(self, mock_auto, mock_subscribe):
+        """测试订阅事件后无事件到达时仍按轮询间隔探测"""
+        from core.utils.element_helper import wait_for_element
+
+        unsubscribe = Mock()
+        mock_subscribe.return_value = unsubscribe
+        mock_window = Mock()
+        mock_window.Element.FindFirstBuildCache.side_effect = [None, None, Mock()]
+
+        result = wait_for_element(mock_window, selector={"name": "发表"}, timeout=1)
+
+        assert result is not None
+        unsubscribe.assert_called_once()
+
+    @patch('core.utils.element_helper._subscribe_structure_changed')
+    @patch('core.utils.element_helper.auto')
+    def test_wait_for_element_skips_subscribe_on_first_hit(self, mock_auto, mock_subscribe):
+        """测试首次探测即命中时不订阅结构变化事件"""
+        from core.utils.element_helper import wait_for_element
+
+        mock_window = Mock()
+        mock_window.Element.FindFirstBuildCache.return_value = Mock()
+
+        result = wait_for_element(mock_window, selector={"name": "发表"}, timeout=1)
+
+        assert result is not None
+        mock_subscribe.assert_not_called()
+
     @patch('core.utils.element_helper.auto')
     def test_wait_for_window_success(self, mock_auto):
         """测试等待窗口出现成功"""
@@ -152,19 +408,38 @@ class TestClickOperations:
         result = safe_click(mock_element)
         assert result is False
 
-    @patch('core.utils.element_helper.pyautogui')
+    def test_safe_click_skips_recheck_after_find(self):
+        """测试刚由 find_* 校验过的元素点击前不再调用 Exists"""
+        from core.utils.element_helper import safe_click, _mark_validated
+
+        mock_element = _mark_validated(Mock())
+
+        result = safe_click(mock_element, delay_after=0)
+        assert result is True
+        mock_element.Exists.assert_not_called()
+        mock_element.Click.assert_called_once()
+
+    @patch('core.utils.element_helper._GetSystemMetrics', side_effect=_virtual_screen_metrics)
+    @patch('core.utils.element_helper._send_inputs')
     @patch('core.utils.element_helper.time')
-    def test_click_at_position(self, mock_time, mock_pyautogui):
+    def test_click_at_position(self, mock_time, mock_send_inputs, mock_metrics):
         """测试坐标点击"""
-        from core.utils.element_helper import click_at_position
+        from core.utils.element_helper import (
+            click_at_position, MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP
+        )
 
         result = click_at_position(100, 200)
         assert result is True
-        mock_pyautogui.click.assert_called_once_with(100, 200)
-
-    @patch('core.utils.element_helper.pyautogui')
+        # 移动、按下、抬起一次注入
+        mock_send_inputs.assert_called_once()
+        flags = [e.mi.dwFlags for e in mock_send_inputs.call_args[0][0]]
+        assert flags[0] & MOUSEEVENTF_ABSOLUTE
+        assert flags[1:] == [MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP]
+
+    @patch('core.utils.element_helper._GetSystemMetrics', side_effect=_virtual_screen_metrics)
+    @patch('core.utils.element_helper._send_inputs')
     @patch('core.utils.element_helper.time')
-    def test_click_element_center(self, mock_time, mock_pyautogui):
+    def test_click_element_center(self, mock_time, mock_send_inputs, mock_metrics):
         """测试点击元素中心"""
         from core.utils.element_helper import click_element_center
 
@@ -180,9 +455,49 @@ class TestClickOperations:
         result = click_element_center(mock_element)
         assert result is True
 
-    @patch('core.utils.element_helper.pyautogui')
+    @patch('core.utils.element_helper._click_xy')
+    def test_click_element_center_uses_cached_rect(self, mock_click_xy):
+        """测试点击元素中心优先使用查找时缓存的矩形"""
+        from core.utils.element_helper import click_element_center
+
+        mock_element = Mock()
+        mock_element.Exists.return_value = True
+        mock_element._uia_cache = {
+            "time": time.monotonic(),
+            "Name": "发送",
+            "ClassName": "mmui::XButton",
+            "BoundingRectangle": (0, 0, 100, 50),
+        }
+        type(mock_element).BoundingRectangle = PropertyMock(side_effect=AssertionError)
+
+        result = click_element_center(mock_element)
+        assert result is True
+        mock_click_xy.assert_called_once_with(50, 25)
+
+    @patch('core.utils.element_helper._click_xy')
+    def test_click_element_center_rereads_stale_rect(self, mock_click_xy):
+        """测试缓存矩形超过 VALIDATION_TTL 后读取实时矩形"""
+        from core.utils.element_helper import click_element_center, VALIDATION_TTL
+
+        mock_element = Mock()
+        mock_element.Exists.return_value = True
+        mock_element._uia_cache = {
+            "time": time.monotonic() - VALIDATION_TTL - 1,
+            "Name": "发送",
+            "ClassName": "mmui::XButton",
+            "BoundingRectangle": (0, 0, 100, 50),
+        }
+        mock_rect = Mock(left=200, top=100, right=300, bottom=150)
+        mock_element.BoundingRectangle = mock_rect
+
+        result = click_element_center(mock_element)
+        assert result is True
+        mock_click_xy.assert_called_once_with(250, 125)
+
+    @patch('core.utils.element_helper._GetSystemMetrics', side_effect=_virtual_screen_metrics)
+    @patch('core.utils.element_helper._send_inputs')
     @patch('core.utils.element_helper.time')
-    def test_long_click(self, mock_time, mock_pyautogui):
+    def test_long_click(self, mock_time, mock_send_inputs, mock_metrics):
         """测试长按点击"""
         from core.utils.element_helper import long_click
 
@@ -197,17 +512,21 @@ class TestClickOperations:
 
         result = long_click(mock_element, duration=1.0)
         assert result is True
-        mock_pyautogui.mouseDown.assert_called_once()
-        mock_pyautogui.mouseUp.assert_called_once()
+        # 移动+按下一次注入，抬起时不再移动
+        batches = [len(c[0][0]) for c in mock_send_inputs.call_args_list]
+        assert batches == [2, 1]
+        mock_time.sleep.assert_called_once_with(1.0)
 
 
 class TestInputOperations:
     """测试输入操作"""
 
+    @patch('core.utils.element_helper.ClipboardManager')
     @patch('core.utils.element_helper.pyperclip')
-    @patch('core.utils.element_helper.pyautogui')
+    @patch('core.utils.element_helper._send_ctrl_v')
     @patch('core.utils.element_helper.time')
-    def test_input_text_via_clipboard(self, mock_time, mock_pyautogui, mock_pyperclip):
+    def test_input_text_via_clipboard(self, mock_time, mock_send_ctrl_v, mock_pyperclip,
+                                      mock_clipboard):
         """测试通过剪贴板输入文本"""
         from core.utils.element_helper import input_text_via_clipboard
 
@@ -216,31 +535,163 @@ class TestInputOperations:
 
         result = input_text_via_clipboard(mock_element, "测试文本")
         assert result is True
-        # 检查 pyperclip.copy 是否被调用（可能是直接调用或通过其他方式）
-        assert mock_pyperclip.copy.called or mock_pyautogui.hotkey.called
+        mock_clipboard.return_value.swap_text.assert_called_once_with("测试文本")
+        mock_send_ctrl_v.assert_called_once()
+        mock_clipboard.return_value.restore.assert_called_once()
+        # 快速路径不经过 pyperclip
+        mock_pyperclip.copy.assert_not_called()
 
-    @patch('core.utils.element_helper.pyautogui')
+    @patch('core.utils.element_helper.ClipboardManager')
+    @patch('core.utils.element_helper.pyperclip')
+    @patch('core.utils.element_helper._send_ctrl_v')
     @patch('core.utils.element_helper.time')
-    def test_paste_from_clipboard(self, mock_time, mock_pyautogui):
+    def test_input_text_clipboard_busy_fallback(self, mock_time, mock_send_ctrl_v,
+                                                mock_pyperclip, mock_clipboard):
+        """测试剪贴板被占用时回退到 pyperclip"""
+        from core.utils.element_helper import input_text_via_clipboard
+        from core.clipboard_manager import ClipboardError
+
+        mock_clipboard.return_value.swap_text.side_effect = ClipboardError("无法打开剪贴板")
+        mock_clipboard.return_value.has_backup.return_value = False
+        mock_pyperclip.paste.return_value = "原内容"
+        mock_element = Mock()
+        mock_element.Exists.return_value = True
+
+        result = input_text_via_clipboard(mock_element, "测试文本")
+        assert result is True
+        mock_pyperclip.copy.assert_any_call("测试文本")
+        mock_pyperclip.copy.assert_called_with("原内容")
+
+    @patch('core.utils.element_helper._send_inputs')
+    @patch('core.utils.element_helper.time')
+    def test_paste_from_clipboard(self, mock_time, mock_send_inputs):
         """测试从剪贴板粘贴"""
         from core.utils.element_helper import paste_from_clipboard
 
         result = paste_from_clipboard()
         assert result is True
-        mock_pyautogui.hotkey.assert_called_with('ctrl', 'v')
+        # Ctrl+V 的按下、抬起共 4 个事件，一次注入
+        mock_send_inputs.assert_called_once()
+        assert len(mock_send_inputs.call_args[0][0]) == 4
 
-    @patch('core.utils.element_helper.pyperclip')
-    @patch('core.utils.element_helper.pyautogui')
+    @patch('core.utils.element_helper._send_inputs')
+    def test_type_text_unicode(self, mock_send_inputs):
+        """测试直接键入文本：每个 UTF-16 码元按下、抬起，一次注入"""
+        from core.utils.element_helper import type_text, KEYEVENTF_UNICODE, KEYEVENTF_KEYUP
+
+        result = type_text("群1")
+        assert result is True
+        mock_send_inputs.assert_called_once()
+        events = mock_send_inputs.call_args[0][0]
+        assert [e.ki.wScan for e in events] == [ord("群"), ord("群"), ord("1"), ord("1")]
+        assert all(e.ki.dwFlags & KEYEVENTF_UNICODE for e in events)
+        assert [bool(e.ki.dwFlags & KEYEVENTF_KEYUP) for e in events] == [
+            False, True, False, True
+        ]
+
+    def test_key_combo_order(self):
+        """测试组合键按顺序按下、逆序抬起"""
+        from core.utils.element_helper import (
+            _key_combo, SCAN_CTRL, SCAN_V, KEYEVENTF_KEYUP
+        )
+
+        events = _key_combo(SCAN_CTRL, SCAN_V)
+        assert [e.ki.wScan for e in events] == [SCAN_CTRL, SCAN_V, SCAN_V, SCAN_CTRL]
+        assert [bool(e.ki.dwFlags & KEYEVENTF_KEYUP) for e in events] == [
+            False, False, True, True
+        ]
+
+    @patch('core.utils.element_helper._send_inputs')
+    @patch('core.utils.element_helper.time')
+    def test_paste_handles_blocked_input(self, mock_time, mock_send_inputs):
+        """测试输入被拦截时返回失败"""
+        from core.utils.element_helper import paste_from_clipboard
+
+        mock_send_inputs.side_effect = OSError(5, "拒绝访问")
+
+        result = paste_from_clipboard()
+        assert result is False
+
+    @patch('core.utils.element_helper.ClipboardManager')
+    @patch('core.utils.element_helper._send_inputs')
     @patch('core.utils.element_helper.time')
-    def test_clear_and_input(self, mock_time, mock_pyautogui, mock_pyperclip):
+    def test_clear_and_input(self, mock_time, mock_send_inputs,
+                             mock_clipboard):
         """测试清空并输入"""
         from core.utils.element_helper import clear_and_input
 
         mock_element = Mock()
         mock_element.Exists.return_value = True
+        # 不支持 ValuePattern，走键盘路径
+        mock_element.GetPattern.return_value = None
 
         result = clear_and_input(mock_element, "新文本")
         assert result is True
+        # 全选+删除 6 个事件一次注入，随后 Ctrl+V 4 个事件
+        batches = [len(c[0][0]) for c in mock_send_inputs.call_args_list]
+        assert batches == [6, 4]
+        # 只点击一次输入框
+        mock_element.Click.assert_called_once()
+
+    @patch('core.utils.element_helper._send_inputs')
+    def test_clear_and_input_via_value_pattern(self, mock_send_inputs):
+        """测试支持 ValuePattern 时直接写入 ASCII 文本"""
+        from core.utils.element_helper import clear_and_input
+
+        mock_element = Mock()
+        mock_element.Exists.return_value = True
+        mock_pattern = mock_element.GetPattern.return_value
+        mock_pattern.SetValue.return_value = True
+        mock_pattern.Value = "hello"
+
+        result = clear_and_input(mock_element, "hello")
+        assert result is True
+        mock_pattern.SetValue.assert_called_once_with("hello", waitTime=0)
+        mock_element.SetFocus.assert_called_once()
+        mock_element.Click.assert_not_called()
+        mock_send_inputs.assert_not_called()
+
+    @patch('core.utils.element_helper.ClipboardManager')
+    @patch('core.utils.element_helper._send_inputs')
+    @patch('core.utils.element_helper.time')
+    def test_clear_and_input_value_not_applied(self, mock_time, mock_send_inputs,
+                                               mock_clipboard):
+        """测试 SetValue 未生效时回退到清空并粘贴"""
+        from core.utils.element_helper import clear_and_input
+
+        mock_element = Mock()
+        mock_element.Exists.return_value = True
+        mock_pattern = mock_element.GetPattern.return_value
+        mock_pattern.SetValue.return_value = True
+        mock_pattern.Value = "旧内容"
+
+        result = clear_and_input(mock_element, "hello")
+        assert result is True
+        mock_element.Click.assert_called_once()
+        mock_clipboard.return_value.swap_text.assert_called_once_with("hello")
+        # 全选+删除 6 个事件，随后 Ctrl+V 4 个事件
+        assert [len(c[0][0]) for c in mock_send_inputs.call_args_list] == [6, 4]
+
+    @patch('core.utils.element_helper.ClipboardManager')
+    @patch('core.utils.element_helper._send_inputs')
+    @patch('core.utils.element_helper.time')
+    def test_clear_and_input_chinese_uses_clipboard(self, mock_time, mock_send_inputs,
+                                                    mock_clipboard):
+        """测试中文文本用 ValuePattern 清空后仍通过剪贴板粘贴"""
+        from core.utils.element_helper import clear_and_input
+
+        mock_element = Mock()
+        mock_element.Exists.return_value = True
+        mock_pattern = mock_element.GetPattern.return_value
+        mock_pattern.SetValue.return_value = True
+        mock_pattern.Value = ""
+
+        result = clear_and_input(mock_element, "新文本")
+        assert result is True
+        mock_pattern.SetValue.assert_called_once_with("", waitTime=0)
+        mock_clipboard.return_value.swap_text.assert_called_once_with("新文本")
+        # 只有 Ctrl+V，没有全选+删除
+        assert [len(c[0][0]) for c in mock_send_inputs.call_args_list] == [4]
 
 
 class TestWindowOperations:
@@ -259,6 +710,41 @@ class TestWindowOperations:
         # 只验证返回值是布尔类型
         assert isinstance(result, bool)
 
+    @patch('core.utils.element_helper._SetForegroundWindow', return_value=1)
+    @patch('core.utils.element_helper._send_inputs')
+    def test_activate_window_alt_unlock_single_batch(self, mock_send_inputs, mock_set_fg):
+        """测试 Alt 解锁按下、抬起一次注入"""
+        from core.utils.element_helper import activate_window, VK_MENU
+
+        mock_window = Mock()
+        mock_window.Exists.return_value = True
+        mock_window.NativeWindowHandle = 12345
+
+        with patch('core.utils.element_helper._IsIconic', return_value=0), \
+                patch('core.utils.element_helper._IsWindowVisible', return_value=1), \
+                patch('core.utils.element_helper._ShowWindow'), \
+                patch('core.utils.element_helper._SetWindowPos'):
+            assert activate_window(mock_window) is True
+
+        mock_send_inputs.assert_called_once()
+        events = mock_send_inputs.call_args[0][0]
+        assert [e.ki.wVk for e in events] == [VK_MENU, VK_MENU]
+
+    @patch('core.utils.element_helper._send_inputs')
+    @patch('core.utils.element_helper._IsIconic', return_value=0)
+    @patch('core.utils.element_helper._GetForegroundWindow', return_value=12345)
+    def test_activate_window_already_foreground(self, mock_get_fg, mock_is_iconic,
+                                                mock_send_inputs):
+        """测试窗口已在前台时直接返回"""
+        from core.utils.element_helper import activate_window
+
+        mock_window = Mock()
+        mock_window.Exists.return_value = True
+        mock_window.NativeWindowHandle = 12345
+
+        assert activate_window(mock_window) is True
+        mock_send_inputs.assert_not_called()
+
     def test_is_window_foreground(self):
         """测试检查窗口是否在前台"""
         from core.utils.element_helper import is_window_foreground
@@ -277,6 +763,8 @@ class TestWindowOperations:
 
         mock_window = Mock()
         mock_window.Exists.return_value = True
+        # 无原生句柄时走 UIA BoundingRectangle
+        mock_window.NativeWindowHandle = 0
         mock_rect = Mock()
         mock_rect.left = 0
         mock_rect.top = 0
@@ -288,6 +776,24 @@ class TestWindowOperations:
         assert result is not None
         assert len(result) == 4
 
+    @patch('core.utils.element_helper._GetWindowRect')
+    def test_get_window_rect_via_hwnd(self, mock_get_window_rect):
+        """测试有原生句柄时直接调用 GetWindowRect"""
+        from core.utils.element_helper import get_window_rect
+
+        def fill_rect(hwnd, rect_ref):
+            rect = rect_ref._obj
+            rect.left, rect.top, rect.right, rect.bottom = 10, 20, 810, 620
+            return 1
+
+        mock_get_window_rect.side_effect = fill_rect
+        mock_window = Mock()
+        mock_window.Exists.return_value = True
+        mock_window.NativeWindowHandle = 12345
+        type(mock_window).BoundingRectangle = PropertyMock(side_effect=AssertionError)
+
+        assert get_window_rect(mock_window) == (10, 20, 810, 620)
+
 
 class TestErrorHandling:
     """测试错误处理"""
@@ -298,18 +804,18 @@ class TestErrorHandling:
         from core.utils.element_helper import find_element_by_name
 
         mock_window = Mock()
-        mock_window.Control.side_effect = Exception("测试异常")
+        mock_window.Element.FindFirstBuildCache.side_effect = Exception("测试异常")
 
         result = find_element_by_name(mock_window, "测试")
         assert result is None
 
-    @patch('core.utils.element_helper.pyautogui')
+    @patch('core.utils.element_helper._send_inputs')
     @patch('core.utils.element_helper.time')
-    def test_click_handles_exception(self, mock_time, mock_pyautogui):
+    def test_click_handles_exception(self, mock_time, mock_send_inputs):
         """测试点击异常处理"""
         from core.utils.element_helper import click_at_position
 
-        mock_pyautogui.click.side_effect = Exception("点击失败")
+        mock_send_inputs.side_effect = Exception("点击失败")
 
         result = click_at_position(100, 200)
         assert result is False
@@ -335,9 +841,8 @@ class TestEdgeCases:
         assert result is False
 
     @patch('core.utils.element_helper.pyperclip')
-    @patch('core.utils.element_helper.pyautogui')
     @patch('core.utils.element_helper.time')
-    def test_input_empty_text(self, mock_time, mock_pyautogui, mock_pyperclip):
+    def test_input_empty_text(self, mock_time, mock_pyperclip):
         """测试输入空文本"""
         from core.utils.element_helper import input_text_via_clipboard
 
@@ -0,0 +1,77 @@
+"""
+测试多关键词匹配模块
+
+测试 core/utils/keyword_matcher.py 中的 KeywordMatcher
+"""
+import pytest
+
+from core.utils.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcherFind:
+    """测试 find 方法"""
+
+    def test_no_match(self):
+        """测试无匹配时返回 None"""
+        matcher = KeywordMatcher([("封号", 1), ("失败", 2)])
+        assert matcher.find("一切正常") is None
+
+    def test_empty_text(self):
+        """测试空文本"""
+        matcher = KeywordMatcher([("封号", 1)])
+        assert matcher.find("") is None
+
+    def test_empty_keywords(self):
+        """测试无关键词"""
+        matcher = KeywordMatcher([])
+        assert len(matcher) == 0
+        assert matcher.find("任意文本") is None
+
+    def test_text_shorter_than_keywords(self):
+        """测试文本短于最短关键词时直接返回"""
+        matcher = KeywordMatcher([("账号被封", 1), ("发送失败", 2)])
+        assert matcher.min_length == 4
+        assert matcher.find("失败") is None
+
+    def test_single_match(self):
+        """测试单个关键词匹配"""
+        matcher = KeywordMatcher([("封号", "critical"), ("失败", "low")])
+        assert matcher.find("发送失败") == ("失败", "low")
+
+    def test_priority_follows_keyword_order(self):
+        """测试多个命中时返回顺序最靠前的关键词"""
+        matcher = KeywordMatcher([("封号", "critical"), ("失败", "low")])
+        assert matcher.find("发送失败，账号被封号") == ("封号", "critical")
+
+    def test_overlapping_keywords(self):
+        """测试重叠关键词（后缀命中）"""
+        matcher = KeywordMatcher([
+            ("消息发送失败", "medium"),
+            ("发送失败", "low"),
+        ])
+        assert matcher.find("提示：发送失败") == ("发送失败", "low")
+        assert matcher.find("提示：消息发送失败") == ("消息发送失败", "medium")
+
+    def test_matches_naive_scan(self):
+        """测试结果与逐个 in 判断一致"""
+        keywords = ["he", "she", "his", "hers", "abc", "bca", "c"]
+        matcher = KeywordMatcher([(kw, i) for i, kw in enumerate(keywords)])
+
+        for text in ["ushers", "ahishers", "xbcax", "abcabc", "", "zzz", "sheabc"]:
+            expected = next(
+                ((kw, i) for i, kw in enumerate(keywords) if kw in text), None
+            )
+            assert matcher.find(text) == expected
+
+
+class TestKeywordMatcherIterMatches:
+    """测试 iter_matches 方法"""
+
+    def test_all_occurrences(self):
+        """测试返回全部命中位置"""
+        matcher = KeywordMatcher([("he", 1), ("she", 2), ("hers", 3)])
+        matches = list(matcher.iter_matches("ushers"))
+
+        assert (3, "she", 2) in matches
+        assert (3, "he", 1) in matches
+        assert (5, "hers", 3) in matches
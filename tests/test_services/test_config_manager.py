@@ -100,6 +100,20 @@ class TestConfigManager:
 
         config.stop()
 
+    def test_version_bumps_on_change(self, temp_config_file, temp_selectors_file):
+        """Test that the config version changes on set"""
+        config = ConfigManager(
+            config_file=str(temp_config_file),
+            selectors_file=str(temp_selectors_file),
+            auto_watch=False
+        )
+
+        version = config.version
+        config.set("schedule.daily_limit", 100)
+        assert config.version > version
+
+        config.stop()
+
     def test_get_all_config(self, temp_config_file, temp_selectors_file):
         """Test getting complete configuration"""
         config = ConfigManager(